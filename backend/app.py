@@ -13,18 +13,23 @@ from backend_stack.seeder_stack import SeederStack
 from backend_stack.genre_catalog_stack import GenreCatalogStack
 from backend_stack.notifications_stack import NotificationsStack
 from backend_stack.feed_stack import FeedStack
+from backend_stack.catalog_maintenance_stack import CatalogMaintenanceStack
+from backend_stack.versions_stack import CollectionVersionsStack
+from backend_stack.search_stack import SearchStack
+from backend_stack.snapshot_stack import CatalogSnapshotStack
 
 app = cdk.App()
 
 notifications_stack = NotificationsStack(app, "NotificationsStack")
+versions_stack = CollectionVersionsStack(app, "CollectionVersionsStack")
 genres_stack = GenresStack(app, "GenresStack")
 genre_catalog_stack = GenreCatalogStack(app, "GenreCatalogStack")
 auth_stack = AuthStack(app, "AuthStack")
 ratings_stack = RatingsStack(app, "RatingsStack", topic=notifications_stack.feed_topic)
-songs_stack = SongsStack(app, "SongsStack", genres_table=genres_stack.genres_table, genre_catalog_table=genre_catalog_stack.genre_catalog_table, ratings_table=ratings_stack.ratings_table, notifications_topic=notifications_stack.notifications_topic, feed_topic=notifications_stack.feed_topic)
-artists_stack = ArtistsStack(app, "ArtistsStack", genres_table=genres_stack.genres_table, genre_catalog_table=genre_catalog_stack.genre_catalog_table, artist_catalog_table=songs_stack.artist_catalog_table, topic=notifications_stack.notifications_topic)
+songs_stack = SongsStack(app, "SongsStack", genres_table=genres_stack.genres_table, ratings_table=ratings_stack.ratings_table, notifications_topic=notifications_stack.notifications_topic, feed_topic=notifications_stack.feed_topic, idempotency_table=notifications_stack.idempotency_table)
+artists_stack = ArtistsStack(app, "ArtistsStack", genres_table=genres_stack.genres_table, topic=notifications_stack.notifications_topic)
 subscriptions_stack = SubscriptionsStack(app, "SubscriptionsStack", artist_table=artists_stack.artists_table, genre_table=genres_stack.genres_table, feed_topic=notifications_stack.feed_topic, notifications_topic=notifications_stack.notifications_topic)
-albums_stack = AlbumsStack(app, "AlbumsStack", genres_table=genres_stack.genres_table, genre_catalog_table=genre_catalog_stack.genre_catalog_table, topic=notifications_stack.notifications_topic)
+albums_stack = AlbumsStack(app, "AlbumsStack", genres_table=genres_stack.genres_table, topic=notifications_stack.notifications_topic)
 feed_stack = FeedStack(
     app, "FeedStack",
     topic=notifications_stack.feed_topic,
@@ -34,14 +39,73 @@ feed_stack = FeedStack(
     genres_table=genres_stack.genres_table,
     albums_table=albums_stack.albums_table,
     artists_table=artists_stack.artists_table,
-    genre_catalog_table=genre_catalog_stack.genre_catalog_table
+    genre_catalog_table=genre_catalog_stack.genre_catalog_table,
+    idempotency_table=notifications_stack.idempotency_table,
+    subscriber_counts_table=subscriptions_stack.subscriber_counts_table
 )
 seeder_stack = SeederStack(app, "SeederStack")
+search_stack = SearchStack(
+    app, "SearchStack",
+    songs_table=songs_stack.songs_table,
+    albums_table=albums_stack.albums_table,
+    artists_table=artists_stack.artists_table,
+    genres_table=genres_stack.genres_table,
+    versions_table=versions_stack.versions_table
+)
+snapshot_stack = CatalogSnapshotStack(
+    app, "CatalogSnapshotStack",
+    songs_table=songs_stack.songs_table,
+    albums_table=albums_stack.albums_table,
+    artists_table=artists_stack.artists_table,
+    genres_table=genres_stack.genres_table,
+    genre_catalog_table=genre_catalog_stack.genre_catalog_table,
+    versions_table=versions_stack.versions_table,
+    snapshot_bucket=versions_stack.snapshot_bucket
+)
+catalog_maintenance_stack = CatalogMaintenanceStack(
+    app, "CatalogMaintenanceStack",
+    songs_table=songs_stack.songs_table,
+    albums_table=albums_stack.albums_table,
+    artists_table=artists_stack.artists_table,
+    genres_table=genres_stack.genres_table,
+    genre_catalog_table=genre_catalog_stack.genre_catalog_table,
+    artist_catalog_table=songs_stack.artist_catalog_table
+)
 
 albums_stack.albums_table.grant_read_write_data(artists_stack.delete_artist_lambda)
 artists_stack.delete_artist_lambda.add_environment("ALBUMS_TABLE", albums_stack.albums_table.table_name)
 
-ApiStack(app, "ApiStack",
+version_writers = [
+    songs_stack.create_song_lambda, songs_stack.edit_song_lambda, songs_stack.delete_song_lambda,
+    songs_stack.transcription_result_handler,
+    albums_stack.create_album_lambda, albums_stack.edit_album_lambda, albums_stack.delete_album_lambda,
+    artists_stack.create_artist_lambda, artists_stack.edit_artist_lambda, artists_stack.delete_artist_lambda,
+    ratings_stack.create_rating_lambda, ratings_stack.delete_rating_lambda,
+    catalog_maintenance_stack.name_updater_lambda, catalog_maintenance_stack.backfill_names_lambda,
+    catalog_maintenance_stack.edge_projector_lambda,
+    seeder_stack.seeder_lambda,
+]
+version_readers = [
+    songs_stack.get_songs_lambda, songs_stack.get_lyrics_lambda,
+    albums_stack.get_albums_lambda, artists_stack.get_artists_lambda,
+    genres_stack.get_genres_lambda, ratings_stack.get_ratings_lambda,
+    genre_catalog_stack.get_entities_by_genre_lambda,
+]
+snapshot_readers = [
+    songs_stack.get_songs_lambda, albums_stack.get_albums_lambda, artists_stack.get_artists_lambda,
+    genres_stack.get_genres_lambda, genre_catalog_stack.get_entities_by_genre_lambda,
+]
+for fn in version_writers + version_readers:
+    fn.add_environment("VERSIONS_TABLE", versions_stack.versions_table.table_name)
+for fn in version_writers:
+    versions_stack.versions_table.grant_read_write_data(fn)
+for fn in version_readers:
+    versions_stack.versions_table.grant_read_data(fn)
+for fn in snapshot_readers:
+    fn.add_environment("SNAPSHOT_BUCKET", versions_stack.snapshot_bucket.bucket_name)
+    versions_stack.snapshot_bucket.grant_read(fn)
+
+api_stack = ApiStack(app, "ApiStack",
           songs_stack=songs_stack,
           artists_stack=artists_stack,
           albums_stack=albums_stack,
@@ -50,6 +114,7 @@ ApiStack(app, "ApiStack",
           genres_stack=genres_stack,
           genre_catalog_stack=genre_catalog_stack,
           auth_stack=auth_stack,
-          feed_stack=feed_stack)
+          feed_stack=feed_stack,
+          search_stack=search_stack)
 
 app.synth()
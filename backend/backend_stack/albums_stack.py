@@ -7,7 +7,7 @@ from aws_cdk import (
 )
 
 class AlbumsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, genres_table, genre_catalog_table, topic, **kwargs):
+    def __init__(self, scope: Construct, construct_id: str, genres_table, topic, **kwargs):
         super().__init__(scope, construct_id, **kwargs)
 
         self.albums_table = dynamodb.Table(
@@ -16,6 +16,7 @@ class AlbumsStack(Stack):
             partition_key=dynamodb.Attribute(name="id", type=dynamodb.AttributeType.STRING),
             sort_key=dynamodb.Attribute(name="title", type=dynamodb.AttributeType.STRING),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             removal_policy=RemovalPolicy.DESTROY
         )
         
@@ -38,7 +39,6 @@ class AlbumsStack(Stack):
                 "ALBUMS_TABLE": self.albums_table.table_name,
                 "GENRES_TABLE": genres_table.table_name,
                 "ARTISTS_TABLE": artists_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
                 "TOPIC_ARN": topic.topic_arn
             }
         )
@@ -49,8 +49,7 @@ class AlbumsStack(Stack):
             code=_lambda.Code.from_asset('lambda'),
             handler='albums.delete_album.handler',
             environment={
-                "ALBUMS_TABLE": self.albums_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name
+                "ALBUMS_TABLE": self.albums_table.table_name
             }
         )
 
@@ -75,8 +74,7 @@ class AlbumsStack(Stack):
             environment={
                 "ALBUMS_TABLE": self.albums_table.table_name,
                 "GENRES_TABLE": genres_table.table_name,
-                "ARTISTS_TABLE": artists_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name
+                "ARTISTS_TABLE": artists_table.table_name
             }
         )
 
@@ -89,9 +87,5 @@ class AlbumsStack(Stack):
         genres_table.grant_read_data(self.get_albums_lambda)
         genres_table.grant_read_write_data(self.edit_album_lambda)
 
-        genre_catalog_table.grant_read_write_data(self.create_album_lambda)
-        genre_catalog_table.grant_read_write_data(self.delete_album_lambda)
-        genre_catalog_table.grant_read_write_data(self.edit_album_lambda)
-
         artists_table.grant_read_write_data(self.create_album_lambda)
         artists_table.grant_read_data(self.edit_album_lambda)
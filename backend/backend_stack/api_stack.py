@@ -19,6 +19,7 @@ class ApiStack(Stack):
         genre_catalog_stack,
         auth_stack,
         feed_stack,
+        search_stack,
         **kwargs
     ):
         super().__init__(scope, construct_id, **kwargs)
@@ -28,11 +29,11 @@ class ApiStack(Stack):
             rest_api_name="SongsAPI",
             deploy=True,
             deploy_options=apigw.StageOptions(stage_name="dev"),
-            default_cors_preflight_options=apigw.CorsOptions(
-                allow_origins=apigw.Cors.ALL_ORIGINS,
-                allow_methods=["GET", "OPTIONS", "PUT", "POST", "DELETE"],
-                allow_headers=["Content-Type", "Authorization"],
-            )
+            # Lets Lambdas return gzip/deflate bodies as base64; request bodies then arrive
+            # base64-encoded too, which utils.request_body decodes. CORS preflights are added
+            # below (add_preflights) rather than via default_cors_preflight_options, whose mock
+            # integrations would receive their request template as binary and fail.
+            binary_media_types=["*/*"],
         )
 
         user_pool = cognito.UserPool.from_user_pool_id(
@@ -232,6 +233,14 @@ class ApiStack(Stack):
             authorizer=authorizer
         )
 
+        search_res = api.root.add_resource("search")
+        search_res.add_method(
+            "GET",
+            apigw.LambdaIntegration(search_stack.search_lambda),
+            authorization_type=apigw.AuthorizationType.COGNITO,
+            authorizer=authorizer
+        )
+
         feed_res = api.root.add_resource("feed")
         feed_res.add_method(
             "GET",
@@ -239,3 +248,34 @@ class ApiStack(Stack):
             authorization_type=apigw.AuthorizationType.COGNITO,
             authorizer=authorizer
         )
+
+        add_preflights(api.root)
+
+PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Origin": "'*'",
+    "Access-Control-Allow-Methods": "'OPTIONS,GET,PUT,POST,DELETE'",
+    "Access-Control-Allow-Headers": "'Content-Type,Authorization,If-None-Match'",
+}
+
+def add_preflights(root):
+    """Adds an unauthenticated OPTIONS method answering CORS preflights to `root` and every
+    resource below it. The mock integration converts the request to text, as binary_media_types
+    would otherwise hand it the request template as binary."""
+    resources = [c for c in root.node.find_all() if isinstance(c, apigw.ResourceBase)]
+    for resource in resources:
+        resource.add_method(
+            "OPTIONS",
+            apigw.MockIntegration(
+                content_handling=apigw.ContentHandling.CONVERT_TO_TEXT,
+                request_templates={"application/json": '{"statusCode": 204}'},
+                integration_responses=[apigw.IntegrationResponse(
+                    status_code="204",
+                    response_parameters={f"method.response.header.{h}": v for h, v in PREFLIGHT_HEADERS.items()},
+                )],
+            ),
+            authorization_type=apigw.AuthorizationType.NONE,
+            method_responses=[apigw.MethodResponse(
+                status_code="204",
+                response_parameters={f"method.response.header.{h}": True for h in PREFLIGHT_HEADERS},
+            )],
+        )
@@ -7,7 +7,7 @@ from aws_cdk import (
 )
 
 class ArtistsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, genres_table, genre_catalog_table, artist_catalog_table, topic, **kwargs):
+    def __init__(self, scope: Construct, construct_id: str, genres_table, topic, **kwargs):
         super().__init__(scope, construct_id, **kwargs)
 
         self.artists_table = dynamodb.Table(
@@ -16,6 +16,7 @@ class ArtistsStack(Stack):
             partition_key=dynamodb.Attribute(name="id", type=dynamodb.AttributeType.STRING),
             sort_key=dynamodb.Attribute(name="name", type=dynamodb.AttributeType.STRING),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             removal_policy=RemovalPolicy.DESTROY
         )
         
@@ -33,7 +34,6 @@ class ArtistsStack(Stack):
             environment={
                 "ARTISTS_TABLE": self.artists_table.table_name,
                 "GENRES_TABLE": genres_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
                 "TOPIC_ARN": topic.topic_arn
             }
         )
@@ -44,9 +44,7 @@ class ArtistsStack(Stack):
             code=_lambda.Code.from_asset('lambda'),
             handler='artists.delete_artist.handler',
             environment={
-                "ARTISTS_TABLE": self.artists_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
-                "ARTIST_CATALOG_TABLE": artist_catalog_table.table_name
+                "ARTISTS_TABLE": self.artists_table.table_name
             }
         )
 
@@ -57,9 +55,7 @@ class ArtistsStack(Stack):
             handler='artists.edit_artist.handler',
             environment={
                 "ARTISTS_TABLE": self.artists_table.table_name,
-                "GENRES_TABLE": genres_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
-                "ARTIST_CATALOG_TABLE": artist_catalog_table.table_name
+                "GENRES_TABLE": genres_table.table_name
             }
         )
         
@@ -84,8 +80,3 @@ class ArtistsStack(Stack):
         genres_table.grant_read_write_data(self.create_artist_lambda)
         genres_table.grant_read_data(self.get_artists_lambda)
 
-        genre_catalog_table.grant_read_write_data(self.create_artist_lambda)
-        genre_catalog_table.grant_read_write_data(self.delete_artist_lambda)
-        genre_catalog_table.grant_read_write_data(self.edit_artist_lambda)
-        artist_catalog_table.grant_read_write_data(self.delete_artist_lambda)
-        artist_catalog_table.grant_read_write_data(self.edit_artist_lambda)
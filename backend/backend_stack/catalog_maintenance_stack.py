@@ -0,0 +1,91 @@
+from constructs import Construct
+from aws_cdk import (
+    Stack,
+    Duration,
+    aws_lambda as _lambda,
+    aws_lambda_event_sources as events
+)
+
+class CatalogMaintenanceStack(Stack):
+    def __init__(self, scope: Construct, construct_id: str, songs_table, albums_table, artists_table, genres_table, genre_catalog_table, artist_catalog_table, **kwargs):
+        super().__init__(scope, construct_id, **kwargs)
+
+        tables_env = {
+            "SONGS_TABLE": songs_table.table_name,
+            "ALBUMS_TABLE": albums_table.table_name,
+            "ARTISTS_TABLE": artists_table.table_name,
+            "GENRES_TABLE": genres_table.table_name
+        }
+
+        self.backfill_names_lambda = _lambda.Function(
+            self, "CatalogNamesBackfillLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="catalog.backfill_names.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            environment={**tables_env, "BACKFILL_SEGMENTS": "4"},
+            timeout=Duration.minutes(15)
+        )
+
+        self.name_updater_lambda = _lambda.Function(
+            self, "CatalogNameUpdaterLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="catalog.name_updater.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            environment={
+                **tables_env,
+                "UPDATER_SEGMENTS": "4",
+                "BACKFILL_FUNCTION": self.backfill_names_lambda.function_name
+            },
+            timeout=Duration.minutes(15)
+        )
+
+        for table in (genres_table, artists_table):
+            self.name_updater_lambda.add_event_source(
+                events.DynamoEventSource(
+                    table,
+                    starting_position=_lambda.StartingPosition.LATEST,
+                    batch_size=100,
+                    max_batching_window=Duration.seconds(30),
+                    retry_attempts=3
+                )
+            )
+
+        self.edge_projector_lambda = _lambda.Function(
+            self, "CatalogEdgeProjectorLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="catalog.edge_projector.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            environment={
+                **tables_env,
+                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
+                "ARTIST_CATALOG_TABLE": artist_catalog_table.table_name
+            },
+            memory_size=512,
+            timeout=Duration.minutes(15)
+        )
+
+        # TRIM_HORIZON so a new or recreated projector starts from everything the streams still
+        # hold; invoke it with {"rebuild": true} to recompute the projections from the tables.
+        for table in (songs_table, albums_table, artists_table):
+            self.edge_projector_lambda.add_event_source(
+                events.DynamoEventSource(
+                    table,
+                    starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                    batch_size=100,
+                    max_batching_window=Duration.seconds(1),
+                    bisect_batch_on_error=True,
+                    retry_attempts=10
+                )
+            )
+
+        for table in (songs_table, albums_table, artists_table, genres_table):
+            table.grant_read_data(self.edge_projector_lambda)
+        genre_catalog_table.grant_read_write_data(self.edge_projector_lambda)
+        artist_catalog_table.grant_read_write_data(self.edge_projector_lambda)
+
+        for fn in (self.backfill_names_lambda, self.name_updater_lambda):
+            songs_table.grant_read_write_data(fn)
+            albums_table.grant_read_write_data(fn)
+            artists_table.grant_read_write_data(fn)
+            genres_table.grant_read_data(fn)
+        self.backfill_names_lambda.grant_invoke(self.name_updater_lambda)
@@ -1,3 +1,4 @@
+import json
 from constructs import Construct
 from aws_cdk import (
     Stack,
@@ -8,17 +9,26 @@ from aws_cdk import (
     aws_dynamodb as dynamodb,
     aws_sns_subscriptions as subs,
     aws_lambda_event_sources as events,
+    aws_events,
+    aws_events_targets as targets,
     aws_s3 as s3
 )
 
+# Decay stays off by default: with it on, stored top-feed scores age and every feed event
+# rebuilds the user's top feed instead of merging into it (feed.ranking.update_top_feed).
+DEFAULT_FEED_WEIGHTS = {"decay_half_life_days": 0}
+
 class FeedStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, topic, songs_table, ratings_table, subscriptions_table, genres_table, albums_table, artists_table, genre_catalog_table, **kwargs):
+    def __init__(self, scope: Construct, construct_id: str, topic, songs_table, ratings_table, subscriptions_table, genres_table, albums_table, artists_table, genre_catalog_table, idempotency_table, subscriber_counts_table,
+                 feed_batch_size=50, feed_batching_window=Duration.seconds(5), feed_weights=None, **kwargs):
         super().__init__(scope, construct_id, **kwargs)
 
+        feed_weights_env = json.dumps(feed_weights or DEFAULT_FEED_WEIGHTS)
+
         self.feed_queue = sqs.Queue(
             self, "FeedUpdateQueue",
             queue_name="FeedUpdateQueue",
-            visibility_timeout=Duration.seconds(60),
+            visibility_timeout=Duration.seconds(360),
             retention_period=Duration.days(4),
             removal_policy=RemovalPolicy.DESTROY
         )
@@ -31,6 +41,29 @@ class FeedStack(Stack):
             partition_key=dynamodb.Attribute(name="userId", type=dynamodb.AttributeType.STRING),
             sort_key=dynamodb.Attribute(name="createdAt", type=dynamodb.AttributeType.STRING),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expiresAt",
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        self.feed_table.add_global_secondary_index(
+            index_name="UserContentIndex",
+            partition_key=dynamodb.Attribute(name="userId", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="contentKey", type=dynamodb.AttributeType.STRING),
+            projection_type=dynamodb.ProjectionType.KEYS_ONLY
+        )
+
+        self.feed_table.add_global_secondary_index(
+            index_name="UserSourceIndex",
+            partition_key=dynamodb.Attribute(name="userId", type=dynamodb.AttributeType.STRING),
+            sort_key=dynamodb.Attribute(name="sourceKey", type=dynamodb.AttributeType.STRING),
+            projection_type=dynamodb.ProjectionType.KEYS_ONLY
+        )
+
+        self.top_feed_table = dynamodb.Table(
+            self, "UserTopFeedTable",
+            table_name="UserTopFeedTable",
+            partition_key=dynamodb.Attribute(name="userId", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             removal_policy=RemovalPolicy.DESTROY
         )
 
@@ -41,17 +74,33 @@ class FeedStack(Stack):
             code=_lambda.Code.from_asset("lambda"),
             environment={
                 "FEED_TABLE": self.feed_table.table_name,
+                "TOP_FEED_TABLE": self.top_feed_table.table_name,
                 "SONGS_TABLE": songs_table.table_name,
+                "ALBUMS_TABLE": albums_table.table_name,
+                "ARTISTS_TABLE": artists_table.table_name,
                 "RATINGS_TABLE": ratings_table.table_name,
                 "SUBSCRIPTIONS_TABLE": subscriptions_table.table_name,
+                "SUBSCRIBER_COUNTS_TABLE": subscriber_counts_table.table_name,
                 "GENRES_TABLE": genres_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name
+                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
+                "IDEMPOTENCY_TABLE": idempotency_table.table_name,
+                "FANOUT_MAX_WORKERS": "8",
+                "FANOUT_PULL_THRESHOLD": "5000",
+                "FEED_ROW_TTL_DAYS": "180",
+                "FEED_MAX_AGE_DAYS": "180",
+                "FEED_MAX_ROWS": "5000",
+                "FEED_WEIGHTS": feed_weights_env
             },
-            timeout=Duration.seconds(30)
+            timeout=Duration.seconds(60)
         )
 
         self.feed_generator_lambda.add_event_source(
-            events.SqsEventSource(self.feed_queue, batch_size=5)
+            events.SqsEventSource(
+                self.feed_queue,
+                batch_size=feed_batch_size,
+                max_batching_window=feed_batching_window,
+                report_batch_item_failures=True
+            )
         )
 
         self.get_feed_lambda = _lambda.Function(
@@ -61,21 +110,81 @@ class FeedStack(Stack):
             code=_lambda.Code.from_asset("lambda"),
             environment={
                 "FEED_TABLE": self.feed_table.table_name,
+                "TOP_FEED_TABLE": self.top_feed_table.table_name,
                 "SONGS_TABLE": songs_table.table_name,
                 "ALBUMS_TABLE": albums_table.table_name,
                 "ARTISTS_TABLE": artists_table.table_name,
+                "SUBSCRIPTIONS_TABLE": subscriptions_table.table_name,
+                "SUBSCRIBER_COUNTS_TABLE": subscriber_counts_table.table_name,
                 "MEDIA_BUCKET": "songs-media",
+                "FEED_MAX_AGE_DAYS": "180",
+                "FEED_MAX_ROWS": "5000",
+                "FEED_WEIGHTS": feed_weights_env,
             },
             timeout=Duration.seconds(15)
         )
 
+        self.feed_backfill_lambda = _lambda.Function(
+            self, "FeedContentKeyBackfillLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="feed.backfill_content_key.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            environment={
+                "FEED_TABLE": self.feed_table.table_name,
+                "GENRES_TABLE": genres_table.table_name,
+                "BACKFILL_SEGMENTS": "4"
+            },
+            timeout=Duration.minutes(15)
+        )
+
+        self.compaction_state_table = dynamodb.Table(
+            self, "FeedCompactionStateTable",
+            table_name="FeedCompactionStateTable",
+            partition_key=dynamodb.Attribute(name="segment", type=dynamodb.AttributeType.NUMBER),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        self.feed_compactor_lambda = _lambda.Function(
+            self, "FeedCompactorLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="feed.compactor.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            environment={
+                "FEED_TABLE": self.feed_table.table_name,
+                "COMPACTION_STATE_TABLE": self.compaction_state_table.table_name,
+                "COMPACTION_SEGMENTS": "4",
+                "FEED_COMPACT_AFTER_DAYS": "30",
+                "FEED_MAX_RAW_ROWS": "500"
+            },
+            timeout=Duration.minutes(15)
+        )
+
+        aws_events.Rule(
+            self, "FeedCompactionSchedule",
+            schedule=aws_events.Schedule.rate(Duration.hours(6)),
+            targets=[targets.LambdaFunction(self.feed_compactor_lambda)]
+        )
+
         self.feed_table.grant_read_write_data(self.feed_generator_lambda)
+        self.feed_table.grant_read_write_data(self.feed_compactor_lambda)
+        self.compaction_state_table.grant_read_write_data(self.feed_compactor_lambda)
+        idempotency_table.grant_read_write_data(self.feed_generator_lambda)
+        self.feed_table.grant_read_write_data(self.feed_backfill_lambda)
         self.feed_table.grant_read_data(self.get_feed_lambda)
+        self.top_feed_table.grant_read_write_data(self.feed_generator_lambda)
+        self.top_feed_table.grant_read_write_data(self.get_feed_lambda)
         songs_table.grant_read_data(self.feed_generator_lambda)
         ratings_table.grant_read_data(self.feed_generator_lambda)
         subscriptions_table.grant_read_data(self.feed_generator_lambda)
+        subscriptions_table.grant_read_data(self.get_feed_lambda)
+        subscriber_counts_table.grant_read_write_data(self.feed_generator_lambda)
+        subscriber_counts_table.grant_read_data(self.get_feed_lambda)
         genres_table.grant_read_data(self.feed_generator_lambda)
+        genres_table.grant_read_data(self.feed_backfill_lambda)
         genre_catalog_table.grant_read_data(self.feed_generator_lambda)
+        albums_table.grant_read_data(self.feed_generator_lambda)
+        artists_table.grant_read_data(self.feed_generator_lambda)
         songs_table.grant_read_data(self.get_feed_lambda)
         albums_table.grant_read_data(self.get_feed_lambda)
         artists_table.grant_read_data(self.get_feed_lambda)
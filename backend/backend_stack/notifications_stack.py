@@ -1,6 +1,8 @@
 from aws_cdk import (
     Stack,
-    aws_sns as sns
+    RemovalPolicy,
+    aws_sns as sns,
+    aws_dynamodb as dynamodb
 )
 from constructs import Construct
 
@@ -17,3 +19,12 @@ class NotificationsStack(Stack):
             self, "FeedTopic",
             topic_name="FeedTopic"
         )
+
+        self.idempotency_table = dynamodb.Table(
+            self, "ProcessedEventsTable",
+            table_name="ProcessedEventsTable",
+            partition_key=dynamodb.Attribute(name="dedupeKey", type=dynamodb.AttributeType.STRING),
+            time_to_live_attribute="expiresAt",
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY
+        )
@@ -0,0 +1,62 @@
+from constructs import Construct
+from aws_cdk import (
+    Stack,
+    Duration,
+    RemovalPolicy,
+    aws_lambda as _lambda,
+    aws_s3 as s3,
+    aws_events,
+    aws_events_targets as targets
+)
+
+class SearchStack(Stack):
+    def __init__(self, scope: Construct, construct_id: str, songs_table, albums_table, artists_table, genres_table, versions_table, **kwargs):
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.index_bucket = s3.Bucket(
+            self, "SearchIndexBucket",
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True
+        )
+
+        self.build_index_lambda = _lambda.Function(
+            self, "BuildSearchIndexLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="search.build_index.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            memory_size=1024,
+            timeout=Duration.minutes(5),
+            environment={
+                "SEARCH_BUCKET": self.index_bucket.bucket_name,
+                "SONGS_TABLE": songs_table.table_name,
+                "ALBUMS_TABLE": albums_table.table_name,
+                "ARTISTS_TABLE": artists_table.table_name,
+                "GENRES_TABLE": genres_table.table_name,
+                "VERSIONS_TABLE": versions_table.table_name
+            }
+        )
+
+        self.search_lambda = _lambda.Function(
+            self, "SearchLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="search.search.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            memory_size=1024,
+            timeout=Duration.seconds(15),
+            environment={
+                "SEARCH_BUCKET": self.index_bucket.bucket_name,
+                "SEARCH_REFRESH_SECONDS": "30"
+            }
+        )
+
+        # Cheap when nothing changed: the builder compares collection versions before scanning.
+        aws_events.Rule(
+            self, "SearchIndexSchedule",
+            schedule=aws_events.Schedule.rate(Duration.minutes(5)),
+            targets=[targets.LambdaFunction(self.build_index_lambda)]
+        )
+
+        self.index_bucket.grant_read_write(self.build_index_lambda)
+        self.index_bucket.grant_read(self.search_lambda)
+        for table in (songs_table, albums_table, artists_table, genres_table, versions_table):
+            table.grant_read_data(self.build_index_lambda)
@@ -0,0 +1,42 @@
+from constructs import Construct
+from aws_cdk import (
+    Stack,
+    Duration,
+    aws_lambda as _lambda,
+    aws_events,
+    aws_events_targets as targets
+)
+
+class CatalogSnapshotStack(Stack):
+    def __init__(self, scope: Construct, construct_id: str, songs_table, albums_table, artists_table, genres_table, genre_catalog_table, versions_table, snapshot_bucket, **kwargs):
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.build_snapshot_lambda = _lambda.Function(
+            self, "BuildCatalogSnapshotLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="catalog.build_snapshot.handler",
+            code=_lambda.Code.from_asset("lambda"),
+            memory_size=1024,
+            timeout=Duration.minutes(5),
+            environment={
+                "SNAPSHOT_BUCKET": snapshot_bucket.bucket_name,
+                "SONGS_TABLE": songs_table.table_name,
+                "ALBUMS_TABLE": albums_table.table_name,
+                "ARTISTS_TABLE": artists_table.table_name,
+                "GENRES_TABLE": genres_table.table_name,
+                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
+                "VERSIONS_TABLE": versions_table.table_name
+            }
+        )
+
+        # Cheap when nothing changed: the builder compares collection versions before scanning.
+        aws_events.Rule(
+            self, "CatalogSnapshotSchedule",
+            schedule=aws_events.Schedule.rate(Duration.minutes(1)),
+            targets=[targets.LambdaFunction(self.build_snapshot_lambda)]
+        )
+
+        snapshot_bucket.grant_read_write(self.build_snapshot_lambda)
+        versions_table.grant_read_write_data(self.build_snapshot_lambda)
+        for table in (songs_table, albums_table, artists_table, genres_table, genre_catalog_table):
+            table.grant_read_data(self.build_snapshot_lambda)
@@ -11,7 +11,7 @@ from aws_cdk import (
 )
 
 class SongsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, genres_table, genre_catalog_table, ratings_table, notifications_topic, feed_topic, **kwargs):
+    def __init__(self, scope: Construct, construct_id: str, genres_table, ratings_table, notifications_topic, feed_topic, idempotency_table, **kwargs):
         super().__init__(scope, construct_id, **kwargs)
 
         self.songs_table = dynamodb.Table(
@@ -20,6 +20,7 @@ class SongsStack(Stack):
             partition_key=dynamodb.Attribute(name="id", type=dynamodb.AttributeType.STRING),
             sort_key=dynamodb.Attribute(name="title", type=dynamodb.AttributeType.STRING),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            stream=dynamodb.StreamViewType.NEW_AND_OLD_IMAGES,
             removal_policy=RemovalPolicy.DESTROY
         )
 
@@ -74,22 +75,26 @@ class SongsStack(Stack):
         self.transcription_worker = _lambda.DockerImageFunction(
             self, "TranscriptionWorker",
             code=_lambda.DockerImageCode.from_image_asset(
-                "lambda/transcriptions/whisper_worker"
+                "lambda",
+                file="transcriptions/whisper_worker/Dockerfile"
             ),
             timeout=Duration.minutes(5),
             memory_size=2048,
             environment={
-                "TRANSCRIPTIONS_BUCKET": self.media_bucket.bucket_name
+                "TRANSCRIPTIONS_BUCKET": self.media_bucket.bucket_name,
+                "IDEMPOTENCY_TABLE": idempotency_table.table_name
             }
         )
 
         self.transcribe_queue.grant_consume_messages(self.transcription_worker)
+        idempotency_table.grant_read_write_data(self.transcription_worker)
 
         _lambda.EventSourceMapping(
             self, "TranscriptionQueueMapping",
             target=self.transcription_worker,
             event_source_arn=self.transcribe_queue.queue_arn,
             batch_size=5,
+            report_batch_item_failures=True,
         )
 
         self.transcriptions_table = dynamodb.Table(
@@ -149,6 +154,12 @@ class SongsStack(Stack):
 
         feed_topic.grant_publish(self.listen_song_lambda)
 
+        artists_table = dynamodb.Table.from_table_attributes(
+            self, "ArtistsTableImport",
+            table_name="ArtistsTable",
+            global_indexes=["ArtistIdIndex"]
+        )
+
         self.create_song_lambda = _lambda.Function(
             self, 'CreateSongLambda',
             runtime=_lambda.Runtime.PYTHON_3_9,
@@ -158,8 +169,7 @@ class SongsStack(Stack):
                 "SONGS_TABLE": self.songs_table.table_name,
                 "MEDIA_BUCKET": self.media_bucket.bucket_name,
                 "GENRES_TABLE": genres_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
-                "ARTIST_CATALOG_TABLE": self.artist_catalog_table.table_name,
+                "ARTISTS_TABLE": artists_table.table_name,
                 "FEED_TOPIC_ARN": feed_topic.topic_arn,
                 "NOTIFICATIONS_TOPIC_ARN": notifications_topic.topic_arn
             }
@@ -180,8 +190,7 @@ class SongsStack(Stack):
                 "SONGS_TABLE": self.songs_table.table_name,
                 "MEDIA_BUCKET": self.media_bucket.bucket_name,
                 "GENRES_TABLE": genres_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
-                "ARTIST_CATALOG_TABLE": self.artist_catalog_table.table_name
+                "ARTISTS_TABLE": artists_table.table_name
             }
         )
 
@@ -194,8 +203,6 @@ class SongsStack(Stack):
                 "SONGS_TABLE": self.songs_table.table_name,
                 "MEDIA_BUCKET": self.media_bucket.bucket_name,
                 "GENRES_TABLE": genres_table.table_name,
-                "GENRE_CATALOG_TABLE": genre_catalog_table.table_name,
-                "ARTIST_CATALOG_TABLE": self.artist_catalog_table.table_name,
                 "RATINGS_TABLE": ratings_table.table_name
             }
         )
@@ -263,13 +270,9 @@ class SongsStack(Stack):
         genres_table.grant_read_write_data(self.create_song_lambda)
         genres_table.grant_read_data(self.get_songs_lambda)
         genres_table.grant_read_data(self.edit_song_lambda)
-        genre_catalog_table.grant_read_write_data(self.create_song_lambda)
-        genre_catalog_table.grant_read_write_data(self.delete_song_lambda)
-        genre_catalog_table.grant_read_write_data(self.edit_song_lambda)
-        self.artist_catalog_table.grant_read_write_data(self.create_song_lambda)
         self.artist_catalog_table.grant_read_data(self.get_songs_by_artist_lambda)
-        self.artist_catalog_table.grant_read_write_data(self.delete_song_lambda)
-        self.artist_catalog_table.grant_read_write_data(self.edit_song_lambda)
+        artists_table.grant_read_data(self.create_song_lambda)
+        artists_table.grant_read_data(self.edit_song_lambda)
         ratings_table.grant_read_write_data(self.delete_song_lambda)
 
         self.get_lyrics_lambda = _lambda.Function(
@@ -1,6 +1,7 @@
 from constructs import Construct
 from aws_cdk import (
     Stack,
+    Duration,
     RemovalPolicy,
     aws_dynamodb as dynamodb,
     aws_lambda as _lambda,
@@ -32,6 +33,14 @@ class SubscriptionsStack(Stack):
             partition_key=dynamodb.Attribute(name="subscriptionId", type=dynamodb.AttributeType.STRING)
         )
 
+        self.subscriber_counts_table = dynamodb.Table(
+            self, "SubscriberCountsTable",
+            table_name="SubscriberCountsTable",
+            partition_key=dynamodb.Attribute(name="targetId", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
         self.verified_email = ses.EmailIdentity(
             self,
             "VerifiedSourceEmail",
@@ -68,7 +77,8 @@ class SubscriptionsStack(Stack):
             code=_lambda.Code.from_asset("lambda"),
             handler="subscriptions.create_subscription.handler",
             environment={
-                "TABLE_NAME": self.subscriptions_table.table_name
+                "TABLE_NAME": self.subscriptions_table.table_name,
+                "SUBSCRIBER_COUNTS_TABLE": self.subscriber_counts_table.table_name
             },
         )
 
@@ -95,14 +105,32 @@ class SubscriptionsStack(Stack):
             code=_lambda.Code.from_asset("lambda"),
             handler="subscriptions.delete_subscription.handler",
             environment={
-                "TABLE_NAME": self.subscriptions_table.table_name
+                "TABLE_NAME": self.subscriptions_table.table_name,
+                "SUBSCRIBER_COUNTS_TABLE": self.subscriber_counts_table.table_name
             },
         )
 
         feed_topic.grant_publish(self.delete_subscription_lambda)
         self.delete_subscription_lambda.add_environment("TOPIC_ARN", feed_topic.topic_arn)
 
+        self.subscriber_counts_backfill_lambda = _lambda.Function(
+            self, "SubscriberCountsBackfillLambda",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            code=_lambda.Code.from_asset("lambda"),
+            handler="subscriptions.backfill_counts.handler",
+            environment={
+                "TABLE_NAME": self.subscriptions_table.table_name,
+                "SUBSCRIBER_COUNTS_TABLE": self.subscriber_counts_table.table_name,
+                "BACKFILL_SEGMENTS": "4"
+            },
+            timeout=Duration.minutes(15)
+        )
+
         self.subscriptions_table.grant_read_data(self.notifier_lambda)
         self.subscriptions_table.grant_read_write_data(self.create_subscription_lambda)
         self.subscriptions_table.grant_read_write_data(self.get_subscriptions_lambda)
-        self.subscriptions_table.grant_read_write_data(self.delete_subscription_lambda)
\ No newline at end of file
+        self.subscriptions_table.grant_read_write_data(self.delete_subscription_lambda)
+        self.subscriber_counts_table.grant_read_write_data(self.create_subscription_lambda)
+        self.subscriber_counts_table.grant_read_write_data(self.delete_subscription_lambda)
+        self.subscriptions_table.grant_read_data(self.subscriber_counts_backfill_lambda)
+        self.subscriber_counts_table.grant_read_write_data(self.subscriber_counts_backfill_lambda)
\ No newline at end of file
@@ -0,0 +1,27 @@
+from constructs import Construct
+from aws_cdk import (
+    Stack,
+    RemovalPolicy,
+    aws_dynamodb as dynamodb,
+    aws_s3 as s3
+)
+
+class CollectionVersionsStack(Stack):
+    def __init__(self, scope: Construct, construct_id: str, **kwargs):
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.versions_table = dynamodb.Table(
+            self, "CollectionVersionsTable",
+            table_name="CollectionVersionsTable",
+            partition_key=dynamodb.Attribute(name="collection", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        # Lives next to the versions table rather than with its builder so the read Lambdas'
+        # stacks can depend on it without a cycle through the catalog tables.
+        self.snapshot_bucket = s3.Bucket(
+            self, "CatalogSnapshotBucket",
+            removal_policy=RemovalPolicy.DESTROY,
+            auto_delete_objects=True
+        )
@@ -0,0 +1,80 @@
+"""Cost of utils.create_response on get_songs / get_feed sized payloads.
+
+    python benchmarks/bench_create_response.py [items ...]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lambda"))
+
+from utils import utils
+
+GENRES = ["Rock", "Pop", "Jazz", "Hip-Hop", "Classical", "Electronic", "Folk"]
+GZIP_EVENT = {"headers": {"Accept-Encoding": "gzip, deflate, br"}}
+
+def _presigned(key):
+    return (f"https://songs-media.s3.amazonaws.com/{key}?X-Amz-Algorithm=AWS4-HMAC-SHA256"
+            f"&X-Amz-Credential=ASIA{uuid.uuid4().hex[:16].upper()}%2F20260101%2Feu-central-1%2Fs3%2Faws4_request"
+            f"&X-Amz-Date=20260101T000000Z&X-Amz-Expires=3600&X-Amz-SignedHeaders=host"
+            f"&X-Amz-Security-Token={uuid.uuid4().hex * 8}&X-Amz-Signature={uuid.uuid4().hex * 2}")
+
+def song(i):
+    song_id = str(uuid.uuid4())
+    genres = random.sample(GENRES, 2)
+    return {
+        "id": song_id,
+        "title": f"Song {i}",
+        "artistIds": [str(uuid.uuid4())],
+        "artistNames": [f"Artist {i % 50}"],
+        "genreIds": [str(uuid.uuid4()) for _ in genres],
+        "genres": genres,
+        "albumId": str(uuid.uuid4()),
+        "s3KeyCover": f"{song_id}/cover/cover.jpg",
+        "s3KeyAudio": f"{song_id}/audio/track.mp3",
+        "audioUrl": _presigned(f"{song_id}/audio/track.mp3"),
+        "imageUrl": _presigned(f"{song_id}/cover/cover.jpg"),
+        "creationDate": "2026-01-01T00:00:00.000000",
+        "listenCount": Decimal(random.randint(0, 100000)),
+    }
+
+def songs_payload(n):
+    return {"data": [song(i) for i in range(n)], "nextCursor": None}
+
+def feed_payload(n):
+    entries = []
+    for i in range(n):
+        s = song(i)
+        entries.append({
+            "id": s["id"],
+            "type": "SONG",
+            "score": Decimal(str(round(random.uniform(0, 50), 3))),
+            "reasons": ["New for your genre: " + s["genres"][0]],
+            "createdAt": Decimal(1767225600000 + i),
+            "song": s,
+        })
+    return {"feed": {"songs": entries, "albums": [], "artists": [], "generatedAt": Decimal(1767225600000)}}
+
+def bench(label, fn, repeat=20):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<22} {elapsed * 1000:8.2f} ms  {len(out['body']):>10,} body bytes")
+
+def main(sizes):
+    print("encoder:", "orjson" if utils.orjson is not None else "json (orjson not installed)")
+    for n in sizes:
+        for name, payload in (("get_songs", songs_payload(n)), ("get_feed", feed_payload(n))):
+            print(f"{name}, {n:,} items")
+            bench("json default=str", lambda: {"body": json.dumps(payload, default=str)})
+            bench("create_response", lambda: utils.create_response(200, payload))
+            bench("create_response gzip", lambda: utils.create_response(200, payload, event=GZIP_EVENT))
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [50, 200, 1000])
@@ -0,0 +1,53 @@
+"""Throughput of feed.scoring on synthetic feed partitions.
+
+    python benchmarks/bench_feed_scoring.py [rows ...]
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "lambda"))
+
+from feed import scoring
+
+DAY_MS = 86400000
+
+def synthetic_rows(n, now_ms, distinct=2000):
+    rows = []
+    for i in range(n):
+        t = random.choice(("SONG", "SONG", "SONG", "ALBUM", "ARTIST", "META"))
+        ms = now_ms - random.randint(0, 180 * DAY_MS)
+        row = {
+            "createdAt": str(ms),
+            "contentId": f"{t.lower()}-{random.randrange(distinct)}",
+            "type": t,
+            "score": random.choice((2, 3, 4, 5, 8, 12, 16, 20)),
+            "reason": "New for your genre: rock",
+        }
+        if t == "SONG" and i % 10 == 0:
+            row["createdAt"] = f"LISTEN#{row['contentId']}"
+            row["reason"] = "Listening activity"
+            row["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ms / 1000))
+        rows.append(row)
+    return rows
+
+def bench(label, fn, rows):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {elapsed * 1000:9.1f} ms  {rows / elapsed:12,.0f} rows/s")
+
+def main(sizes):
+    now_ms = int(time.time() * 1000)
+    for n in sizes:
+        rows = synthetic_rows(n, now_ms)
+        cols = scoring.load_columns(rows)
+        print(f"{n:,} rows, {len(cols.keys):,} distinct items")
+        bench("load", lambda: scoring.load_columns(rows), n)
+        bench("score", lambda: scoring._score_python(cols, now_ms, scoring.WEIGHTS), n)
+        scores = scoring.score_columns(cols, now_ms)
+        bench("top-k", lambda: [scoring.top_k(m, 48) for m in scores.values()], n)
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10000, 50000, 100000])
@@ -1,34 +1,21 @@
 import uuid
-import json
 import os
 import boto3
-from boto3.dynamodb.conditions import Key
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.artists import artist_name_map
+from utils.genres import resolve_genres
+from utils.notifications import publish_all
+from utils.utils import create_response, request_body
+from utils.versions import bump
 
 dynamodb = boto3.resource("dynamodb")
 albums_table = dynamodb.Table(os.environ["ALBUMS_TABLE"])
-genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
-artists_table = dynamodb.Table(os.environ["ARTISTS_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-sns = boto3.client('sns')
 TOPIC_ARN = os.environ['TOPIC_ARN']
 
-def get_or_create_genre(genre_name):
-    response = genres_table.query(
-        IndexName="GenreNameIndex",
-        KeyConditionExpression=Key("name").eq(genre_name)
-    )
-    items = response.get("Items", [])
-    if items:
-        return {"id": items[0]["id"], "name": items[0]["name"]}
-
-    genre_id = str(uuid.uuid4())
-    genres_table.put_item(Item={"id": genre_id, "name": genre_name})
-    return {"id": genre_id, "name": genre_name}
-
+@instrumented
 def handler(event, context):
     try:
-        body = json.loads(event["body"])
+        body = request_body(event)
         title = body.get("title")
         release_date = body.get("releaseDate")
         genres = body.get("genres", [])
@@ -38,48 +25,40 @@ def handler(event, context):
             return create_response(400, {"message": "title, releaseDate and genres are required"})
 
         album_id = str(uuid.uuid4())
-        genre_data = [get_or_create_genre(g) for g in genres]
+        genre_data, created_genres = resolve_genres(genres)
+        if created_genres:
+            bump("genres")
         genre_ids = [g["id"] for g in genre_data]
 
-        valid_artist_ids = []
-        for aid in artist_ids:
-            res = artists_table.query(KeyConditionExpression=Key("id").eq(aid))
-            if res.get("Items"):
-                valid_artist_ids.append(aid)
+        known_artists = artist_name_map(artist_ids)
+        valid_artist_ids = [aid for aid in artist_ids if aid in known_artists]
+        valid_artist_names = [known_artists[aid] for aid in valid_artist_ids]
 
         item = {
             "id": album_id,
             "title": title,
             "releaseDate": release_date,
             "genreIds": genre_ids,
-            "artistIds": valid_artist_ids
+            "genres": [g["name"] for g in genre_data],
+            "artistIds": valid_artist_ids,
+            "artistNames": valid_artist_names
         }
 
+        # GenreCatalog edges are written by catalog.edge_projector from the stream.
         albums_table.put_item(Item=item)
+        bump("albums")
 
-        for g in genre_data:
-            genre_catalog_table.put_item(Item={
-                "PK": f"GENRE#{g['name']}",
-                "SK": f"ALBUM#{album_id}",
-                "entityType": "ALBUM",
-                "entityId": album_id,
-                "title": title,
-                "releaseDate": release_date
-            })
-
-        all_target_ids = genre_ids + valid_artist_ids
-        for targetId in all_target_ids:
-            sns.publish(
-                TopicArn=TOPIC_ARN,
-                Message=json.dumps({
-                    "targetId": targetId,
-                    "contentInfo": {
-                        "type": "album",
-                        "title": title,
-                        "releaseDate": release_date,
-                    }
-                })
-            )
+        publish_all(TOPIC_ARN, [
+            {
+                "targetId": target_id,
+                "contentInfo": {
+                    "type": "album",
+                    "title": title,
+                    "releaseDate": release_date,
+                }
+            }
+            for target_id in genre_ids + valid_artist_ids
+        ])
 
         return create_response(200, {
             "message": f'Album "{title}" created successfully.',
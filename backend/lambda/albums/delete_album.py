@@ -1,38 +1,15 @@
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
 from utils.utils import create_response
+from utils.versions import bump
 
 dynamodb = boto3.resource("dynamodb")
 
 albums_table = dynamodb.Table(os.environ["ALBUMS_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-
-def _delete_all_edges_for_album(album_id: str):
-    resp = genre_catalog_table.query(
-        IndexName="ByAlbumIndex",
-        KeyConditionExpression=Key("SK").eq(f"ALBUM#{album_id}"),
-        ProjectionExpression="PK, SK"
-    )
-    items = resp.get("Items", [])
-
-    while "LastEvaluatedKey" in resp:
-        resp = genre_catalog_table.query(
-            IndexName="ByAlbumIndex",
-            KeyConditionExpression=Key("SK").eq(f"ALBUM#{album_id}"),
-            ProjectionExpression="PK, SK",
-            ExclusiveStartKey=resp["LastEvaluatedKey"]
-        )
-        items.extend(resp.get("Items", []))
-
-    if not items:
-        print("No related genre catalog entries found for this album.")
-        return
-
-    with genre_catalog_table.batch_writer() as batch:
-        for it in items:
-            batch.delete_item(Key={"PK": it["PK"], "SK": it["SK"]})
 
+@instrumented
 def handler(event, context):
     try:
         album_id = event.get("pathParameters", {}).get("albumId")
@@ -54,7 +31,8 @@ def handler(event, context):
 
         albums_table.delete_item(Key={"id": album_id, "title": album_title})
 
-        _delete_all_edges_for_album(album_id)
+        # GenreCatalog edges are removed by catalog.edge_projector.
+        bump("albums")
 
         return create_response(200, {"message": True})
 
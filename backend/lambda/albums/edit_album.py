@@ -1,14 +1,16 @@
 import os
-import json
 import boto3
 import uuid
 from boto3.dynamodb.conditions import Key
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.artists import artist_names
+from utils.genres import remember
+from utils.utils import create_response, request_body
+from utils.versions import bump
 
 dynamodb = boto3.resource("dynamodb")
 albums_table = dynamodb.Table(os.environ["ALBUMS_TABLE"])
 genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
 
 def _get_or_create_genre(genre_name):
     resp = genres_table.query(
@@ -20,15 +22,18 @@ def _get_or_create_genre(genre_name):
         return {"id": items[0]["id"], "name": items[0]["name"]}
     genre_id = str(uuid.uuid4())
     genres_table.put_item(Item={"id": genre_id, "name": genre_name})
+    remember(genre_id, genre_name)
+    bump("genres")
     return {"id": genre_id, "name": genre_name}
 
+@instrumented
 def handler(event, context):
     try:
         album_id = event.get("pathParameters", {}).get("albumId")
         if not album_id:
             return create_response(400, {"message": "albumId is required"})
 
-        body = json.loads(event.get("body") or "{}")
+        body = request_body(event)
 
         resp = albums_table.query(
             KeyConditionExpression=Key("id").eq(album_id),
@@ -72,6 +77,12 @@ def handler(event, context):
         if not updated_fields and not title_changed:
             return create_response(200, {"message": "No changes detected."})
 
+        names = {}
+        if "artistIds" in updated_fields:
+            names["artistNames"] = artist_names(new_artist_ids)
+        if genre_ids_changed:
+            names["genres"] = [g["name"] for g in new_genre_data]
+
         if title_changed:
             new_item = album.copy()
             new_item["title"] = new_title
@@ -81,12 +92,13 @@ def handler(event, context):
                 new_item["artistIds"] = updated_fields["artistIds"]
             if "genreIds" in updated_fields:
                 new_item["genreIds"] = updated_fields["genreIds"]
+            new_item.update(names)
 
             albums_table.put_item(Item=new_item)
             albums_table.delete_item(Key={"id": album_id, "title": old_title})
         else:
             expr_names, expr_vals, sets = {}, {}, []
-            for k, v in updated_fields.items():
+            for k, v in {**updated_fields, **names}.items():
                 expr_names[f"#{k}"] = k
                 expr_vals[f":{k}"] = v
                 sets.append(f"#{k} = :{k}")
@@ -99,26 +111,8 @@ def handler(event, context):
                     ExpressionAttributeValues=expr_vals
                 )
 
-        if genre_ids_changed or title_changed:
-            resp = genre_catalog_table.query(
-                IndexName="ByAlbumIndex",
-                KeyConditionExpression=Key("SK").eq(f"ALBUM#{album_id}")
-            )
-            items_to_delete = resp.get("Items", [])
-            with genre_catalog_table.batch_writer() as batch:
-                for it in items_to_delete:
-                    batch.delete_item(Key={"PK": it["PK"], "SK": it["SK"]})
-
-            if new_genre_data:
-                for g in new_genre_data:
-                    genre_catalog_table.put_item(Item={
-                        "PK": f"GENRE#{g['name']}",
-                        "SK": f"ALBUM#{album_id}",
-                        "entityType": "ALBUM",
-                        "entityId": album_id,
-                        "title": new_title,
-                        "releaseDate": new_release_date
-                    })
+        # GenreCatalog edges follow through catalog.edge_projector.
+        bump("albums")
 
         return create_response(200, {
             "message": "Album updated successfully.",
@@ -1,33 +1,20 @@
 import os
 import boto3
 import uuid
-import json
-from boto3.dynamodb.conditions import Key
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.genres import resolve_genres
+from utils.notifications import publish_all
+from utils.utils import create_response, request_body
+from utils.versions import bump
 
 dynamodb = boto3.resource("dynamodb")
 artists_table = dynamodb.Table(os.environ["ARTISTS_TABLE"])
-genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-sns = boto3.client('sns')
 TOPIC_ARN = os.environ['TOPIC_ARN']
 
-def get_or_create_genre(genre_name):
-    response = genres_table.query(
-        IndexName="GenreNameIndex",
-        KeyConditionExpression=Key("name").eq(genre_name)
-    )
-    items = response.get("Items", [])
-    if items:
-        return {"id": items[0]["id"], "name": items[0]["name"]}
-
-    genre_id = str(uuid.uuid4())
-    genres_table.put_item(Item={"id": genre_id, "name": genre_name})
-    return {"id": genre_id, "name": genre_name}
-
+@instrumented
 def handler(event, context):
     try:
-        body = json.loads(event["body"])
+        body = request_body(event)
         name = body.get("name")
         biography = body.get("biography", "")
         genres = body.get("genres", [])
@@ -35,7 +22,9 @@ def handler(event, context):
         if not name or not genres:
             return create_response(400, {"message": "Name and at least one genre are required."})
 
-        genre_data = [get_or_create_genre(g) for g in genres]
+        genre_data, created_genres = resolve_genres(genres)
+        if created_genres:
+            bump("genres")
         genre_ids = [g["id"] for g in genre_data]
 
         artist_id = str(uuid.uuid4())
@@ -43,32 +32,25 @@ def handler(event, context):
             "id": artist_id,
             "name": name,
             "biography": biography,
-            "genreIds": genre_ids
+            "genreIds": genre_ids,
+            "genres": [g["name"] for g in genre_data]
         }
 
+        # GenreCatalog edges are written by catalog.edge_projector from the stream.
         artists_table.put_item(Item=item)
-
-        for g in genre_data:
-            genre_catalog_table.put_item(Item={
-                "PK": f"GENRE#{g['name']}",
-                "SK": f"ARTIST#{artist_id}",
-                "entityType": "ARTIST",
-                "entityId": artist_id,
-                "name": name
-            })
-        
-        for targetId in genre_ids:
-            sns.publish(
-                TopicArn=TOPIC_ARN,
-                Message=json.dumps({
-                    "targetId": targetId,
-                    "contentInfo": {
-                        "type": "artist",
-                        "name": name,
-                        "biography": biography
-                    }
-                })
-            )
+        bump("artists")
+
+        publish_all(TOPIC_ARN, [
+            {
+                "targetId": target_id,
+                "contentInfo": {
+                    "type": "artist",
+                    "name": name,
+                    "biography": biography
+                }
+            }
+            for target_id in genre_ids
+        ])
 
         return create_response(200, {
             "message": f"Artist '{name}' created successfully!",
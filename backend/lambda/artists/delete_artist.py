@@ -1,54 +1,15 @@
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
 from utils.utils import create_response
+from utils.versions import bump
 
 dynamodb = boto3.resource("dynamodb")
 albums_table = dynamodb.Table(os.environ["ALBUMS_TABLE"])
 artists_table = dynamodb.Table(os.environ["ARTISTS_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-artist_catalog_table = dynamodb.Table(os.environ["ARTIST_CATALOG_TABLE"])
-
-def _delete_all_edges_for_artist(artist_id):
-    resp = genre_catalog_table.query(
-        IndexName="BySongIndex",
-        KeyConditionExpression=Key('SK').eq(f'ARTIST#{artist_id}'),
-        ProjectionExpression='PK, SK'
-    )
-    items = resp.get('Items', [])
-    while 'LastEvaluatedKey' in resp:
-        resp = genre_catalog_table.query(
-            IndexName="BySongIndex",
-            KeyConditionExpression=Key('SK').eq(f'ARTIST#{artist_id}'),
-            ProjectionExpression='PK, SK',
-            ExclusiveStartKey=resp['LastEvaluatedKey']
-        )
-        items.extend(resp.get('Items', []))
-
-    if items:
-        with genre_catalog_table.batch_writer() as batch:
-            for it in items:
-                batch.delete_item(Key={'PK': it['PK'], 'SK': it['SK']})
-
-    resp = artist_catalog_table.query(
-        KeyConditionExpression=Key('PK').eq(f'ARTIST#{artist_id}'),
-        ProjectionExpression='PK, SK'
-    )
-    items = resp.get('Items', [])
-
-    while 'LastEvaluatedKey' in resp:
-        resp = artist_catalog_table.query(
-            KeyConditionExpression=Key('PK').eq(f'ARTIST#{artist_id}'),
-            ProjectionExpression='PK, SK',
-            ExclusiveStartKey=resp['LastEvaluatedKey']
-        )
-        items.extend(resp.get('Items', []))
-
-    if items:
-        with artist_catalog_table.batch_writer() as batch:
-            for it in items:
-                batch.delete_item(Key={'PK': it['PK'], 'SK': it['SK']})
 
+@instrumented
 def handler(event, context):
     try:
         artist_id = event["pathParameters"]["artistId"]
@@ -67,10 +28,11 @@ def handler(event, context):
         item = items[0]
         name = item['name']
 
-        _delete_all_edges_for_artist(artist_id)
+        # GenreCatalog edges and the ArtistCatalog partition are removed by catalog.edge_projector.
         artists_table.delete_item(Key={'id': artist_id, 'name': name})
+        bump("artists")
 
-        return create_response(200, {"message": resp})
+        return create_response(200, {"message": "Artist deleted."})
         
     except Exception as e:
         return create_response(500, {"message": str(e)})
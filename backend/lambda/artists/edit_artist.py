@@ -1,32 +1,19 @@
 import os
 import boto3
-import json
 from boto3.dynamodb.conditions import Key
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.genres import genre_names as lookup_genre_names
+from utils.utils import create_response, request_body
+from utils.versions import bump
 
 dynamodb = boto3.resource("dynamodb")
 artists_table = dynamodb.Table(os.environ["ARTISTS_TABLE"])
-genres_table  = dynamodb.Table(os.environ["GENRES_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-
-def _genre_names_by_ids(ids):
-    """Vrati listu naziva žanrova za date ID-jeve (isto kao u edit_song)."""
-    names = []
-    for gid in ids or []:
-        resp = genres_table.query(
-            IndexName="GenreIdIndex",
-            KeyConditionExpression=Key("id").eq(gid),
-            Limit=1
-        )
-        items = resp.get("Items", [])
-        if items:
-            names.append(items[0]["name"])
-    return names
 
+@instrumented
 def handler(event, context):
     try:
         artist_id = event["pathParameters"]["artistId"]
-        body = json.loads(event.get("body") or "{}")
+        body = request_body(event)
 
         resp = artists_table.query(
             KeyConditionExpression=Key("id").eq(artist_id),
@@ -55,8 +42,12 @@ def handler(event, context):
         if not changed:
             return create_response(200, {"message": "No changes detected.", "updated": [], "body": body})
 
+        stored = dict(changed)
+        if genres_changed:
+            stored["genres"] = lookup_genre_names(new_genre_ids)
+
         expr_names, expr_vals, sets = {}, {}, []
-        for k, v in changed.items():
+        for k, v in stored.items():
             expr_names[f"#{k}"] = k
             expr_vals[f":{k}"] = v
             sets.append(f"#{k} = :{k}")
@@ -68,36 +59,14 @@ def handler(event, context):
             ExpressionAttributeValues=expr_vals
         )
 
-        genre_links = {"added": [], "removed": []}
+        bump("artists")
 
+        # GenreCatalog edges follow through catalog.edge_projector; this reports what it will do.
+        genre_links = {"added": [], "removed": []}
         if genres_changed:
-            existing_items = genre_catalog_table.query(
-                IndexName="BySongIndex",
-                KeyConditionExpression=Key("SK").eq(f"ARTIST#{artist_id}")
-            ).get("Items", [])
-
-            genre_names = _genre_names_by_ids(new_genre_ids)
-            new_pks = [f"GENRE#{nm}" for nm in genre_names]
-            existing_pks = [it["PK"] for it in existing_items]
-
-            to_add   = list(set(new_pks) - set(existing_pks))
-            to_remove= list(set(existing_pks) - set(new_pks))
-
-            for pk in to_add:
-                genre_catalog_table.put_item(Item={
-                    "PK": pk,
-                    "SK": f"ARTIST#{artist_id}",
-                    "entityType": "ARTIST",
-                    "entityId": artist_id,
-                    "name": artist_name,
-                    "biography": new_bio if new_bio is not None else old_bio,
-                    "genres": genre_names
-                })
-
-            for pk in to_remove:
-                genre_catalog_table.delete_item(Key={"PK": pk, "SK": f"ARTIST#{artist_id}"})
-
-            genre_links = {"added": to_add, "removed": to_remove}
+            old_pks = set(f"GENRE#{nm}" for nm in (artist.get("genres") or lookup_genre_names(old_genre_ids)))
+            new_pks = set(f"GENRE#{nm}" for nm in stored["genres"])
+            genre_links = {"added": list(new_pks - old_pks), "removed": list(old_pks - new_pks)}
 
         return create_response(200, {
             "message": "Artist updated.",
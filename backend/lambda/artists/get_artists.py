@@ -1,37 +1,41 @@
 import os
 import boto3
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.genres import genre_names
+from utils.utils import REVALIDATE, create_response, not_modified
+from utils.versions import collection_etag
+from utils import snapshot
+from utils.pagination import PaginationError, parse_page_params, scan_page, wants
 
 dynamodb = boto3.resource("dynamodb")
 artists_table = dynamodb.Table(os.environ["ARTISTS_TABLE"])
-genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
 
-def get_genre_names(genre_ids):
-    if not genre_ids:
-        return []
-    names = []
-    for gid in genre_ids:
-        if not isinstance(gid, str):
-            continue
-        try:
-            res = genres_table.get_item(Key={"id": gid})
-            item = res.get("Item")
-            if item and "name" in item:
-                names.append(item["name"])
-        except Exception as e:
-            print(f"Error fetching genre {gid}: {e}")
-    return names
+COLLECTIONS = ["artists", "genres"]
+KEY_FIELDS = ["id", "name"]
+DERIVED_FIELDS = {"genres": ["genres", "genreIds"]}
 
+@instrumented
 def handler(event, context):
     try:
-        response = artists_table.scan()
-        artists = response.get("Items", [])
+        page = parse_page_params(event)
+        versions = snapshot.current_versions(COLLECTIONS)
+        etag = collection_etag(event, *COLLECTIONS, versions=versions)
+        if not_modified(event, etag):
+            return create_response(304, None, etag=etag, cache_control=REVALIDATE)
+
+        if snapshot.use_snapshot(page, COLLECTIONS, versions):
+            artists, next_cursor = snapshot.page_items("artists", page, KEY_FIELDS, DERIVED_FIELDS)
+        else:
+            artists, next_cursor = scan_page(artists_table, page, KEY_FIELDS, DERIVED_FIELDS)
 
         for artist in artists:
-            genre_ids = artist.get("genreIds", [])
-            artist["genres"] = get_genre_names(genre_ids)
+            if wants(page, "genres") and "genres" not in artist:
+                genre_ids = artist.get("genreIds", [])
+                artist["genres"] = genre_names(genre_ids)
 
-        return create_response(200, {"data": artists})
+        return create_response(200, {"data": artists, "nextCursor": next_cursor}, etag=etag, cache_control=REVALIDATE, event=event)
 
+    except PaginationError as e:
+        return create_response(400, {"message": str(e)})
     except Exception as e:
         return create_response(500, {"message": str(e)})
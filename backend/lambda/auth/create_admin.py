@@ -1,6 +1,7 @@
 import boto3
 import json
 import urllib3
+from utils.instrumentation import instrumented
 
 http = urllib3.PoolManager()
 
@@ -19,6 +20,7 @@ def send_response(event, context, status, data):
     headers = {"content-type": "", "content-length": str(len(response_body))}
     http.request("PUT", response_url, body=response_body, headers=headers)
 
+@instrumented
 def handler(event, context):
     cognito = boto3.client('cognito-idp')
     print("Event received:", json.dumps(event))
@@ -1,5 +1,7 @@
 import boto3
+from utils.instrumentation import instrumented
 
+@instrumented
 def handler(event, context):
     client = boto3.client('cognito-idp')
     user_pool_id = event['userPoolId']
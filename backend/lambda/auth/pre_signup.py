@@ -1,7 +1,9 @@
 import boto3
+from utils.instrumentation import instrumented
 
 client = boto3.client('cognito-idp')
 
+@instrumented
 def handler(event, context):
     user_pool_id = event['userPoolId']
     email = event['request']['userAttributes'].get('email')
@@ -0,0 +1,27 @@
+import os
+from boto3.dynamodb.conditions import Attr
+from utils.instrumentation import instrumented
+from catalog.names import ENTITY_TABLES, refresh_names
+
+TOTAL_SEGMENTS = int(os.environ.get("BACKFILL_SEGMENTS", "4"))
+
+MISSING_NAMES = Attr("genres").not_exists() | (Attr("artistIds").exists() & Attr("artistNames").not_exists())
+
+@instrumented
+def handler(event, context):
+    """Fills in `genres`/`artistNames` on catalog rows written before they were stored. Pass
+    {"all": true} to recheck every row, and feed a returned `resume` back in to continue."""
+    event = event or {}
+    entities = event.get("entities") or list(ENTITY_TABLES)
+    total_segments = int(event.get("totalSegments", TOTAL_SEGMENTS))
+    filters = {e: None if event.get("all") else MISSING_NAMES for e in entities if e in ENTITY_TABLES}
+
+    updated, unfinished = refresh_names(filters, total_segments, event.get("resume"), context)
+    print(f"backfill_names: updated {updated} rows, {sum(len(s) for s in unfinished.values())} segments unfinished")
+
+    response = {"updated": updated, "totalSegments": total_segments, "entities": list(filters)}
+    if event.get("all"):
+        response["all"] = True
+    if unfinished:
+        response["resume"] = unfinished
+    return response
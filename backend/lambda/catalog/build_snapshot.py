@@ -0,0 +1,85 @@
+import os
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from utils.instrumentation import instrumented, instrument_session
+from utils.versions import current_versions, version_items, versions_table
+from utils.snapshot import BUCKET, SNAPSHOT_ITEM, encode, item_key
+from utils.layered_store import LayeredStore, fingerprint, diff
+
+SCAN_SEGMENTS = int(os.environ.get("SNAPSHOT_SCAN_SEGMENTS", "4"))
+MAX_DELTAS = int(os.environ.get("SNAPSHOT_MAX_DELTAS", "16"))
+DELTA_MAX_FRACTION = float(os.environ.get("SNAPSHOT_DELTA_MAX_FRACTION", "0.1"))
+
+SOURCES = {
+    "songs": os.environ["SONGS_TABLE"],
+    "albums": os.environ["ALBUMS_TABLE"],
+    "artists": os.environ["ARTISTS_TABLE"],
+    "genres": os.environ["GENRES_TABLE"],
+    "genre_catalog": os.environ["GENRE_CATALOG_TABLE"],
+}
+# GenreCatalog is versioned by catalog.edge_projector, which maintains it.
+COLLECTIONS = ["songs", "albums", "artists", "genres", "genre_catalog"]
+
+store = LayeredStore(BUCKET, "snapshot/", ".json.gz", MAX_DELTAS, DELTA_MAX_FRACTION)
+
+def _scan_segment(table_name, segment):
+    table = instrument_session(boto3.session.Session()).resource("dynamodb").Table(table_name)
+    # Consistent reads, so everything counted in the versions read beforehand is included.
+    q = {"Segment": segment, "TotalSegments": SCAN_SEGMENTS, "ConsistentRead": True}
+    items = []
+    while True:
+        resp = table.scan(**q)
+        items.extend(resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return items
+        q["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+def catalog_items():
+    """{collection: {item_key: item}} for every snapshotted table."""
+    with ThreadPoolExecutor(max_workers=len(SOURCES) * SCAN_SEGMENTS) as pool:
+        futures = {
+            (collection, seg): pool.submit(_scan_segment, table_name, seg)
+            for collection, table_name in SOURCES.items()
+            for seg in range(SCAN_SEGMENTS)
+        }
+        data = {collection: {} for collection in SOURCES}
+        for (collection, _), f in futures.items():
+            for item in f.result():
+                data[collection][item_key(collection, item)] = item
+    return data
+
+@instrumented
+def handler(event, context):
+    """Rebuilds the catalog snapshot when the collection versions moved, as a delta or a fresh
+    base (see utils.layered_store); {"full": true} forces a base."""
+    event = event or {}
+    versions = current_versions(COLLECTIONS)
+    pointer = version_items([SNAPSHOT_ITEM]).get(SNAPSHOT_ITEM)
+    previous_versions = {c: int(v) for c, v in ((pointer or {}).get("sourceVersions") or {}).items()}
+    if pointer and not event.get("full") and previous_versions == versions:
+        print("build_snapshot: catalog unchanged")
+        return {"changed": False, "version": int(pointer["version"])}
+
+    data = catalog_items()
+    fingerprints = {c: {k: fingerprint(it) for k, it in items.items()} for c, items in data.items()}
+    previous = store.previous_fingerprints(pointer)
+    changed, deleted = {}, {}
+    for c in set(fingerprints) | set(previous):
+        keys, gone = diff(fingerprints.get(c, {}), previous.get(c, {}))
+        if keys:
+            changed[c] = {k: data[c][k] for k in keys}
+        if gone:
+            deleted[c] = gone
+    change_count = sum(map(len, changed.values())) + sum(map(len, deleted.values()))
+    item_count = sum(map(len, data.values()))
+
+    new_pointer, key = store.publish(
+        pointer, fingerprints, change_count, item_count,
+        write_base=lambda key: store.put(key, encode({"collections": data}), "application/gzip"),
+        write_delta=lambda key: store.put(key, encode({"collections": changed, "deletes": deleted}), "application/gzip"),
+        save_pointer=lambda p: versions_table.put_item(Item=dict(p, collection=SNAPSHOT_ITEM)),
+        full=event.get("full"),
+        sourceVersions=versions,
+    )
+    print(f"build_snapshot: wrote {key} ({change_count} changes, {item_count} items)")
+    return {"changed": bool(key), "version": int(new_pointer["version"]), "object": key}
@@ -0,0 +1,198 @@
+import os
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+from utils.instrumentation import instrumented, instrument_session
+from utils.genres import genre_names
+from utils.versions import bump
+from utils.write_scheduler import WriteScheduler
+
+LOOKUP_WORKERS = 8
+SCAN_SEGMENTS = int(os.environ.get("PROJECTOR_SCAN_SEGMENTS", "4"))
+
+dynamodb = boto3.resource("dynamodb")
+ENTITY_TABLES = {
+    "SONG": dynamodb.Table(os.environ["SONGS_TABLE"]),
+    "ALBUM": dynamodb.Table(os.environ["ALBUMS_TABLE"]),
+    "ARTIST": dynamodb.Table(os.environ["ARTISTS_TABLE"]),
+}
+genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
+artist_catalog_table = dynamodb.Table(os.environ["ARTIST_CATALOG_TABLE"])
+
+# Entity attributes copied onto its catalog edges.
+EDGE_FIELDS = {
+    "SONG": ("title", "creationDate", "s3KeyCover", "s3KeyAudio", "genres"),
+    "ALBUM": ("title", "releaseDate"),
+    "ARTIST": ("name", "biography", "genres"),
+}
+
+scheduler = WriteScheduler("edge_projector")
+_deserializer = TypeDeserializer()
+
+def _entity_type(record):
+    arn = record.get("eventSourceARN", "")
+    for entity, table in ENTITY_TABLES.items():
+        if f"table/{table.name}/" in arn:
+            return entity
+    return None
+
+def _image(image):
+    return {k: _deserializer.deserialize(v) for k, v in image.items()} if image else None
+
+def edges(entity, item):
+    """{(table name, PK, SK): edge item} for the GenreCatalog and ArtistCatalog edges an entity
+    item projects to: one per genre name and, for songs, one per artist."""
+    names = item.get("genres")
+    if names is None:
+        names = genre_names(item.get("genreIds") or [])
+    base = {"SK": f"{entity}#{item['id']}", "entityType": entity, "entityId": item["id"]}
+    for field in EDGE_FIELDS[entity]:
+        if field == "genres":
+            base["genres"] = list(names)
+        elif item.get(field) is not None:
+            base[field] = item[field]
+
+    result = {}
+    for name in dict.fromkeys(names):
+        result[(genre_catalog_table.name, f"GENRE#{name}", base["SK"])] = dict(base, PK=f"GENRE#{name}")
+    if entity == "SONG":
+        for artist_id in dict.fromkeys(item.get("artistIds") or []):
+            result[(artist_catalog_table.name, f"ARTIST#{artist_id}", base["SK"])] = dict(base, PK=f"ARTIST#{artist_id}")
+    return result
+
+def _current_items(entity, entity_id):
+    resp = ENTITY_TABLES[entity].query(KeyConditionExpression=Key("id").eq(entity_id), ConsistentRead=True)
+    return resp.get("Items", [])
+
+def _partition_keys(table, pk):
+    q = {"KeyConditionExpression": Key("PK").eq(pk), "ProjectionExpression": "PK, SK"}
+    keys = []
+    while True:
+        resp = table.query(**q)
+        keys.extend(resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return keys
+        q["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+def collect(records):
+    """Groups stream records by entity: {(entity, id): {"images": [...], "latest": {title/name:
+    image or None}, "removed": bool}}, keeping the last image per item key."""
+    touched = {}
+    for r in records:
+        entity = _entity_type(r)
+        if not entity:
+            continue
+        ddb = r.get("dynamodb", {})
+        old, new = _image(ddb.get("OldImage")), _image(ddb.get("NewImage"))
+        image = new or old
+        if not image:
+            continue
+        sort_key = image.get("title", image.get("name"))
+        entry = touched.setdefault((entity, image["id"]), {"images": [], "latest": {}, "removed": False})
+        entry["images"].extend(i for i in (old, new) if i)
+        entry["latest"][sort_key] = new
+        if r["eventName"] == "REMOVE":
+            entry["removed"] = True
+    return touched
+
+def project(touched):
+    """Brings the edges of every touched entity in line with its current item(s). Edges of the
+    images seen but no longer wanted are deleted; the wanted ones are (re)written. Titles and
+    names are sort keys, so a rename arrives as an INSERT plus a REMOVE that may land in different
+    batches; whenever a REMOVE is involved the entity is re-read rather than trusting the images.
+    Returns the number of edge writes."""
+    reread = [key for key, entry in touched.items() if entry["removed"]]
+    with ThreadPoolExecutor(max_workers=LOOKUP_WORKERS) as pool:
+        current = dict(zip(reread, pool.map(lambda key: _current_items(*key), reread)))
+
+    puts, deletes, dropped_artists = {}, set(), []
+    for (entity, entity_id), entry in touched.items():
+        if (entity, entity_id) in current:
+            live = current[(entity, entity_id)]
+        else:
+            live = [image for image in entry["latest"].values() if image]
+        wanted = {}
+        for item in live:
+            wanted.update(edges(entity, item))
+        seen = set()
+        for image in entry["images"]:
+            seen.update(edges(entity, image))
+        puts.update(wanted)
+        deletes.update(seen - set(wanted))
+        if entity == "ARTIST" and not live:
+            dropped_artists.append(entity_id)
+
+    # A deleted artist also takes the song edges filed under it.
+    for artist_id in dropped_artists:
+        for key in _partition_keys(artist_catalog_table, f"ARTIST#{artist_id}"):
+            deletes.add((artist_catalog_table.name, key["PK"], key["SK"]))
+
+    deletes -= set(puts)
+    for key, edge in puts.items():
+        scheduler.put(key[0], edge)
+    for table_name, pk, sk in deletes:
+        scheduler.delete(table_name, {"PK": pk, "SK": sk})
+    scheduler.flush()
+
+    if any(key[0] == genre_catalog_table.name for key in list(puts) + list(deletes)):
+        bump("genre_catalog")
+    return len(puts) + len(deletes)
+
+def _scan(table_name, segment, attrs=None):
+    table = instrument_session(boto3.session.Session()).resource("dynamodb").Table(table_name)
+    q = {"Segment": segment, "TotalSegments": SCAN_SEGMENTS}
+    if attrs:
+        q["ProjectionExpression"] = ", ".join(attrs)
+    items = []
+    while True:
+        resp = table.scan(**q)
+        items.extend(resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return items
+        q["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+def _scan_all(table_name, attrs=None):
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as pool:
+        return [it for part in pool.map(lambda seg: _scan(table_name, seg, attrs), range(SCAN_SEGMENTS)) for it in part]
+
+def rebuild():
+    """Recomputes both projections from the entity tables: writes every wanted edge and deletes
+    every edge no entity projects to. Song edges under artists that no longer exist are left
+    out, as deleting an artist drops them."""
+    artist_ids = {it["id"] for it in _scan_all(ENTITY_TABLES["ARTIST"].name, ["id"])}
+    wanted = {}
+    for entity, table in ENTITY_TABLES.items():
+        for item in _scan_all(table.name):
+            wanted.update(edges(entity, item))
+    wanted = {key: edge for key, edge in wanted.items()
+              if key[0] != artist_catalog_table.name or key[1][len("ARTIST#"):] in artist_ids}
+
+    for key, edge in wanted.items():
+        scheduler.put(key[0], edge)
+    orphans = 0
+    for table in (genre_catalog_table, artist_catalog_table):
+        for it in _scan_all(table.name, ["PK", "SK"]):
+            if (table.name, it["PK"], it["SK"]) not in wanted:
+                scheduler.delete(table.name, {"PK": it["PK"], "SK": it["SK"]})
+                orphans += 1
+    scheduler.flush()
+    bump("genre_catalog")
+    return {"written": len(wanted), "deleted": orphans}
+
+@instrumented
+def handler(event, context):
+    """Stream consumer for SongsTable, AlbumsTable and ArtistsTable that keeps GenreCatalog and
+    ArtistCatalog in sync; the API handlers only write the entity itself. Projection is
+    idempotent, so batches can be retried or replayed. Invoke with {"rebuild": true} to
+    recompute both projections from the tables."""
+    if event.get("rebuild"):
+        result = rebuild()
+        print(f"edge_projector: rebuilt, {result}")
+        return result
+
+    touched = collect(event.get("Records", []))
+    writes = project(touched) if touched else 0
+    print(f"edge_projector: {len(touched)} entities, {writes} edge writes")
+    scheduler.log_metrics()
+    return {"entities": len(touched), "writes": writes}
@@ -0,0 +1,103 @@
+import os
+import json
+import boto3
+from functools import reduce
+from boto3.dynamodb.conditions import Attr, Key
+from utils.instrumentation import instrumented
+from utils import artists, genres
+from utils.versions import bump
+from catalog.names import refresh_names
+
+TOTAL_SEGMENTS = int(os.environ.get("UPDATER_SEGMENTS", "4"))
+BACKFILL_FUNCTION = os.environ.get("BACKFILL_FUNCTION")
+
+dynamodb = boto3.resource("dynamodb")
+lambda_client = boto3.client("lambda")
+
+SOURCES = {
+    "GENRE": (dynamodb.Table(os.environ["GENRES_TABLE"]), "GenreIdIndex", genres.remember),
+    "ARTIST": (dynamodb.Table(os.environ["ARTISTS_TABLE"]), "ArtistIdIndex", artists.remember),
+}
+
+def _kind(record):
+    arn = record.get("eventSourceARN", "")
+    if f"table/{SOURCES['GENRE'][0].name}/" in arn:
+        return "GENRE"
+    if f"table/{SOURCES['ARTIST'][0].name}/" in arn:
+        return "ARTIST"
+    return None
+
+def _image_name(image):
+    return image["id"]["S"], image["name"]["S"]
+
+def _current_names(kind, entity_id):
+    table, index, _ = SOURCES[kind]
+    resp = table.query(IndexName=index, KeyConditionExpression=Key("id").eq(entity_id))
+    return [it["name"] for it in resp.get("Items", [])]
+
+def find_renames(records):
+    """{kind: {id: new name}} for the genres/artists renamed in this batch. `name` is the sort
+    key of both tables, so a rename arrives as a REMOVE plus an INSERT for the same id, which may
+    land in different batches; the id index tells a rename apart from a create or a delete."""
+    inserted = {"GENRE": {}, "ARTIST": {}}
+    removed = {"GENRE": {}, "ARTIST": {}}
+    for r in records:
+        kind = _kind(r)
+        if not kind:
+            continue
+        ddb = r.get("dynamodb", {})
+        if r["eventName"] in ("INSERT", "MODIFY"):
+            entity_id, name = _image_name(ddb["NewImage"])
+            inserted[kind][entity_id] = name
+        elif r["eventName"] == "REMOVE":
+            entity_id, name = _image_name(ddb["OldImage"])
+            removed[kind][entity_id] = name
+
+    renames = {"GENRE": {}, "ARTIST": {}}
+    for kind in renames:
+        for entity_id, name in inserted[kind].items():
+            if entity_id in removed[kind]:
+                if removed[kind][entity_id] != name:
+                    renames[kind][entity_id] = name
+            elif any(n != name for n in _current_names(kind, entity_id)):
+                renames[kind][entity_id] = name
+        for entity_id in set(removed[kind]) - set(inserted[kind]):
+            current = _current_names(kind, entity_id)
+            if current:
+                renames[kind][entity_id] = current[0]
+    return renames
+
+def _references(attr, ids):
+    return reduce(lambda a, b: a | b, [Attr(attr).contains(i) for i in ids]) if ids else None
+
+@instrumented
+def handler(event, context):
+    renames = find_renames(event.get("Records", []))
+    if not renames["GENRE"] and not renames["ARTIST"]:
+        return {"updated": 0}
+
+    for kind, renamed in renames.items():
+        for entity_id, name in renamed.items():
+            SOURCES[kind][2](entity_id, name)
+    bump(*[c for kind, c in (("GENRE", "genres"), ("ARTIST", "artists")) if renames[kind]])
+
+    by_genre = _references("genreIds", list(renames["GENRE"]))
+    by_artist = _references("artistIds", list(renames["ARTIST"]))
+    content_filter = reduce(lambda a, b: a | b, [f for f in (by_genre, by_artist) if f is not None])
+    filters = {"SONG": content_filter, "ALBUM": content_filter}
+    if by_genre is not None:
+        filters["ARTIST"] = by_genre
+
+    updated, unfinished = refresh_names(filters, TOTAL_SEGMENTS, context=context)
+    print(f"name_updater: renamed {renames}, updated {updated} rows")
+
+    if unfinished:
+        # Hand the rest to the backfill rather than failing the batch and rescanning from the start.
+        print(f"name_updater: {sum(len(s) for s in unfinished.values())} segments unfinished, continuing in backfill")
+        lambda_client.invoke(
+            FunctionName=BACKFILL_FUNCTION,
+            InvocationType="Event",
+            Payload=json.dumps({"all": True, "entities": list(unfinished), "totalSegments": TOTAL_SEGMENTS,
+                                "resume": unfinished}, default=str)
+        )
+    return {"updated": updated}
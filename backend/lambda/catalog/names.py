@@ -0,0 +1,112 @@
+import os
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from utils.instrumentation import instrument_session
+from utils.artists import artist_names
+from utils.genres import genre_names
+from utils.write_scheduler import WriteScheduler
+from utils.versions import bump
+
+ENTITY_TABLES = {
+    "SONG": (os.environ["SONGS_TABLE"], ("id", "title")),
+    "ALBUM": (os.environ["ALBUMS_TABLE"], ("id", "title")),
+    "ARTIST": (os.environ["ARTISTS_TABLE"], ("id", "name")),
+}
+COLLECTIONS = {"SONG": "songs", "ALBUM": "albums", "ARTIST": "artists"}
+NAME_FIELDS = ("genreIds", "genres", "artistIds", "artistNames")
+STOP_WHEN_REMAINING_MS = 20000
+
+scheduler = WriteScheduler("catalog_names")
+
+def denormalized_names(item):
+    """The `genres`/`artistNames` an entity should store, limited to the ones that differ from
+    what it already has."""
+    values = {}
+    genres = genre_names(item.get("genreIds") or [])
+    if item.get("genres") != genres:
+        values["genres"] = genres
+    if item.get("artistIds") is not None:
+        names = artist_names(item["artistIds"])
+        if item.get("artistNames") != names:
+            values["artistNames"] = names
+    return values
+
+def store_names(table, key_fields, item, values):
+    names, vals, sets = {}, {}, []
+    for i, (k, v) in enumerate(values.items()):
+        names[f"#v{i}"] = k
+        vals[f":v{i}"] = v
+        sets.append(f"#v{i} = :v{i}")
+    try:
+        scheduler.call(
+            table.update_item,
+            Key={k: item[k] for k in key_fields},
+            UpdateExpression="SET " + ", ".join(sets),
+            ConditionExpression="attribute_exists(id)",
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=vals
+        )
+        return True
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        return False
+
+def _scan_segment(entity, segment, total_segments, filter_expression, start_key, context):
+    table_name, key_fields = ENTITY_TABLES[entity]
+    table = instrument_session(boto3.session.Session()).resource("dynamodb").Table(table_name)
+    attrs = dict(enumerate(list(key_fields) + list(NAME_FIELDS)))
+    q = {
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "ProjectionExpression": ", ".join(f"#a{i}" for i in attrs),
+        "ExpressionAttributeNames": {f"#a{i}": a for i, a in attrs.items()},
+    }
+    if filter_expression is not None:
+        q["FilterExpression"] = filter_expression
+    if start_key:
+        q["ExclusiveStartKey"] = start_key
+
+    updated = 0
+    while True:
+        resp = table.scan(**q)
+        for it in resp.get("Items", []):
+            values = denormalized_names(it)
+            if values and store_names(table, key_fields, it, values):
+                updated += 1
+
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return updated, None
+        q["ExclusiveStartKey"] = last_key
+        if context and context.get_remaining_time_in_millis() < STOP_WHEN_REMAINING_MS:
+            return updated, last_key
+
+def refresh_names(filters, total_segments, resume=None, context=None):
+    """Parallel segmented scan of the entity tables in `filters` (entity -> FilterExpression or
+    None), rewriting stored names that are missing or stale. Returns (updated, unfinished),
+    where unfinished maps entity -> {segment: start key} for segments cut short by the timeout."""
+    if resume:
+        work = [(entity, int(seg), key) for entity, segs in resume.items() if entity in filters
+                for seg, key in segs.items()]
+    else:
+        work = [(entity, seg, None) for entity in filters for seg in range(total_segments)]
+    if not work:
+        return 0, {}
+
+    with ThreadPoolExecutor(max_workers=len(work)) as pool:
+        futures = {
+            (entity, seg): pool.submit(_scan_segment, entity, seg, total_segments, filters[entity], key, context)
+            for entity, seg, key in work
+        }
+        results = {k: f.result() for k, f in futures.items()}
+
+    updated = sum(r[0] for r in results.values())
+    bump(*sorted({COLLECTIONS[entity] for (entity, _), r in results.items() if r[0]}))
+    unfinished = {}
+    for (entity, seg), (_, last_key) in results.items():
+        if last_key:
+            unfinished.setdefault(entity, {})[str(seg)] = last_key
+    scheduler.log_metrics()
+    return updated, unfinished
@@ -0,0 +1,106 @@
+import os
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from utils.instrumentation import instrumented, instrument_session
+from feed.feed_keys import content_key, source_attrs
+from utils.write_scheduler import WriteScheduler
+from utils.genres import genre_ids_by_name
+
+FEED_TABLE = os.environ["FEED_TABLE"]
+TOTAL_SEGMENTS = int(os.environ.get("BACKFILL_SEGMENTS", "4"))
+STOP_WHEN_REMAINING_MS = 20000
+
+scheduler = WriteScheduler("backfill")
+
+REASON_PREFIXES = (
+    ("New for your genre: ", "GENRE"),
+    ("New for your artist: ", "ARTIST"),
+    ("Subscription to genre ", "GENRE"),
+    ("Subscription to artist ", "ARTIST"),
+)
+
+def derive_source(it, genre_ids):
+    """Recovers a legacy row's provenance from its free-text reason, or None."""
+    reason = it.get("reason") or ""
+    for prefix, source_type in REASON_PREFIXES:
+        if reason.startswith(prefix):
+            return source_type, reason[len(prefix):]
+    if reason.startswith("Connected by genre: "):
+        genre_id = genre_ids.get(reason[len("Connected by genre: "):])
+        return ("GENRE", genre_id) if genre_id else None
+    if reason.startswith("Rated song"):
+        return "RATING", it["contentId"]
+    if reason.lower() == "listening activity":
+        return "LISTEN", it["contentId"]
+    return None
+
+def _backfill_segment(segment, total_segments, start_key, context, genre_ids):
+    table = instrument_session(boto3.session.Session()).resource("dynamodb").Table(FEED_TABLE)
+    q = {
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "FilterExpression": (Attr("contentKey").not_exists() | Attr("sourceKey").not_exists())
+                            & Attr("contentId").exists() & Attr("type").exists(),
+        "ProjectionExpression": "userId, createdAt, contentId, #t, reason",
+        "ExpressionAttributeNames": {"#t": "type"},
+    }
+    if start_key:
+        q["ExclusiveStartKey"] = start_key
+
+    updated = 0
+    while True:
+        resp = table.scan(**q)
+        for it in resp.get("Items", []):
+            values = {":k": content_key(it["contentId"], it["type"])}
+            update_expr = "SET contentKey = :k"
+            source = derive_source(it, genre_ids)
+            if source:
+                for i, (name, value) in enumerate(source_attrs(*source).items()):
+                    update_expr += f", {name} = :s{i}"
+                    values[f":s{i}"] = value
+            try:
+                scheduler.call(
+                    table.update_item,
+                    Key={"userId": it["userId"], "createdAt": it["createdAt"]},
+                    UpdateExpression=update_expr,
+                    ConditionExpression="attribute_exists(userId)",
+                    ExpressionAttributeValues=values
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return updated, None
+        q["ExclusiveStartKey"] = last_key
+        if context and context.get_remaining_time_in_millis() < STOP_WHEN_REMAINING_MS:
+            return updated, last_key
+
+@instrumented
+def handler(event, context):
+    event = event or {}
+    total_segments = int(event.get("totalSegments", TOTAL_SEGMENTS))
+    resume = event.get("resume") or {}
+    segments = [int(s) for s in resume] if resume else list(range(total_segments))
+    genre_ids = genre_ids_by_name()
+
+    with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+        futures = {
+            seg: pool.submit(_backfill_segment, seg, total_segments, resume.get(str(seg)), context, genre_ids)
+            for seg in segments
+        }
+        results = {seg: f.result() for seg, f in futures.items()}
+
+    updated = sum(r[0] for r in results.values())
+    unfinished = {str(seg): r[1] for seg, r in results.items() if r[1]}
+    print(f"backfill_content_key: updated {updated} rows, {len(unfinished)} segments unfinished")
+    scheduler.log_metrics()
+
+    response = {"updated": updated, "totalSegments": total_segments}
+    if unfinished:
+        response["resume"] = unfinished
+    return response
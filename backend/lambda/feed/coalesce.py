@@ -0,0 +1,84 @@
+import json
+from collections import Counter, OrderedDict
+
+RATING_EVENTS = ("user_rated", "rating_deleted")
+SUBSCRIPTION_EVENTS = ("user_subscribed", "user_unsubscribed")
+OPPOSITE = {"user_subscribed": "user_unsubscribed", "user_unsubscribed": "user_subscribed"}
+
+def parse_records(records):
+    events = []
+    for i, record in enumerate(records):
+        try:
+            message = json.loads(record["body"])
+            msg = json.loads(message.get("Message", "{}"))
+        except Exception as e:
+            print("parse_records: dropping malformed record", record.get("messageId"), e)
+            continue
+        events.append({
+            "order": (message.get("Timestamp") or "", i),
+            "messageId": record.get("messageId"),
+            "dedupeKey": msg.get("eventId") or message.get("MessageId") or record.get("messageId"),
+            "eventType": msg.get("eventType"),
+            "msg": msg,
+        })
+    events.sort(key=lambda e: e["order"])
+    return events
+
+def _new_user_unit(user_id):
+    return {
+        "kind": "user",
+        "userId": user_id,
+        "subscriptions": OrderedDict(),
+        "ratings": OrderedDict(),
+        "listens": Counter(),
+        "titles": {},
+        "events": [],
+    }
+
+def coalesce(events):
+    """Groups parsed events into units of work: song uploads (de-duplicated by songId),
+    one merged unit per user, and single events that cannot be merged (e.g. missing ids).
+    Every input event ends up in exactly one unit's "events" list."""
+    uploads = OrderedDict()
+    users = OrderedDict()
+    passthrough = []
+
+    for ev in events:
+        t = ev["eventType"]
+        msg = ev["msg"]
+        user_id = msg.get("userId")
+
+        if t == "song_uploaded" and msg.get("songId"):
+            unit = uploads.setdefault(msg["songId"], {"kind": "upload", "msg": msg, "events": []})
+            unit["events"].append(ev)
+        elif t == "song_listened" and user_id and msg.get("songId"):
+            unit = users.setdefault(user_id, _new_user_unit(user_id))
+            unit["listens"][msg["songId"]] += 1
+            if msg.get("title"):
+                unit["titles"][msg["songId"]] = msg["title"]
+            unit["events"].append(ev)
+        elif t in RATING_EVENTS and user_id and msg.get("contentId"):
+            unit = users.setdefault(user_id, _new_user_unit(user_id))
+            unit["ratings"].pop(msg["contentId"], None)
+            unit["ratings"][msg["contentId"]] = ev
+            unit["events"].append(ev)
+        elif t in SUBSCRIPTION_EVENTS and user_id and msg.get("targetId"):
+            unit = users.setdefault(user_id, _new_user_unit(user_id))
+            stack = unit["subscriptions"].setdefault(msg["targetId"], [])
+            if stack and stack[-1]["eventType"] == OPPOSITE[t]:
+                stack.pop()
+            else:
+                stack.append(ev)
+            unit["events"].append(ev)
+        else:
+            passthrough.append({"kind": "event", "msg": msg, "events": [ev]})
+
+    for unit in users.values():
+        for target_id in list(unit["subscriptions"]):
+            stack = unit["subscriptions"][target_id]
+            if stack:
+                unit["subscriptions"][target_id] = stack[-1]
+            else:
+                del unit["subscriptions"][target_id]
+
+    return list(uploads.values()) + list(users.values()) + passthrough
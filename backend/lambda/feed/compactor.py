@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import boto3
+from decimal import Decimal
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented, instrument_session
+from feed.feed_keys import new_sort_key, stable_suffix, sort_key_ms
+from utils.write_scheduler import WriteScheduler
+
+FEED_TABLE = os.environ["FEED_TABLE"]
+STATE_TABLE = os.environ["COMPACTION_STATE_TABLE"]
+TOTAL_SEGMENTS = int(os.environ.get("COMPACTION_SEGMENTS", "4"))
+COMPACT_AFTER_DAYS = int(os.environ.get("FEED_COMPACT_AFTER_DAYS", "30"))
+MAX_RAW_ROWS = int(os.environ.get("FEED_MAX_RAW_ROWS", "500"))
+STOP_WHEN_REMAINING_MS = 30000
+
+# Rows that represent current user state rather than accumulated activity are never folded.
+STATEFUL_SOURCES = ("RATING", "LISTEN")
+
+state_table = boto3.resource("dynamodb").Table(STATE_TABLE)
+scheduler = WriteScheduler("compactor")
+
+def _is_foldable(it):
+    return (
+        it.get("type") != "META"
+        and it.get("sourceType") not in STATEFUL_SOURCES
+        and sort_key_ms(it["createdAt"]) is not None
+    )
+
+def _group_key(it):
+    return it.get("contentKey") or f"{it.get('contentId')}#{it.get('type')}", it.get("sourceKey") or ""
+
+def _summary_item(user_id, group, rows):
+    newest = max(rows, key=lambda r: sort_key_ms(r["createdAt"]))
+    content_key, source = group
+    item = {
+        "userId": user_id,
+        "createdAt": new_sort_key(sort_key_ms(newest["createdAt"]), stable_suffix("summary", content_key, source)),
+        "type": newest.get("type"),
+        "contentId": newest.get("contentId"),
+        "contentKey": content_key,
+        "reason": newest.get("reason"),
+        "timestamp": newest.get("timestamp"),
+        "score": sum(Decimal(str(r.get("score", 0))) for r in rows),
+        "summary": True,
+        "foldedRows": sum(int(r.get("foldedRows", 1)) for r in rows),
+    }
+    for attr in ("title", "name", "sourceType", "sourceTargetId", "sourceKey"):
+        if newest.get(attr) is not None:
+            item[attr] = newest[attr]
+    expires = [int(r["expiresAt"]) for r in rows if r.get("expiresAt")]
+    if expires:
+        item["expiresAt"] = max(expires)
+    return item
+
+def compact_partition(table, user_id, now_ms=None):
+    """Folds old or excess activity rows of one user into one summary row per (contentKey, sourceKey).
+    Rows past MAX_RAW_ROWS that have nothing to fold with are deleted, so the cap always holds."""
+    now_ms = now_ms or int(time.time() * 1000)
+    cutoff_ms = now_ms - COMPACT_AFTER_DAYS * 86400000
+
+    q = {"KeyConditionExpression": Key("userId").eq(user_id), "ScanIndexForward": False}
+    raw, summaries = [], []
+    while True:
+        resp = table.query(**q)
+        for it in resp.get("Items", []):
+            if _is_foldable(it):
+                (summaries if it.get("summary") else raw).append(it)
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        q["ExclusiveStartKey"] = last_key
+
+    # raw is newest first: everything past the cap or older than the cutoff is folded
+    fold = [it for i, it in enumerate(raw) if i >= MAX_RAW_ROWS or sort_key_ms(it["createdAt"]) < cutoff_ms]
+    if not fold:
+        return 0
+    over_cap = {it["createdAt"] for it in raw[MAX_RAW_ROWS:]}
+
+    groups = {}
+    for it in fold:
+        groups.setdefault(_group_key(it), []).append(it)
+    for it in summaries:
+        if _group_key(it) in groups:
+            groups[_group_key(it)].append(it)
+
+    folded = 0
+    for group, rows in groups.items():
+        if len(rows) < 2:
+            # Nothing to fold into; a lone row past the cap is among the oldest and is dropped.
+            if rows[0]["createdAt"] in over_cap:
+                scheduler.delete(FEED_TABLE, {"userId": user_id, "createdAt": rows[0]["createdAt"]})
+                folded += 1
+            continue
+        summary = _summary_item(user_id, group, rows)
+        for r in rows:
+            if r["createdAt"] != summary["createdAt"]:
+                scheduler.delete(FEED_TABLE, {"userId": user_id, "createdAt": r["createdAt"]})
+        scheduler.put(FEED_TABLE, summary)
+        folded += len(rows)
+    scheduler.flush()
+    return folded
+
+def _load_checkpoint(segment):
+    item = state_table.get_item(Key={"segment": segment}, ConsistentRead=True).get("Item") or {}
+    return json.loads(item["lastKey"]) if item.get("lastKey") else None
+
+def _save_checkpoint(segment, last_key, stats):
+    state_table.put_item(Item={
+        "segment": segment,
+        "lastKey": json.dumps(last_key) if last_key else None,
+        "updatedAt": datetime.utcnow().isoformat(),
+        **stats,
+    })
+
+def _compact_segment(segment, total_segments, context):
+    table = instrument_session(boto3.session.Session()).resource("dynamodb").Table(FEED_TABLE)
+    q = {"Segment": segment, "TotalSegments": total_segments, "ProjectionExpression": "userId"}
+    start_key = _load_checkpoint(segment)
+    if start_key:
+        q["ExclusiveStartKey"] = start_key
+
+    users, folded = 0, 0
+    current_user = None
+    while True:
+        resp = table.scan(**q)
+        for it in resp.get("Items", []):
+            if it["userId"] == current_user:
+                continue
+            current_user = it["userId"]
+            users += 1
+            folded += compact_partition(table, current_user)
+
+        last_key = resp.get("LastEvaluatedKey")
+        stats = {"users": users, "folded": folded}
+        if not last_key:
+            _save_checkpoint(segment, None, {**stats, "completedAt": datetime.utcnow().isoformat()})
+            return stats
+        q["ExclusiveStartKey"] = last_key
+        if context and context.get_remaining_time_in_millis() < STOP_WHEN_REMAINING_MS:
+            _save_checkpoint(segment, last_key, stats)
+            return {**stats, "unfinished": True}
+
+@instrumented
+def handler(event, context):
+    total_segments = int((event or {}).get("totalSegments", TOTAL_SEGMENTS))
+
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        futures = [pool.submit(_compact_segment, seg, total_segments, context) for seg in range(total_segments)]
+        results = [f.result() for f in futures]
+
+    response = {
+        "users": sum(r["users"] for r in results),
+        "folded": sum(r["folded"] for r in results),
+        "unfinishedSegments": sum(1 for r in results if r.get("unfinished")),
+    }
+    print("feed compactor:", response)
+    scheduler.log_metrics()
+    return response
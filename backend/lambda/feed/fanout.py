@@ -0,0 +1,81 @@
+import os
+import time
+import boto3
+from boto3.dynamodb.conditions import Key
+from datetime import datetime
+from feed.feed_keys import target_partition
+from utils.write_scheduler import WriteScheduler
+
+dynamodb = boto3.resource("dynamodb")
+subscriptions_table = dynamodb.Table(os.environ["SUBSCRIPTIONS_TABLE"])
+counts_table = dynamodb.Table(os.environ["SUBSCRIBER_COUNTS_TABLE"])
+FEED_TABLE = os.environ["FEED_TABLE"]
+TOP_FEED_TABLE = os.environ["TOP_FEED_TABLE"]
+
+MAX_WORKERS = int(os.environ.get("FANOUT_MAX_WORKERS", "8"))
+PULL_THRESHOLD = int(os.environ.get("FANOUT_PULL_THRESHOLD", "0"))
+
+scheduler = WriteScheduler("fanout", max_in_flight=MAX_WORKERS)
+
+def iter_subscribers(target_id):
+    q = {
+        "IndexName": "targetId-index",
+        "KeyConditionExpression": Key("targetId").eq(target_id),
+        "ProjectionExpression": "userId",
+    }
+    while True:
+        resp = subscriptions_table.query(**q)
+        for it in resp.get("Items", []):
+            yield it["userId"]
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        q["ExclusiveStartKey"] = last_key
+
+def subscriber_count(target_id):
+    item = counts_table.get_item(Key={"targetId": target_id}).get("Item") or {}
+    return int(item.get("subscriberCount", 0))
+
+def is_pull_target(target_id):
+    return PULL_THRESHOLD > 0 and subscriber_count(target_id) >= PULL_THRESHOLD
+
+def publish_to_target(target_id, item):
+    """Appends content to a pull target's partition; subscribers merge it in at read time."""
+    scheduler.put(FEED_TABLE, item)
+    scheduler.flush()
+    counts_table.update_item(
+        Key={"targetId": target_id},
+        UpdateExpression="SET lastPullAt = :now",
+        ExpressionAttributeValues={":now": datetime.utcnow().isoformat()}
+    )
+
+def fan_out(targets, build_item):
+    """Writes one feed item per distinct subscriber of the given targets.
+
+    `targets` is a list of (target_id, target_type, base_score); a user subscribed
+    to several of them gets a single item for the first target it is reached through.
+    Each subscriber's materialized top feed is dropped so it is rebuilt on the next read.
+    Targets with at least FANOUT_PULL_THRESHOLD subscribers get one item in their own
+    partition instead (see publish_to_target).
+    """
+    start = time.time()
+    written = 0
+    pulled = 0
+    seen_users = set()
+
+    for target_id, target_type, base_score in targets:
+        if is_pull_target(target_id):
+            publish_to_target(target_id, build_item(target_partition(target_id), target_id, target_type, base_score))
+            pulled += 1
+            continue
+        for user_id in iter_subscribers(target_id):
+            if user_id in seen_users:
+                continue
+            seen_users.add(user_id)
+            scheduler.put(FEED_TABLE, build_item(user_id, target_id, target_type, base_score))
+            scheduler.delete(TOP_FEED_TABLE, {"userId": user_id})
+            written += 1
+    scheduler.flush()
+    scheduler.log_metrics()
+
+    return {"written": written, "pulled": pulled, "elapsedMs": int((time.time() - start) * 1000)}
@@ -0,0 +1,76 @@
+import time
+import hashlib
+import secrets
+import threading
+from datetime import datetime, timezone
+
+MS_DIGITS = 13
+MAX_SEQ = 0xffff
+
+_lock = threading.Lock()
+_last_ms = 0
+_seq = 0
+
+def content_key(content_id, t):
+    return f"{content_id}#{t}"
+
+def content_key_prefix(content_id):
+    return f"{content_id}#"
+
+def source_key(source_type, source_target_id):
+    return f"{source_type}#{source_target_id}"
+
+def source_attrs(source_type, source_target_id):
+    return {
+        "sourceType": source_type,
+        "sourceTargetId": source_target_id,
+        "sourceKey": source_key(source_type, source_target_id),
+    }
+
+def new_sort_key(ms=None, suffix=None):
+    """Feed sort key: zero-padded epoch ms, then a unique suffix, so keys sort by time.
+
+    Keys generated by one process are strictly increasing; the random tail keeps
+    concurrent writers apart. Pass `suffix` (see stable_suffix) for a key that is
+    identical on retries.
+    """
+    global _last_ms, _seq
+    if suffix is not None:
+        ms = int(time.time() * 1000) if ms is None else int(ms)
+        return f"{ms:0{MS_DIGITS}d}-{suffix}"
+
+    with _lock:
+        ms = int(time.time() * 1000) if ms is None else int(ms)
+        if ms > _last_ms:
+            _last_ms, _seq = ms, 0
+        else:
+            _seq += 1
+            if _seq > MAX_SEQ:
+                _last_ms, _seq = _last_ms + 1, 0
+        return f"{_last_ms:0{MS_DIGITS}d}-{_seq:04x}{secrets.token_hex(4)}"
+
+def stable_suffix(*parts):
+    return hashlib.sha1("#".join(str(p) for p in parts).encode()).hexdigest()[:12]
+
+def sort_key_ms(created_at):
+    """Epoch ms of a feed sort key; handles legacy plain-number keys. None for LISTEN# rows."""
+    prefix = (created_at or "")[:MS_DIGITS]
+    return int(prefix) if prefix.isdigit() else None
+
+def expires_at(days):
+    """Epoch-seconds TTL value for rows that should age out after `days`."""
+    return int(time.time()) + days * 86400
+
+def target_partition(target_id):
+    """Feed partition holding recent content of a pull-mode (high-fanout) target."""
+    return f"TARGET#{target_id}"
+
+def listen_sort_key(song_id):
+    return f"LISTEN#{song_id}"
+
+def iso_to_epoch_ms(ts_iso):
+    ts_iso = ts_iso.replace('Z', '+00:00') if ts_iso.endswith('Z') else ts_iso
+    dt = datetime.fromisoformat(ts_iso)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1000)
@@ -1,41 +1,123 @@
 import os
-import json
 import boto3
-import time
 from datetime import datetime
-from boto3.dynamodb.conditions import Key, Attr
+from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
+from feed.coalesce import parse_records, coalesce
+from feed.fanout import fan_out, scheduler
+from feed.ranking import refresh_top_feed, update_top_feed, invalidate_top_feed
+from feed.scoring import weight
+from feed.feed_keys import (
+    content_key, content_key_prefix, source_key, source_attrs,
+    new_sort_key, stable_suffix, expires_at, listen_sort_key, iso_to_epoch_ms,
+)
+from utils import idempotency
+from utils.genres import genre_name
 
 dynamodb = boto3.resource("dynamodb")
 feed_table = dynamodb.Table(os.environ["FEED_TABLE"])
 songs_table = dynamodb.Table(os.environ["SONGS_TABLE"])
-genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
 subscriptions_table = dynamodb.Table(os.environ["SUBSCRIPTIONS_TABLE"])
 genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
 
+ROW_TTL_DAYS = int(os.environ.get("FEED_ROW_TTL_DAYS", "180"))
+
+@instrumented
 def handler(event, context):
+    failed_message_ids = []
+    claimed = []
+
+    for ev in parse_records(event["Records"]):
+        try:
+            state = idempotency.claim(ev["dedupeKey"])
+        except Exception as e:
+            print("Error claiming event:", ev["dedupeKey"], e)
+            failed_message_ids.append(ev["messageId"])
+            continue
+        if state == idempotency.CLAIMED:
+            claimed.append(ev)
+        elif state == idempotency.IN_PROGRESS:
+            failed_message_ids.append(ev["messageId"])
+        else:
+            print("Skipping already processed event:", ev["dedupeKey"])
+
+    for unit in coalesce(claimed):
+        keys = [ev["dedupeKey"] for ev in unit["events"]]
+        try:
+            process_unit(unit)
+            idempotency.complete(keys)
+        except Exception as e:
+            print("Error:", e)
+            failed_message_ids.extend(ev["messageId"] for ev in unit["events"])
+            try:
+                idempotency.release(keys)
+            except Exception as release_error:
+                print("Error releasing events:", release_error)
+
+    return {"batchItemFailures": [{"itemIdentifier": mid} for mid in failed_message_ids]}
+
+def process_unit(unit):
+    if unit["kind"] == "upload":
+        process_song_uploaded(unit["msg"])
+    elif unit["kind"] == "user":
+        touched = process_user_events(unit)
+        _refresh_top_feed(unit["userId"], touched, bool(unit["subscriptions"]))
+    else:
+        process_event(unit["msg"])
+
+def _refresh_top_feed(user_id, content_ids, subscriptions_changed=False):
+    """Merges the re-scored `content_ids` into the stored top feed; rebuilds it when that isn't
+    possible (see ranking.update_top_feed) or the changed content isn't known (None)."""
     try:
-        for record in event["Records"]:
-            message = json.loads(record["body"])
-            msg = json.loads(message.get("Message", "{}"))
-            event_type = msg.get("eventType")
-
-            if event_type == "song_uploaded":
-                process_song_uploaded(msg)
-            elif event_type == "song_listened":
-                process_listened_song(msg)
-            elif event_type == "user_rated":
-                process_user_rated(msg)
-            elif event_type == "user_subscribed":
-                process_user_subscribed(msg)
-            elif event_type == "user_unsubscribed":
-                process_user_unsubscribed(msg)
-            elif event_type == "rating_deleted":
-                process_user_unrate(msg)
-
-        return {"statusCode": 200}
+        if content_ids is None or update_top_feed(user_id, content_ids, subscriptions_changed) is None:
+            refresh_top_feed(user_id)
     except Exception as e:
-        print("Error:", e)
-        return {"statusCode": 500, "body": str(e)}
+        print("refresh_top_feed error:", user_id, e)
+        invalidate_top_feed(user_id)
+
+def process_event(msg):
+    event_type = msg.get("eventType")
+
+    if event_type == "song_uploaded":
+        process_song_uploaded(msg)
+    elif event_type == "song_listened":
+        process_listened_song(msg)
+    elif event_type == "user_rated":
+        process_user_rated(msg)
+    elif event_type == "user_subscribed":
+        process_user_subscribed(msg)
+    elif event_type == "user_unsubscribed":
+        process_user_unsubscribed(msg)
+    elif event_type == "rating_deleted":
+        process_user_unrate(msg)
+
+def process_user_events(unit):
+    """Applies a user unit. Returns the content ids whose feed rows changed, or None when rows
+    were removed by source (unsubscribe) and the affected content isn't known."""
+    user_id = unit["userId"]
+    touched = set()
+    for ev in unit["subscriptions"].values():
+        if ev["eventType"] == "user_subscribed":
+            changed = process_user_subscribed(ev["msg"])
+        else:
+            process_user_unsubscribed(ev["msg"])
+            changed = None
+        touched = None if touched is None or changed is None else touched | set(changed)
+
+    ratings = []
+    for content_id, ev in unit["ratings"].items():
+        rating = ev["msg"].get("rating") if ev["eventType"] == "user_rated" else None
+        ratings.append((content_id, rating))
+    if ratings:
+        _apply_user_ratings(user_id, ratings)
+
+    for song_id, count in unit["listens"].items():
+        process_listened_song({"userId": user_id, "songId": song_id, "title": unit["titles"].get(song_id)}, count)
+
+    if touched is not None:
+        touched.update(content_id for content_id, _ in ratings)
+        touched.update(unit["listens"])
+    return touched
 
 def process_song_uploaded(msg):
     song_id = msg.get("songId")
@@ -43,265 +125,244 @@ def process_song_uploaded(msg):
     artist_ids = msg.get("artistIds", [])
     genres = msg.get("genres", [])
     timestamp = msg.get("timestamp") or datetime.utcnow().isoformat()
+    try:
+        created_at = new_sort_key(iso_to_epoch_ms(timestamp), stable_suffix("song_uploaded", song_id))
+    except ValueError:
+        created_at = new_sort_key()
 
-    targets = [(gid, "GENRE", 5) for gid in genres] + [(aid, "ARTIST", 8) for aid in artist_ids]
-
-    for target_id, target_type, base_score in targets:
-        response = subscriptions_table.query(
-            IndexName="targetId-index",
-            KeyConditionExpression=Key("targetId").eq(target_id)
-        )
-        for item in response.get("Items", []):
-            user_id = item["userId"]
-            feed_table.put_item(Item={
-                "userId": user_id,
-                "createdAt": str(int(time.time() * 1000)),
-                "type": "SONG",
-                "contentId": song_id,
-                "title": title,
-                "reason": f"New for your {target_type.lower()}: {target_id}",
-                "timestamp": timestamp,
-                "score": base_score,
-            })
-
-def process_user_unrate(msg):
-    user_id = msg.get("userId")
-    content_id = msg.get("contentId")
-    if not user_id or not content_id:
-        print("process_user_unrate: missing userId/contentId", msg)
-        return
+    targets = [(aid, "ARTIST", weight("upload_artist")) for aid in artist_ids] + \
+              [(gid, "GENRE", weight("upload_genre")) for gid in genres]
 
-    last_key = None
-    deleted = 0
-    while True:
-        q = {
-            "KeyConditionExpression": Key("userId").eq(user_id),
-            "ScanIndexForward": False,
-            "Limit": 100,
-            "FilterExpression": Attr("contentId").eq(content_id),
+    def build_item(user_id, target_id, target_type, base_score):
+        return {
+            "userId": user_id,
+            "createdAt": created_at,
+            "type": "SONG",
+            "contentId": song_id,
+            "contentKey": content_key(song_id, "SONG"),
+            "title": title,
+            "reason": f"New for your {target_type.lower()}: {target_id}",
+            "timestamp": timestamp,
+            "score": base_score,
+            "expiresAt": expires_at(ROW_TTL_DAYS),
+            **source_attrs(target_type, target_id),
         }
-        if last_key:
-            q["ExclusiveStartKey"] = last_key
 
-        resp = feed_table.query(**q)
-        items = resp.get("Items", [])
-        for it in items:
-            feed_table.delete_item(Key={"userId": user_id, "createdAt": it["createdAt"]})
-            deleted += 1
+    stats = fan_out(targets, build_item)
+    print(f"process_song_uploaded: song={song_id} wrote {stats['written']} feed items "
+          f"and {stats['pulled']} pull-target items in {stats['elapsedMs']} ms")
 
+def _feed_keys_for_content(user_id, content_id, t=None):
+    if t:
+        cond = Key("userId").eq(user_id) & Key("contentKey").eq(content_key(content_id, t))
+    else:
+        cond = Key("userId").eq(user_id) & Key("contentKey").begins_with(content_key_prefix(content_id))
+
+    q = {"IndexName": "UserContentIndex", "KeyConditionExpression": cond}
+    keys = []
+    while True:
+        resp = feed_table.query(**q)
+        keys.extend(it["createdAt"] for it in resp.get("Items", []))
         last_key = resp.get("LastEvaluatedKey")
         if not last_key:
             break
+        q["ExclusiveStartKey"] = last_key
+    return keys
+
+def _feed_keys_for_source(user_id, source_type, source_target_id):
+    q = {
+        "IndexName": "UserSourceIndex",
+        "KeyConditionExpression": Key("userId").eq(user_id) & Key("sourceKey").eq(source_key(source_type, source_target_id)),
+    }
+    keys = []
+    while True:
+        resp = feed_table.query(**q)
+        keys.extend(it["createdAt"] for it in resp.get("Items", []))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        q["ExclusiveStartKey"] = last_key
+    return keys
+
+def _write_feed_rows(user_id, stale_keys, new_items):
+    for created_at in stale_keys:
+        scheduler.delete(feed_table.name, {"userId": user_id, "createdAt": created_at})
+    for item in new_items:
+        scheduler.put(feed_table.name, item)
+    scheduler.flush()
 
-    print(f"process_user_unrate: deleted {deleted} items for user={user_id} content={content_id}")
+def _delete_feed_rows(user_id, created_ats):
+    _write_feed_rows(user_id, created_ats, [])
+    return len(created_ats)
+
+def process_user_unrate(msg):
+    user_id = msg.get("userId")
+    content_id = msg.get("contentId")
+    if not user_id or not content_id:
+        print("process_user_unrate: missing userId/contentId", msg)
+        return
+
+    _apply_user_ratings(user_id, [(content_id, None)])
 
 def process_user_rated(msg):
     user_id = msg.get("userId")
     content_id = msg.get("contentId")
-    rating = msg.get("rating")
 
     if not user_id or not content_id:
         print("process_user_rated: missing userId/contentId", msg)
         return
 
-    last_key = None
-    while True:
-        q = {
-            "KeyConditionExpression": Key("userId").eq(user_id),
-            "ScanIndexForward": False,
-            "Limit": 100,
-            "FilterExpression": Attr("contentId").eq(content_id),
-        }
-        if last_key:
-            q["ExclusiveStartKey"] = last_key
-        resp = feed_table.query(**q)
-        for it in resp.get("Items", []):
-            feed_table.delete_item(Key={"userId": user_id, "createdAt": it["createdAt"]})
-        if not resp.get("LastEvaluatedKey"):
-            break
+    _apply_user_ratings(user_id, [(content_id, msg.get("rating"))])
 
-    try:
-        r = int(rating) if rating else 0
-    except Exception:
-        r = 0
-    if r <= 0:
-        return
+def _apply_user_ratings(user_id, ratings):
+    stale_keys = []
+    new_items = []
+    now_iso = datetime.utcnow().isoformat()
 
-    feed_table.put_item(Item={
-        "userId": user_id,
-        "createdAt": str(int(time.time() * 1000)),
-        "type": "SONG",
-        "contentId": content_id,
-        "reason": f"Rated song {r}★",
-        "timestamp": datetime.utcnow().isoformat(),
-        "score": r * 4,
-    })
+    for content_id, rating in ratings:
+        stale_keys.extend(_feed_keys_for_content(user_id, content_id))
+
+        try:
+            r = int(rating) if rating else 0
+        except Exception:
+            r = 0
+        if r <= 0:
+            continue
+
+        new_items.append({
+            "userId": user_id,
+            "createdAt": new_sort_key(),
+            "type": "SONG",
+            "contentId": content_id,
+            "contentKey": content_key(content_id, "SONG"),
+            "reason": f"Rated song {r}★",
+            "timestamp": now_iso,
+            "score": r * weight("rating_multiplier"),
+            **source_attrs("RATING", content_id),
+        })
+
+    _write_feed_rows(user_id, stale_keys, new_items)
+
+    print(f"_apply_user_ratings: user={user_id} deleted {len(stale_keys)} rows, wrote {len(new_items)} ratings")
 
 def process_user_subscribed(msg):
+    """Returns the content ids whose feed rows were written, or None if hydration failed midway."""
     user_id = msg.get("userId")
     target_id = msg.get("targetId")
     raw_type = msg.get("targetType", "")
     target_type = str(raw_type).upper()
-    base_score = 3 if target_type == "GENRE" else 4
+    base_score = weight("subscribe_genre") if target_type == "GENRE" else weight("subscribe_artist")
 
     feed_table.put_item(Item={
         "userId": user_id,
-        "createdAt": str(int(time.time() * 1000)),
+        "createdAt": new_sort_key(),
         "type": "META",
         "contentId": target_id,
+        "contentKey": content_key(target_id, "META"),
         "reason": f"Subscription to {target_type.lower()} {target_id}",
         "timestamp": datetime.utcnow().isoformat(),
         "score": base_score,
+        **source_attrs(target_type, target_id),
     })
 
     if target_type == "GENRE":
         try:
-            response = genres_table.query(
-                IndexName="GenreIdIndex",
-                KeyConditionExpression=Key("id").eq(target_id)
-            )
-            genres = response.get("Items", [])
-
-            _hydrate_feed_from_genre(user_id, genres[0].get("name"))
+            name = genre_name(target_id)
+            if not name:
+                print("process_user_subscribed: genre not found for id", target_id)
+                return [target_id]
+            return [target_id] + _hydrate_feed_from_genre(user_id, target_id, name)
         except Exception as e:
             print("hydrate_from_genre error:", e)
+            return None
+    return [target_id]
 
 def process_user_unsubscribed(msg):
-    user_id  = msg.get("userId")
-    genre_id = msg.get("targetId")
+    user_id     = msg.get("userId")
+    target_id   = msg.get("targetId")
+    target_type = str(msg.get("targetType") or "GENRE").upper()
 
-    if not user_id or not genre_id:
-        print("process_user_unsubscribed: missing userId/genreId", msg)
+    if not user_id or not target_id:
+        print("process_user_unsubscribed: missing userId/targetId", msg)
         return
 
-    last_key = None
+    deleted = _delete_feed_rows(user_id, _feed_keys_for_source(user_id, target_type, target_id))
+    print(f"process_user_unsubscribed: deleted {deleted} rows for user={user_id} source={target_type}#{target_id}")
+
+def _iter_genre_catalog(genre_name):
+    q = {"KeyConditionExpression": Key("PK").eq(f"GENRE#{genre_name}")}
     while True:
-        q = {
-            "KeyConditionExpression": Key("userId").eq(user_id),
-            "ScanIndexForward": False,
-            "FilterExpression": Attr("contentId").eq(genre_id) & Attr("type").eq("META"),
-            "Limit": 100,
-        }
-        if last_key:
-            q["ExclusiveStartKey"] = last_key
+        resp = genre_catalog_table.query(**q)
+        yield from resp.get("Items", [])
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        q["ExclusiveStartKey"] = last_key
 
+def _load_content_index(user_id):
+    """Maps contentKey -> sort keys of the user's feed rows, read once via UserContentIndex."""
+    q = {"IndexName": "UserContentIndex", "KeyConditionExpression": Key("userId").eq(user_id)}
+    index = {}
+    while True:
         resp = feed_table.query(**q)
         for it in resp.get("Items", []):
-            feed_table.delete_item(Key={"userId": user_id, "createdAt": it["createdAt"]})
-        if not resp.get("LastEvaluatedKey"):
-            break
-
-    try:
-        gresp = genres_table.query(
-            IndexName="GenreIdIndex",
-            KeyConditionExpression=Key("id").eq(genre_id)
-        )
-        gitems = gresp.get("Items", [])
-        if not gitems:
-            print("process_user_unsubscribed: genre not found for id", genre_id)
-            _delete_by_reason_contains(user_id, str(genre_id))
-            return
-
-        genre_name = gitems[0].get("name")
-    except Exception as e:
-        print("process_user_unsubscribed: failed to resolve genre name:", e)
-        _delete_by_reason_contains(user_id, str(genre_id))
-        return
-
-    try:
-        resp = genre_catalog_table.query(
-            KeyConditionExpression=Key("PK").eq(f"GENRE#{genre_name}")
-        )
-        items = resp.get("Items", [])
-
-        for it in items:
-            etype = (it.get("entityType") or "").upper()
-            content_id = (it.get("songId") or it.get("albumId") or
-                          it.get("artistId") or it.get("id") or it.get("entityId"))
-            if not etype or not content_id:
-                continue
-            _delete_existing_feed_entries(user_id, content_id, etype)
-    except Exception as e:
-        print("process_user_unsubscribed: delete hydrated items error:", e)
-
-    _delete_by_reason_contains(user_id, str(genre_id))
+            if it.get("contentKey"):
+                index.setdefault(it["contentKey"], []).append(it["createdAt"])
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return index
+        q["ExclusiveStartKey"] = last_key
 
-def _hydrate_feed_from_genre(user_id, genre_name):
-    SCORE_BY_TYPE = {"SONG": 4, "ALBUM": 3, "ARTIST": 2}
+def _hydrate_feed_from_genre(user_id, genre_id, genre_name):
+    SCORE_BY_TYPE = {"SONG": weight("hydrate_song"), "ALBUM": weight("hydrate_album"), "ARTIST": weight("hydrate_artist")}
     MAX_ITEMS = 50
 
-    resp = genre_catalog_table.query(
-        KeyConditionExpression=Key("PK").eq(f"GENRE#{genre_name}")
-    )
-    items = resp.get("Items", [])[:MAX_ITEMS]
-
-    for it in items:
-        now_iso = datetime.utcnow().isoformat()
-        now_ms  = str(int(time.time() * 1000))
+    existing = _load_content_index(user_id)
+    own_rows = set(_feed_keys_for_source(user_id, "GENRE", genre_id))
+    now_iso = datetime.utcnow().isoformat()
 
+    stale_keys, new_items, seen, eligible = [], [], set(), 0
+    for it in _iter_genre_catalog(genre_name):
+        if eligible >= MAX_ITEMS:
+            break
         etype = (it.get("entityType") or "").upper()
-        if etype not in SCORE_BY_TYPE:
-            continue
-
         content_id = it.get("songId") or it.get("albumId") or it.get("artistId") or it.get("id") or it.get("entityId")
-        if not content_id:
+        if etype not in SCORE_BY_TYPE or not content_id:
             continue
+        ck = content_key(content_id, etype)
+        if ck in seen:
+            continue
+        seen.add(ck)
+        eligible += 1
 
-        _delete_existing_feed_entries(user_id, content_id, etype)
+        current = existing.get(ck, [])
+        if current and all(created_at in own_rows for created_at in current):
+            continue
+        stale_keys.extend(current)
 
-        feed_table.put_item(Item={
+        item = {
             "userId": user_id,
-            "createdAt": now_ms,
+            "createdAt": new_sort_key(),
             "type": etype,
             "contentId": content_id,
+            "contentKey": ck,
             "reason": f"Connected by genre: {genre_name}",
             "timestamp": now_iso,
             "score": SCORE_BY_TYPE[etype],
-        })
-
-def _delete_by_reason_contains(user_id, needle):
-    last_key = None
-    deleted = 0
-    while True:
-        q = {
-            "KeyConditionExpression": Key("userId").eq(user_id),
-            "ScanIndexForward": False,
-            "Limit": 100,
-            "FilterExpression": Attr("reason").contains(needle),
+            "expiresAt": expires_at(ROW_TTL_DAYS),
+            **source_attrs("GENRE", genre_id),
         }
-        if last_key:
-            q["ExclusiveStartKey"] = last_key
+        sort_value = it.get("name") if etype == "ARTIST" else it.get("title")
+        if sort_value:
+            item["name" if etype == "ARTIST" else "title"] = sort_value
+        new_items.append(item)
 
-        resp = feed_table.query(**q)
-        for it in resp.get("Items", []):
-            feed_table.delete_item(Key={"userId": user_id, "createdAt": it["createdAt"]})
-            deleted += 1
+    _write_feed_rows(user_id, stale_keys, new_items)
 
-        last_key = resp.get("LastEvaluatedKey")
-        if not last_key:
-            break
+    print(f"_hydrate_feed_from_genre: user={user_id} genre={genre_name} deleted {len(stale_keys)} rows, wrote {len(new_items)} rows")
+    return [item["contentId"] for item in new_items]
 
-    print(f"_delete_by_reason_contains: deleted {deleted} items for user={user_id} reason~={needle}")
-
-def _delete_existing_feed_entries(user_id, content_id, t):
-    last_key = None
-    while True:
-        q = {
-            "KeyConditionExpression": Key("userId").eq(user_id),
-            "ScanIndexForward": False,
-            "Limit": 100,
-            "FilterExpression": Attr("contentId").eq(content_id) & Attr("type").eq(t),
-        }
-        if last_key:
-            q["ExclusiveStartKey"] = last_key
-        resp = feed_table.query(**q)
-        for it in resp.get("Items", []):
-            feed_table.delete_item(Key={"userId": user_id, "createdAt": it["createdAt"]})
-        last_key = resp.get("LastEvaluatedKey")
-        if not last_key:
-            break
-
-def process_listened_song(msg):
+def process_listened_song(msg, count=1):
     user_id = msg.get("userId")
     song_id = msg.get("songId")
 
@@ -309,36 +370,29 @@ def process_listened_song(msg):
         print("process_listened_song: missing userId/songId", msg)
         return
 
-    resp = feed_table.query(
-        KeyConditionExpression=Key("userId").eq(user_id),
-        ScanIndexForward=False,
-        Limit=1,
-        FilterExpression=Attr("contentId").eq(song_id) & Attr("type").eq("SONG"),
-    )
-
-    items = resp.get("Items", [])
     now_iso = datetime.utcnow().isoformat()
-    now_ms = str(int(time.time() * 1000))
-
-    if not items:
-        feed_table.put_item(Item={
-            "userId": user_id,
-            "createdAt": now_ms,
-            "type": "SONG",
-            "contentId": song_id,
-            "reason": "Listening activity",
-            "timestamp": now_iso,
-            "score": 1,
-        })
-        print(f"process_listened_song: added new song {song_id} to feed for user {user_id}")
-    else:
-        item = items[0]
-        new_score = item.get("score", 0) + 1
-
-        feed_table.update_item(
-            Key={"userId": user_id, "createdAt": item["createdAt"]},
-            UpdateExpression="SET #s = :s, #t = :t",
-            ExpressionAttributeNames={"#s": "score", "#t": "timestamp"},
-            ExpressionAttributeValues={":s": new_score, ":t": now_iso}
-        )
-        print(f"process_listened_song: updated score for {song_id}, new score={new_score}")
+    update_expr = ("ADD #s :n SET #ts = :now, lastListened = :now, #ty = :ty, contentId = :c, contentKey = :k, reason = :r, "
+                   "sourceType = :st, sourceTargetId = :c, sourceKey = :sk")
+    values = {
+        ":n": count * weight("listen"),
+        ":now": now_iso,
+        ":ty": "SONG",
+        ":c": song_id,
+        ":k": content_key(song_id, "SONG"),
+        ":r": "Listening activity",
+        ":st": "LISTEN",
+        ":sk": source_key("LISTEN", song_id),
+    }
+    if msg.get("title"):
+        update_expr += ", title = :title"
+        values[":title"] = msg["title"]
+
+    resp = feed_table.update_item(
+        Key={"userId": user_id, "createdAt": listen_sort_key(song_id)},
+        UpdateExpression=update_expr,
+        ExpressionAttributeNames={"#s": "score", "#ts": "timestamp", "#ty": "type"},
+        ExpressionAttributeValues=values,
+        ReturnValues="UPDATED_NEW"
+    )
+    new_score = resp.get("Attributes", {}).get("score")
+    print(f"process_listened_song: +{count} for song {song_id}, user {user_id}, new score={new_score}")
@@ -0,0 +1,311 @@
+import os
+import time
+import random
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeSerializer, TypeDeserializer
+from botocore.exceptions import ClientError
+from datetime import datetime
+from decimal import Decimal
+from feed.scoring import WEIGHTS, load_columns, score_columns, top_k
+from feed.feed_keys import target_partition, content_key_prefix
+
+dynamodb = boto3.resource("dynamodb")
+dynamodb_client = boto3.client("dynamodb")
+
+feed_table     = dynamodb.Table(os.environ["FEED_TABLE"])
+songs_table    = dynamodb.Table(os.environ["SONGS_TABLE"])
+albums_table   = dynamodb.Table(os.environ["ALBUMS_TABLE"])
+artists_table  = dynamodb.Table(os.environ["ARTISTS_TABLE"])
+top_feed_table = dynamodb.Table(os.environ["TOP_FEED_TABLE"])
+subscriptions_table = dynamodb.Table(os.environ["SUBSCRIPTIONS_TABLE"])
+COUNTS_TABLE = os.environ["SUBSCRIBER_COUNTS_TABLE"]
+
+TOP_N = int(os.environ.get("TOP_FEED_SIZE", "12"))
+OVERFETCH = int(os.environ.get("FEED_HYDRATION_OVERFETCH", "4"))
+MAX_AGE_DAYS = int(os.environ.get("FEED_MAX_AGE_DAYS", "0")) or None
+MAX_ROWS = int(os.environ.get("FEED_MAX_ROWS", "0")) or None
+CANDIDATE_FACTOR = 4
+PULL_ROWS_PER_TARGET = int(os.environ.get("FEED_PULL_ROWS_PER_TARGET", "100"))
+PULL_TARGETS_TTL_SECONDS = int(os.environ.get("FEED_PULL_TARGETS_TTL_SECONDS", "300"))
+BATCH_GET_SIZE = 100
+MAX_RETRIES = 5
+
+SORT_KEYS = {"SONG": "title", "ALBUM": "title", "ARTIST": "name"}
+CATEGORIES = {"songs": ("SONG", songs_table, "SongIdIndex"),
+              "albums": ("ALBUM", albums_table, "AlbumIdIndex"),
+              "artists": ("ARTIST", artists_table, "ArtistIdIndex")}
+LOOKUP_WORKERS = 8
+
+_serializer = TypeSerializer()
+_deserializer = TypeDeserializer()
+
+def iter_feed_rows(user_id, max_age_days=None, max_rows=None):
+    cond = Key("userId").eq(user_id)
+    if max_age_days:
+        cutoff_ms = int((time.time() - max_age_days * 86400) * 1000)
+        cond = cond & Key("createdAt").gte(str(cutoff_ms))
+
+    q = {
+        "KeyConditionExpression": cond,
+        "ScanIndexForward": False,
+        "ProjectionExpression": "createdAt, contentId, #ty, #s, #ts, #r, #ti, #n",
+        "ExpressionAttributeNames": {
+            "#ty": "type", "#s": "score", "#ts": "timestamp", "#r": "reason", "#ti": "title", "#n": "name",
+        },
+    }
+    seen = 0
+    while True:
+        resp = feed_table.query(**q)
+        for it in resp.get("Items", []):
+            yield it
+            seen += 1
+            if max_rows and seen >= max_rows:
+                return
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        q["ExclusiveStartKey"] = last_key
+
+def aggregate_scores(rows, now_ms=None):
+    cols = load_columns(rows)
+    scores = score_columns(cols, now_ms)
+    return scores["SONG"], scores["ALBUM"], scores["ARTIST"], cols.hints
+
+def build_top_feed(user_id):
+    rows = iter_feed_rows(user_id, MAX_AGE_DAYS, MAX_ROWS)
+    songs_map, albums_map, artists_map, hints = aggregate_scores(rows)
+
+    candidates = TOP_N * CANDIDATE_FACTOR
+    songs_feed, albums_feed, artists_feed = hydrate_categories([
+        (top_k(songs_map, candidates),   songs_table,   "SongIdIndex",   "SONG"),
+        (top_k(albums_map, candidates),  albums_table,  "AlbumIdIndex",  "ALBUM"),
+        (top_k(artists_map, candidates), artists_table, "ArtistIdIndex", "ARTIST"),
+    ], hints, TOP_N)
+
+    return {
+        "songs":   songs_feed,
+        "albums":  albums_feed,
+        "artists": artists_feed,
+    }
+
+def pull_targets(user_id):
+    """Targets the user subscribes to whose new content is kept in a shared partition."""
+    q = {"KeyConditionExpression": Key("userId").eq(user_id), "ProjectionExpression": "targetId"}
+    target_ids = []
+    while True:
+        resp = subscriptions_table.query(**q)
+        target_ids.extend(it["targetId"] for it in resp.get("Items", []))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            break
+        q["ExclusiveStartKey"] = last_key
+
+    keys = [{"targetId": tid} for tid in target_ids]
+    counts = _batch_get(COUNTS_TABLE, keys, key_attr="targetId")
+    return [tid for tid, it in counts.items() if it.get("lastPullAt")]
+
+def cached_pull_targets(user_id, feed):
+    """pull_targets(user_id), cached on the user's top feed document for
+    FEED_PULL_TARGETS_TTL_SECONDS. The cache is dropped when the user's subscriptions change;
+    a target that crosses the pull threshold is picked up when the cache expires."""
+    cached_at = feed.get("pullTargetsAt")
+    if feed.get("pullTargets") is not None and cached_at and time.time() - float(cached_at) < PULL_TARGETS_TTL_SECONDS:
+        return list(feed["pullTargets"])
+
+    targets = pull_targets(user_id)
+    try:
+        top_feed_table.update_item(
+            Key={"userId": user_id},
+            UpdateExpression="SET pullTargets = :t, pullTargetsAt = :now",
+            ConditionExpression="attribute_exists(userId)",
+            ExpressionAttributeValues={":t": targets, ":now": int(time.time())}
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+    return targets
+
+def merge_pull_targets(user_id, feed):
+    """The feed's categories, with recent content of the user's pull targets merged into songs."""
+    targets = cached_pull_targets(user_id, feed)
+    feed = {name: feed[name] for name in CATEGORIES}
+    if not targets:
+        return feed
+
+    rows = (it for tid in targets for it in iter_feed_rows(target_partition(tid), MAX_AGE_DAYS, PULL_ROWS_PER_TARGET))
+    songs_map, _, _, hints = aggregate_scores(rows)
+    seen = {(e.get("song") or {}).get("id") for e in feed["songs"]}
+    ranked = [(cid, score) for cid, score in top_k(songs_map, TOP_N * CANDIDATE_FACTOR) if cid not in seen]
+    pulled, = hydrate_categories([(ranked, songs_table, "SongIdIndex", "SONG")], hints, TOP_N)
+
+    songs = sorted(feed["songs"] + pulled, key=lambda e: e["score"], reverse=True)[:TOP_N]
+    return {**feed, "songs": songs}
+
+def load_top_feed(user_id):
+    item = top_feed_table.get_item(Key={"userId": user_id}).get("Item")
+    if not item:
+        return None
+    feed = {
+        "songs":   item.get("songs", []),
+        "albums":  item.get("albums", []),
+        "artists": item.get("artists", []),
+    }
+    if item.get("pullTargets") is not None:
+        feed.update(pullTargets=item["pullTargets"], pullTargetsAt=item.get("pullTargetsAt", 0))
+    return feed
+
+def save_top_feed(user_id, feed):
+    top_feed_table.put_item(Item={
+        "userId": user_id,
+        "builtAt": datetime.utcnow().isoformat(),
+        **feed,
+    })
+
+def refresh_top_feed(user_id):
+    feed = build_top_feed(user_id)
+    save_top_feed(user_id, feed)
+    return feed
+
+def _content_sort_keys(user_id, content_id):
+    q = {
+        "TableName": feed_table.name,
+        "IndexName": "UserContentIndex",
+        "KeyConditionExpression": "userId = :u AND begins_with(contentKey, :p)",
+        "ExpressionAttributeValues": {":u": {"S": user_id}, ":p": {"S": content_key_prefix(content_id)}},
+    }
+    keys = []
+    while True:
+        resp = dynamodb_client.query(**q)
+        keys.extend(it["createdAt"]["S"] for it in resp.get("Items", []))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return keys
+        q["ExclusiveStartKey"] = last_key
+
+def content_rows(user_id, content_ids):
+    """The user's feed rows for `content_ids`, limited to the MAX_AGE_DAYS window like build_top_feed."""
+    with ThreadPoolExecutor(max_workers=LOOKUP_WORKERS) as pool:
+        sort_keys = [k for keys in pool.map(lambda cid: _content_sort_keys(user_id, cid), content_ids) for k in keys]
+    if MAX_AGE_DAYS:
+        cutoff = str(int((time.time() - MAX_AGE_DAYS * 86400) * 1000))
+        sort_keys = [k for k in sort_keys if k >= cutoff]
+    rows = _batch_get(feed_table.name, [{"userId": user_id, "createdAt": k} for k in sort_keys], key_attr="createdAt")
+    return list(rows.values())
+
+def update_top_feed(user_id, content_ids, subscriptions_changed=False):
+    """Re-scores `content_ids` from their feed rows and merges them into the stored top feed,
+    re-trimmed to TOP_N. Returns the new document, or None when it needs a full build: there is
+    no stored document, decay is on (stored scores age), or a listed entry lost score while its
+    category is full, as the entry that would move up is not kept."""
+    feed = load_top_feed(user_id)
+    if feed is None or float(WEIGHTS.get("decay_half_life_days") or 0) > 0:
+        return None
+    if subscriptions_changed:
+        feed.pop("pullTargets", None)
+        feed.pop("pullTargetsAt", None)
+    content_ids = list(dict.fromkeys(content_ids))
+    songs_map, albums_map, artists_map, hints = aggregate_scores(content_rows(user_id, content_ids))
+    scores = {"songs": songs_map, "albums": albums_map, "artists": artists_map}
+
+    merged, to_hydrate = {}, []
+    for name, (t, table, index_name) in CATEGORIES.items():
+        entries = {(e.get(t.lower()) or {}).get("id"): e for e in feed[name]}
+        ranked = []
+        for cid in content_ids:
+            score = scores[name].get(cid)
+            if cid in entries:
+                if score is None or score < float(entries[cid]["score"]):
+                    if len(entries) >= TOP_N:
+                        return None
+                if score is None:
+                    del entries[cid]
+                else:
+                    entries[cid] = dict(entries[cid], score=Decimal(str(round(score, 3))))
+            elif score is not None:
+                ranked.append((cid, score))
+        merged[name] = entries
+        if len(entries) >= TOP_N:
+            floor = min(float(e["score"]) for e in entries.values())
+            ranked = [(cid, score) for cid, score in ranked if score > floor]
+        ranked.sort(key=lambda kv: kv[1], reverse=True)
+        to_hydrate.append((ranked[:TOP_N], table, index_name, t))
+
+    for name, added in zip(CATEGORIES, hydrate_categories(to_hydrate, hints, TOP_N)):
+        entries = list(merged[name].values()) + added
+        feed[name] = sorted(entries, key=lambda e: e["score"], reverse=True)[:TOP_N]
+    save_top_feed(user_id, feed)
+    return feed
+
+def invalidate_top_feed(user_id):
+    top_feed_table.delete_item(Key={"userId": user_id})
+
+def hydrate_categories(categories, hints, limit):
+    with ThreadPoolExecutor(max_workers=len(categories)) as pool:
+        futures = [
+            pool.submit(_hydrate_ranked, ranked, table, index_name, t, limit, hints)
+            for ranked, table, index_name, t in categories
+        ]
+        return [f.result() for f in futures]
+
+def _hydrate_ranked(ranked, table, index_name, t, limit, hints):
+    out = []
+    pos = 0
+    while len(out) < limit and pos < len(ranked):
+        window = [(cid, score) for cid, score in ranked[pos:pos + limit - len(out) + OVERFETCH] if cid]
+        pos += limit - len(out) + OVERFETCH
+
+        ids = [cid for cid, _ in window]
+        keys = [{"id": cid, SORT_KEYS[t]: hints[(cid, t)]} for cid in ids if (cid, t) in hints]
+        found = _batch_get(table.name, keys)
+        for cid in ids:
+            if cid not in found:
+                ent = _query_by_id(table.name, index_name, cid, t)
+                if ent:
+                    found[cid] = ent
+
+        for cid, score in window:
+            if cid in found and len(out) < limit:
+                out.append({"type": t, "score": Decimal(str(round(score, 3))), t.lower(): found[cid]})
+    return out
+
+def _batch_get(table_name, keys, key_attr="id"):
+    found = {}
+    for i in range(0, len(keys), BATCH_GET_SIZE):
+        request = {table_name: {"Keys": [_serialize(k) for k in keys[i:i + BATCH_GET_SIZE]]}}
+        attempt = 0
+        while request:
+            resp = dynamodb_client.batch_get_item(RequestItems=request)
+            for raw in resp.get("Responses", {}).get(table_name, []):
+                ent = _deserialize(raw)
+                found[ent[key_attr]] = ent
+            request = resp.get("UnprocessedKeys") or None
+            if request:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    print(f"_batch_get: giving up on unprocessed keys for {table_name}")
+                    break
+                time.sleep(random.uniform(0, min(1.0, 0.05 * (2 ** attempt))))
+    return found
+
+def _query_by_id(table_name, index_name, cid, t):
+    try:
+        resp = dynamodb_client.query(
+            TableName=table_name,
+            IndexName=index_name,
+            KeyConditionExpression="id = :id",
+            ExpressionAttributeValues={":id": {"S": cid}},
+            Limit=1
+        )
+        items = resp.get("Items")
+        return _deserialize(items[0]) if items else None
+    except Exception as e:
+        print(f"_query_by_id {t} error:", e)
+        return None
+
+def _serialize(item):
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+def _deserialize(item):
+    return {k: _deserializer.deserialize(v) for k, v in item.items()}
@@ -0,0 +1,152 @@
+import os
+import json
+import math
+import time
+import heapq
+from decimal import Decimal
+from datetime import datetime, timezone, timedelta
+from zoneinfo import ZoneInfo
+from feed.feed_keys import sort_key_ms
+
+DEFAULT_WEIGHTS = {
+    "upload_artist": 8,
+    "upload_genre": 5,
+    "rating_multiplier": 4,
+    "subscribe_artist": 4,
+    "subscribe_genre": 3,
+    "hydrate_song": 4,
+    "hydrate_album": 3,
+    "hydrate_artist": 2,
+    "listen": 1,
+    "evening_listen_boost": 1,
+    "type_weights": {"SONG": 1, "ALBUM": 1, "ARTIST": 1, "META": 1},
+    "decay_half_life_days": 0,
+}
+
+def load_weights():
+    weights = dict(DEFAULT_WEIGHTS)
+    try:
+        weights.update(json.loads(os.environ.get("FEED_WEIGHTS") or "{}"))
+    except ValueError as e:
+        print("load_weights: ignoring invalid FEED_WEIGHTS:", e)
+    return weights
+
+WEIGHTS = load_weights()
+
+def weight(name):
+    """A configured base score in the form DynamoDB stores it."""
+    return Decimal(str(WEIGHTS[name]))
+
+LOCAL_TZ = ZoneInfo(os.environ.get("FEED_LOCAL_TZ", "Europe/Belgrade"))
+TYPES = ("SONG", "ALBUM", "ARTIST", "META")
+CATEGORY_BY_TYPE = {"SONG": "SONG", "ALBUM": "ALBUM", "ARTIST": "ARTIST", "META": "ARTIST"}
+DAY_MS = 86400000
+HOUR_MS = 3600000
+
+def _iso_to_ms(ts_iso):
+    try:
+        ts_iso = ts_iso.replace('Z', '+00:00') if ts_iso.endswith('Z') else ts_iso
+        dt = datetime.fromisoformat(ts_iso)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return int(dt.timestamp() * 1000)
+    except Exception:
+        return None
+
+def _row_ms(it):
+    ms = sort_key_ms(it.get("createdAt"))
+    if ms is not None:
+        return ms
+    return _iso_to_ms(it.get("timestamp") or "")
+
+def _is_evening_hour(hour):
+    return hour >= 20 or hour < 3
+
+def _utc_offset_ms(day):
+    noon = datetime.fromtimestamp(day * 86400 + 43200, tz=timezone.utc)
+    return int(noon.astimezone(LOCAL_TZ).utcoffset() / timedelta(milliseconds=1))
+
+class FeedColumns:
+    """Feed rows loaded column-wise: one entry per row, keys interned to integer ids."""
+
+    def __init__(self):
+        self.keys = []
+        self.key_index = {}
+        self.key_idx = []
+        self.epoch_ms = []
+        self.type_code = []
+        self.base_score = []
+        self.is_listen = []
+        self.hints = {}
+
+    def add(self, it):
+        cid = it.get("contentId")
+        t = it.get("type")
+        if not cid or t not in CATEGORY_BY_TYPE:
+            return
+
+        key = (cid, CATEGORY_BY_TYPE[t])
+        idx = self.key_index.get(key)
+        if idx is None:
+            idx = self.key_index[key] = len(self.keys)
+            self.keys.append(key)
+
+        listen = t == "SONG" and (it.get("reason") or "").lower() == "listening activity"
+        ms = _row_ms(it)
+
+        self.key_idx.append(idx)
+        self.epoch_ms.append(ms if ms is not None else -1)
+        self.type_code.append(TYPES.index(t))
+        self.base_score.append(float(it.get("score", 0)))
+        self.is_listen.append(listen)
+
+        sort_value = it.get("name") if t == "ARTIST" else it.get("title")
+        if sort_value and t != "META":
+            self.hints[(cid, t)] = sort_value
+
+    def __len__(self):
+        return len(self.key_idx)
+
+def load_columns(rows):
+    cols = FeedColumns()
+    for it in rows:
+        cols.add(it)
+    return cols
+
+def score_columns(cols, now_ms=None, weights=None):
+    """Returns {"SONG": {cid: score}, "ALBUM": {...}, "ARTIST": {...}} for the loaded rows."""
+    weights = weights or WEIGHTS
+    now_ms = now_ms or int(time.time() * 1000)
+    if not len(cols):
+        return {"SONG": {}, "ALBUM": {}, "ARTIST": {}}
+    totals = _score_python(cols, now_ms, weights)
+
+    result = {"SONG": {}, "ALBUM": {}, "ARTIST": {}}
+    for (cid, category), total in zip(cols.keys, totals):
+        result[category][cid] = float(total)
+    return result
+
+def _score_python(cols, now_ms, weights):
+    totals = [0.0] * len(cols.keys)
+    half_life_ms = float(weights.get("decay_half_life_days") or 0) * DAY_MS
+    boost = float(weights["evening_listen_boost"])
+    type_weights = [float(weights["type_weights"].get(t, 1)) for t in TYPES]
+    offsets = {}
+
+    for idx, ms, code, base, listen in zip(cols.key_idx, cols.epoch_ms, cols.type_code, cols.base_score, cols.is_listen):
+        score = base
+        if listen and ms >= 0:
+            day = ms // DAY_MS
+            if day not in offsets:
+                offsets[day] = _utc_offset_ms(day)
+            if _is_evening_hour(((ms + offsets[day]) // HOUR_MS) % 24):
+                score += boost
+        score *= type_weights[code]
+        if half_life_ms > 0 and ms >= 0:
+            score *= math.exp(-math.log(2) * max(now_ms - ms, 0) / half_life_ms)
+        totals[idx] += score
+    return totals
+
+def top_k(score_map, k):
+    """Highest-scoring (contentId, score) pairs, best first."""
+    return heapq.nlargest(k, score_map.items(), key=lambda kv: kv[1])
@@ -1,24 +1,31 @@
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
 from utils.utils import create_response
+from utils import snapshot
 
 s3 = boto3.client("s3")
 dynamodb = boto3.resource("dynamodb")
 genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
 bucket_name = os.environ["MEDIA_BUCKET_NAME"]
 
+COLLECTIONS = ["genre_catalog"]
+
+@instrumented
 def handler(event, context):
     try:
         genre = event["pathParameters"].get("genre")
         if not genre:
             return create_response(400, {"message": "Genre parameter required."})
 
-        response = genre_catalog_table.query(
-            KeyConditionExpression=Key("PK").eq(f"GENRE#{genre}")
-        )
-
-        items = response.get("Items", [])
+        if snapshot.fresh(COLLECTIONS, snapshot.current_versions(COLLECTIONS)):
+            items = snapshot.partition("genre_catalog", f"GENRE#{genre}")
+        else:
+            response = genre_catalog_table.query(
+                KeyConditionExpression=Key("PK").eq(f"GENRE#{genre}")
+            )
+            items = response.get("Items", [])
 
         for song in items:
             if song.get("entityType") != "SONG":
@@ -37,7 +44,7 @@ def handler(event, context):
                     ExpiresIn=600
                 )
 
-        return create_response(200, {"data": items})
+        return create_response(200, {"data": items}, event=event)
 
     except Exception as e:
         return create_response(500, {"message": str(e)})
@@ -1,10 +1,22 @@
 import os
 import boto3
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.utils import REVALIDATE, create_response, not_modified
+from utils.versions import collection_etag
+from utils import snapshot
 
 dynamodb = boto3.resource("dynamodb")
 genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
 
+@instrumented
 def handler(event, context):
-    response = genres_table.scan()
-    return create_response(200, {"data": response.get("Items", [])})
\ No newline at end of file
+    versions = snapshot.current_versions(["genres"])
+    etag = collection_etag(event, "genres", versions=versions)
+    if not_modified(event, etag):
+        return create_response(304, None, etag=etag, cache_control=REVALIDATE)
+
+    if snapshot.fresh(["genres"], versions):
+        genres = snapshot.items("genres")
+    else:
+        genres = genres_table.scan().get("Items", [])
+    return create_response(200, {"data": genres}, etag=etag, cache_control=REVALIDATE, event=event)
\ No newline at end of file
@@ -1,11 +1,13 @@
 import os
 import json
 import boto3
+from utils.instrumentation import instrumented
 from utils.utils import create_response
 
 s3 = boto3.client("s3")
 bucket = os.environ["MEDIA_BUCKET"]
 
+@instrumented
 def handler(event, context):
     try:
         query = event.get("queryStringParameters") or {}
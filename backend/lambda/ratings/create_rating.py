@@ -1,7 +1,10 @@
 import os
 import json
+import uuid
 import boto3
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.utils import create_response, request_body
+from utils.versions import bump
 
 sns = boto3.client("sns")
 TOPIC_ARN = os.environ.get("TOPIC_ARN")
@@ -11,9 +14,10 @@ table = dynamodb.Table(os.environ["RATINGS_TABLE"])
 
 ALLOWED_RATINGS = {"love": 3, "like": 2, "dislike": 1}
 
+@instrumented
 def handler(event, context):
     try:
-        body = json.loads(event["body"])
+        body = request_body(event)
         user_id = body.get("userId")
         content_id = body.get("contentId")
         rating = body.get("rating")
@@ -26,10 +30,12 @@ def handler(event, context):
             "userId": user_id,
             "rating": rating
         })
+        bump(f"ratings:{content_id}")
 
         sns.publish(
             TopicArn=TOPIC_ARN,
             Message=json.dumps({
+                "eventId": str(uuid.uuid4()),
                 "eventType": "user_rated",
                 "userId": user_id,
                 "contentId": content_id,
@@ -1,7 +1,10 @@
 import os
 import json
+import uuid
 import boto3
+from utils.instrumentation import instrumented
 from utils.utils import create_response
+from utils.versions import bump
 
 sns = boto3.client("sns")
 TOPIC_ARN = os.environ.get("TOPIC_ARN")
@@ -9,6 +12,7 @@ TOPIC_ARN = os.environ.get("TOPIC_ARN")
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(os.environ["RATINGS_TABLE"])
 
+@instrumented
 def handler(event, context):
     try:
         params = event.get("queryStringParameters") or {}
@@ -24,10 +28,12 @@ def handler(event, context):
                 "userId": user_id
             }
         )
+        bump(f"ratings:{content_id}")
 
         sns.publish(
             TopicArn=TOPIC_ARN,
             Message=json.dumps({
+                "eventId": str(uuid.uuid4()),
                 "eventType": "rating_deleted",
                 "userId": user_id,
                 "contentId": content_id
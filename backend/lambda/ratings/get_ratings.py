@@ -1,13 +1,16 @@
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.utils import REVALIDATE, create_response, not_modified
+from utils.versions import collection_etag
 
 dynamodb = boto3.resource("dynamodb")
 table = dynamodb.Table(os.environ["RATINGS_TABLE"])
 
 RATING_VALUES = {"dislike": 1, "like": 2, "love": 3}
 
+@instrumented
 def handler(event, context):
     try:
         params = event.get("queryStringParameters") or {}
@@ -17,19 +20,23 @@ def handler(event, context):
         if not content_id:
             return create_response(400, {"message": "contentId is required."})
 
+        etag = collection_etag(event, f"ratings:{content_id}")
+        if not_modified(event, etag):
+            return create_response(304, None, etag=etag, cache_control=REVALIDATE)
+
         if user_id:
             response = table.get_item(Key={"contentId": content_id, "userId": user_id})
             item = response.get("Item")
             if item:
-                return create_response(200, {"userRating": item["rating"]})
+                return create_response(200, {"userRating": item["rating"]}, etag=etag, cache_control=REVALIDATE)
             else:
-                return create_response(200, {"userRating": None})
+                return create_response(200, {"userRating": None}, etag=etag, cache_control=REVALIDATE)
 
         response = table.query(KeyConditionExpression=Key("contentId").eq(content_id))
         items = response.get("Items", [])
 
         if not items:
-            return create_response(200, {"averageRating": None, "count": 0})
+            return create_response(200, {"averageRating": None, "count": 0}, etag=etag, cache_control=REVALIDATE)
 
         numeric_ratings = [RATING_VALUES[item["rating"]] for item in items if item["rating"] in RATING_VALUES]
         avg = sum(numeric_ratings) / len(numeric_ratings)
@@ -42,6 +49,6 @@ def handler(event, context):
                 "like": sum(1 for i in items if i["rating"] == "like"),
                 "dislike": sum(1 for i in items if i["rating"] == "dislike")
             }
-        })
+        }, etag=etag, cache_control=REVALIDATE)
     except Exception as e:
         return create_response(500, {"message": str(e)})
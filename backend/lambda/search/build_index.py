@@ -0,0 +1,92 @@
+import os
+import json
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from utils.instrumentation import instrumented, instrument_session
+from utils.genres import genre_names
+from utils.versions import current_versions
+from utils.layered_store import LayeredStore, fingerprint, diff
+from search.index import build_segment, doc_key
+
+BUCKET = os.environ["SEARCH_BUCKET"]
+PREFIX = "search/"
+MANIFEST_KEY = PREFIX + "manifest.json"
+SCAN_SEGMENTS = int(os.environ.get("SEARCH_SCAN_SEGMENTS", "4"))
+MAX_DELTAS = int(os.environ.get("SEARCH_MAX_DELTAS", "8"))
+DELTA_MAX_FRACTION = float(os.environ.get("SEARCH_DELTA_MAX_FRACTION", "0.1"))
+
+SOURCES = {
+    "SONG": (os.environ["SONGS_TABLE"], "title", ("genreIds", "genres", "artistNames")),
+    "ALBUM": (os.environ["ALBUMS_TABLE"], "title", ("genreIds", "genres", "artistNames")),
+    "ARTIST": (os.environ["ARTISTS_TABLE"], "name", ("genreIds", "genres")),
+    "GENRE": (os.environ["GENRES_TABLE"], "name", ()),
+}
+COLLECTIONS = ["songs", "albums", "artists", "genres"]
+
+store = LayeredStore(BUCKET, PREFIX, ".idx", MAX_DELTAS, DELTA_MAX_FRACTION)
+
+def _scan_segment(table_name, attrs, segment):
+    table = instrument_session(boto3.session.Session()).resource("dynamodb").Table(table_name)
+    names = {f"#a{i}": a for i, a in enumerate(attrs)}
+    q = {"Segment": segment, "TotalSegments": SCAN_SEGMENTS,
+         "ProjectionExpression": ", ".join(names), "ExpressionAttributeNames": names}
+    items = []
+    while True:
+        resp = table.scan(**q)
+        items.extend(resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return items
+        q["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+def _doc(doc_type, label_field, item):
+    doc = {"id": item["id"], "type": doc_type, label_field: item.get(label_field)}
+    genres = item.get("genres")
+    if genres is None and item.get("genreIds"):
+        genres = genre_names(item["genreIds"])
+    if genres:
+        doc["genres"] = list(genres)
+    if item.get("artistNames"):
+        doc["artistNames"] = list(item["artistNames"])
+    return doc
+
+def catalog_docs():
+    """Every song, album, artist and genre as a search doc, keyed by doc_key."""
+    with ThreadPoolExecutor(max_workers=len(SOURCES) * SCAN_SEGMENTS) as pool:
+        futures = {
+            (doc_type, seg): pool.submit(_scan_segment, table_name, ("id", label) + extra, seg)
+            for doc_type, (table_name, label, extra) in SOURCES.items()
+            for seg in range(SCAN_SEGMENTS)
+        }
+        docs = {}
+        for (doc_type, _), f in futures.items():
+            label = SOURCES[doc_type][1]
+            for item in f.result():
+                doc = _doc(doc_type, label, item)
+                docs[doc_key(doc)] = doc
+    return docs
+
+@instrumented
+def handler(event, context):
+    """Rebuilds the search index when the catalog version counters moved, as a delta segment or
+    a fresh base (see utils.layered_store); {"full": true} forces a base."""
+    event = event or {}
+    versions = current_versions(COLLECTIONS)
+    manifest = store.get(MANIFEST_KEY)
+    if manifest and not event.get("full") and manifest.get("sourceVersions") == versions:
+        print("build_index: catalog unchanged")
+        return {"changed": False, "version": manifest["version"]}
+
+    docs = catalog_docs()
+    fingerprints = {key: fingerprint(doc) for key, doc in docs.items()}
+    changed, deleted = diff(fingerprints, store.previous_fingerprints(manifest))
+
+    new_manifest, key = store.publish(
+        manifest, fingerprints, len(changed) + len(deleted), len(docs),
+        write_base=lambda key: store.put(key, build_segment(list(docs.values()))),
+        write_delta=lambda key: store.put(key, build_segment([docs[k] for k in changed], deleted)),
+        save_pointer=lambda m: store.put(MANIFEST_KEY, json.dumps(m), "application/json"),
+        full=event.get("full"),
+        sourceVersions=versions,
+    )
+    print(f"build_index: wrote {key} ({len(changed)} changed, {len(deleted)} deleted, {len(docs)} docs)")
+    return {"changed": bool(key), "version": new_manifest["version"], "segment": key}
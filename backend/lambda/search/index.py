@@ -0,0 +1,228 @@
+"""Compact inverted index over catalog names, in a flat binary layout that can be mmapped.
+
+Segment file (all integers little-endian):
+
+    header      magic "SIX1", doc count, term count, posting count, meta length   (5 x u32)
+    doc_len     u16 per doc, tokens per doc (title tokens count twice)
+    term_off    u32 per term + 1, offsets into term_bytes
+    post_off    u32 per term + 1, offsets into the posting arrays
+    post_doc    u32 per posting, doc number
+    post_tf     u16 per posting, term frequency
+    term_bytes  UTF-8 terms, sorted, so prefixes are a contiguous range
+    meta        zlib-compressed JSON: {"docs": [...], "deleted": [...]}
+
+The arrays are each zero-padded to a multiple of 4 bytes.
+
+A delta segment has the same layout; its docs replace same-key docs of older segments and its
+`deleted` keys hide them.
+"""
+import re
+import sys
+import json
+import math
+import zlib
+import heapq
+import mmap
+import struct
+import unicodedata
+from array import array
+from operator import itemgetter
+
+MAGIC = b"SIX1"
+HEADER = struct.Struct("<4sIIII")
+MAX_TF = 0xFFFF
+K1 = 1.2
+B = 0.75
+PREFIX_WEIGHT = 0.6
+MAX_EXPANSIONS = 64
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    return TOKEN_RE.findall(text)
+
+def doc_key(doc):
+    return f"{doc['type']}#{doc['id']}"
+
+def doc_terms(doc):
+    """Term frequencies for a doc; the title/name counts twice against genre and artist names."""
+    tf = {}
+    for token in tokenize(doc.get("title") or doc.get("name")):
+        tf[token] = tf.get(token, 0) + 2
+    for text in (doc.get("genres") or []) + (doc.get("artistNames") or []):
+        for token in tokenize(text):
+            tf[token] = tf.get(token, 0) + 1
+    return tf
+
+def _le(arr):
+    if sys.byteorder != "little":
+        arr.byteswap()
+    data = arr.tobytes()
+    # Each array starts 4-byte aligned so the reader can cast it in place.
+    return data + b"\0" * (-len(data) % 4)
+
+def build_segment(docs, deleted=()):
+    """Serializes `docs` (dicts with id, type, title/name, genres, artistNames) into segment bytes."""
+    postings = {}
+    doc_len = array("H")
+    for n, doc in enumerate(docs):
+        tf = doc_terms(doc)
+        doc_len.append(min(sum(tf.values()), MAX_TF))
+        for term, count in tf.items():
+            postings.setdefault(term, []).append((n, min(count, MAX_TF)))
+
+    terms = sorted(postings)
+    term_off, post_off = array("I", [0]), array("I", [0])
+    post_doc, post_tf = array("I"), array("H")
+    term_bytes = bytearray()
+    for term in terms:
+        term_bytes += term.encode()
+        term_off.append(len(term_bytes))
+        for n, count in postings[term]:
+            post_doc.append(n)
+            post_tf.append(count)
+        post_off.append(len(post_doc))
+
+    meta = zlib.compress(json.dumps({"docs": docs, "deleted": list(deleted)}, separators=(",", ":")).encode(), 6)
+    return b"".join([
+        HEADER.pack(MAGIC, len(docs), len(terms), len(post_doc), len(meta)),
+        _le(doc_len), _le(term_off), _le(post_off), _le(post_doc), _le(post_tf),
+        bytes(term_bytes), meta,
+    ])
+
+class Segment:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.doc_count, self.term_count, post_count, meta_len = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a search segment")
+
+        view = self._view = memoryview(self._mm)
+        pos = HEADER.size
+
+        def take(fmt, count):
+            nonlocal pos
+            size = struct.calcsize(fmt) * count
+            arr = view[pos:pos + size].cast(fmt)
+            pos += size + (-size % 4)
+            return arr
+
+        self.doc_len = take("H", self.doc_count)
+        self.term_off = take("I", self.term_count + 1)
+        self.post_off = take("I", self.term_count + 1)
+        self.post_doc = take("I", post_count)
+        self.post_tf = take("H", post_count)
+        self._terms_at = pos
+        pos += self.term_off[self.term_count]
+        meta = json.loads(zlib.decompress(view[pos:pos + meta_len]))
+        self.docs = meta["docs"]
+        self.deleted = set(meta["deleted"])
+        self.keys = [doc_key(d) for d in self.docs]
+        self.total_len = sum(self.doc_len)
+
+    def term(self, i):
+        return bytes(self._mm[self._terms_at + self.term_off[i]:self._terms_at + self.term_off[i + 1]]).decode()
+
+    def _lower_bound(self, word):
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.term(mid) < word:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def matches(self, word, prefix):
+        """[(term index, exact)] for `word`, plus up to MAX_EXPANSIONS terms it prefixes."""
+        i = self._lower_bound(word)
+        found = []
+        while i < self.term_count and len(found) <= MAX_EXPANSIONS:
+            term = self.term(i)
+            if term == word:
+                found.append((i, True))
+            elif prefix and term.startswith(word):
+                found.append((i, False))
+            else:
+                break
+            i += 1
+        return found
+
+    def df(self, i):
+        return self.post_off[i + 1] - self.post_off[i]
+
+    def postings(self, i):
+        start, end = self.post_off[i], self.post_off[i + 1]
+        return zip(self.post_doc[start:end], self.post_tf[start:end])
+
+    def close(self):
+        for name in ("doc_len", "term_off", "post_off", "post_doc", "post_tf"):
+            getattr(self, name).release()
+        self._view.release()
+        self._mm.close()
+
+class Searcher:
+    """BM25 over a base segment plus deltas, newest last."""
+
+    def __init__(self, segments):
+        self.segments = segments
+        # A doc in a segment is hidden by any newer segment that rewrites or deletes its key.
+        self.hidden = []
+        newer = set()
+        for seg in reversed(segments):
+            self.hidden.append({n for n, key in enumerate(seg.keys) if key in newer})
+            newer |= set(seg.keys) | seg.deleted
+        self.hidden.reverse()
+
+        live = sum(seg.doc_count - len(h) for seg, h in zip(segments, self.hidden))
+        self.doc_count = max(live, 1)
+        self.avg_len = sum(seg.total_len for seg in segments) / max(sum(seg.doc_count for seg in segments), 1) or 1.0
+        self.norms = [[K1 * (1 - B + B * dl / self.avg_len) for dl in seg.doc_len] for seg in segments]
+
+    def _weighted_terms(self, words):
+        """Per segment, [(term index, weight)] for every term matching a query word exactly or
+        by prefix, weighted by BM25 idf over all segments."""
+        weighted = [[] for _ in self.segments]
+        for word in words:
+            per_seg = [seg.matches(word, prefix=True) for seg in self.segments]
+            df = {}
+            for seg, found in zip(self.segments, per_seg):
+                for i, _ in found:
+                    term = seg.term(i)
+                    df[term] = df.get(term, 0) + seg.df(i)
+            for s, (seg, found) in enumerate(zip(self.segments, per_seg)):
+                for i, exact in found:
+                    # df counts postings of hidden docs too; capping it keeps idf positive.
+                    n = min(df[seg.term(i)], self.doc_count)
+                    idf = math.log(1 + (self.doc_count - n + 0.5) / (n + 0.5))
+                    weighted[s].append((i, idf if exact else idf * PREFIX_WEIGHT))
+        return weighted
+
+    def search(self, query, limit=20, types=None):
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+        weighted = self._weighted_terms(words)
+        hits = []
+        for s, seg in enumerate(self.segments):
+            if weighted[s]:
+                hits.extend((score, s, d) for d, score in _top(seg, weighted[s], self.norms[s], self.hidden[s], limit, types))
+        best = heapq.nlargest(limit, hits)
+        return [dict(self.segments[s].docs[d], score=round(score, 4)) for score, s, d in best]
+
+def _top(seg, weighted, norm, hidden, limit, types):
+    scores = {}
+    for i, weight in weighted:
+        w = weight * (K1 + 1)
+        start, end = seg.post_off[i], seg.post_off[i + 1]
+        for d, tf in zip(seg.post_doc[start:end], seg.post_tf[start:end]):
+            scores[d] = scores.get(d, 0.0) + w * tf / (tf + norm[d])
+    for d in hidden:
+        scores.pop(d, None)
+    hits = scores.items()
+    if types:
+        hits = [(d, v) for d, v in hits if seg.docs[d]["type"] in types]
+    return heapq.nlargest(limit, hits, key=itemgetter(1))
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import boto3
+from botocore.exceptions import ClientError
+from utils.instrumentation import instrumented
+from utils.utils import create_response
+from search.index import Segment, Searcher
+
+BUCKET = os.environ["SEARCH_BUCKET"]
+MANIFEST_KEY = "search/manifest.json"
+LOCAL_DIR = "/tmp/search"
+REFRESH_SECONDS = int(os.environ.get("SEARCH_REFRESH_SECONDS", "30"))
+MAX_LIMIT = 50
+MAX_QUERY_LENGTH = 200
+TYPES = {"song": "SONG", "album": "ALBUM", "artist": "ARTIST", "genre": "GENRE"}
+
+s3 = boto3.client("s3")
+
+_state = {"etag": None, "version": None, "checked": 0.0, "segments": {}, "searcher": None}
+
+def _open(key):
+    os.makedirs(LOCAL_DIR, exist_ok=True)
+    path = os.path.join(LOCAL_DIR, os.path.basename(key))
+    if not os.path.exists(path):
+        s3.download_file(BUCKET, key, path + ".part")
+        os.replace(path + ".part", path)
+    return Segment(path)
+
+def refresh(force=False):
+    """Picks up a new manifest at most every SEARCH_REFRESH_SECONDS, downloading only the
+    segments this container doesn't have yet."""
+    now = time.time()
+    if _state["searcher"] is not None and not force and now - _state["checked"] < REFRESH_SECONDS:
+        return
+    _state["checked"] = now
+
+    kwargs = {"IfNoneMatch": _state["etag"]} if _state["etag"] and _state["searcher"] is not None else {}
+    try:
+        obj = s3.get_object(Bucket=BUCKET, Key=MANIFEST_KEY, **kwargs)
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("304", "NotModified"):
+            return
+        if _state["searcher"] is not None:
+            print(f"Search manifest refresh failed, serving version {_state['version']}: {e}")
+            return
+        raise
+
+    manifest = json.loads(obj["Body"].read())
+    keys = [manifest["base"]] + manifest["deltas"]
+    old = _state["segments"]
+    segments = {key: old.get(key) or _open(key) for key in keys}
+    _state.update(etag=obj["ETag"], version=manifest["version"], segments=segments,
+                  searcher=Searcher([segments[key] for key in keys]))
+
+    for key, seg in old.items():
+        if key not in segments:
+            try:
+                seg.close()
+                os.remove(seg.path)
+            except (BufferError, OSError) as e:
+                print(f"Could not release search segment {key}: {e}")
+
+try:
+    refresh(force=True)
+except Exception as e:
+    print(f"Search index not loaded at cold start: {e}")
+
+@instrumented
+def handler(event, context):
+    try:
+        params = event.get("queryStringParameters") or {}
+        query = (params.get("q") or "").strip()
+        if not query:
+            return create_response(400, {"message": "q is required."})
+        if len(query) > MAX_QUERY_LENGTH:
+            return create_response(400, {"message": f"q must be at most {MAX_QUERY_LENGTH} characters."})
+
+        try:
+            limit = int(params.get("limit") or 20)
+        except ValueError:
+            return create_response(400, {"message": "limit must be an integer."})
+        if not 1 <= limit <= MAX_LIMIT:
+            return create_response(400, {"message": f"limit must be between 1 and {MAX_LIMIT}."})
+
+        types = None
+        if params.get("type"):
+            requested = [t.strip().lower() for t in params["type"].split(",") if t.strip()]
+            unknown = [t for t in requested if t not in TYPES]
+            if unknown:
+                return create_response(400, {"message": f"Unknown type: {', '.join(unknown)}"})
+            types = {TYPES[t] for t in requested}
+
+        refresh()
+        if _state["searcher"] is None:
+            return create_response(503, {"message": "Search index is not built yet."})
+
+        results = _state["searcher"].search(query, limit=limit, types=types)
+        return create_response(200, {"data": results, "indexVersion": _state["version"]}, event=event)
+
+    except Exception as e:
+        print(f"Error in search: {e}")
+        return create_response(500, {"message": str(e)})
@@ -1,18 +1,23 @@
 import boto3
 import uuid
+from utils.instrumentation import instrumented
 from utils.utils import create_response
+from utils.versions import bump
+from utils.write_scheduler import WriteScheduler
 
 dynamodb = boto3.resource("dynamodb")
+scheduler = WriteScheduler("seeder")
 
 def clear_genres_table():
     table = dynamodb.Table("GenresTable")
     scan = table.scan()
-    with table.batch_writer() as batch:
-        for item in scan.get("Items", []):
-            if "id" in item and "name" in item:
-                batch.delete_item(Key={"id": item["id"], "name": item["name"]})
+    for item in scan.get("Items", []):
+        if "id" in item and "name" in item:
+            scheduler.delete(table.name, {"id": item["id"], "name": item["name"]})
+    scheduler.flush()
 
 
+@instrumented
 def handler(event, context):
     try:
         if event.get("reset", True):
@@ -29,7 +34,9 @@ def handler(event, context):
         ]
 
         for g in genres:
-            genres_table.put_item(Item=g)
+            scheduler.put(genres_table.name, g)
+        scheduler.flush()
+        bump("genres")
 
         return create_response(200, {
             "message": "Genres seeded successfully!",
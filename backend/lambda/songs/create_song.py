@@ -3,17 +3,18 @@ import boto3
 import uuid
 import json
 from datetime import datetime
-from boto3.dynamodb.conditions import Key
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.artists import artist_names
+from utils.genres import resolve_genres
+from utils.notifications import publish_all
+from utils.utils import create_response, request_body
+from utils.versions import bump
 
 s3 = boto3.client("s3")
 bucket = os.environ["MEDIA_BUCKET"]
 dynamodb = boto3.resource("dynamodb")
 
 songs_table = dynamodb.Table(os.environ["SONGS_TABLE"])
-genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-artist_catalog_table = dynamodb.Table(os.environ["ARTIST_CATALOG_TABLE"])
 
 sns = boto3.client('sns')
 FEED_TOPIC_ARN = os.environ['FEED_TOPIC_ARN']
@@ -22,23 +23,10 @@ NOTIFICATIONS_TOPIC_ARN = os.environ['NOTIFICATIONS_TOPIC_ARN']
 sqs = boto3.client('sqs')
 TRANSCRIPTION_QUEUE_URL = os.environ['TRANSCRIPTION_QUEUE_URL']
 
-def get_or_create_genre(genre_name):
-    response = genres_table.query(
-        IndexName="GenreNameIndex",
-        KeyConditionExpression=Key("name").eq(genre_name)
-    )
-    items = response.get("Items", [])
-    if items:
-        return {"id": items[0]["id"], "name": items[0]["name"]}
-
-    genre_id = str(uuid.uuid4())
-    genres_table.put_item(Item={"id": genre_id, "name": genre_name})
-    return {"id": genre_id, "name": genre_name}
-
-
+@instrumented
 def handler(event, context):
     try:
-        body = json.loads(event["body"])
+        body = request_body(event)
 
         title = body.get("title")
         artist_ids = body.get("artistIds")
@@ -51,7 +39,9 @@ def handler(event, context):
             return create_response(400, {"message": "All fields are required."})
 
         song_id = str(uuid.uuid4())
-        genre_data = [get_or_create_genre(g) for g in genres]
+        genre_data, created_genres = resolve_genres(genres)
+        if created_genres:
+            bump("genres")
         genre_ids = [g["id"] for g in genre_data]
 
         s3_cover_key = f"{song_id}/cover/{cover_filename}"
@@ -76,6 +66,8 @@ def handler(event, context):
             "title": title,
             "artistIds": artist_ids,
             "genreIds": genre_ids,
+            "genres": [g["name"] for g in genre_data],
+            "artistNames": artist_names(artist_ids),
             "s3KeyCover": s3_cover_key,
             "s3KeyAudio": s3_audio_key,
             "creationDate": creation_date
@@ -84,35 +76,12 @@ def handler(event, context):
         if album_id:
             item["albumId"] = album_id
 
+        # GenreCatalog/ArtistCatalog edges are written by catalog.edge_projector from the stream.
         songs_table.put_item(Item=item)
-
-        for g in genre_data:
-            genre_catalog_table.put_item(Item={
-                "PK": f"GENRE#{g['name']}",
-                "SK": f"SONG#{song_id}",
-                "entityType": "SONG",
-                "entityId": song_id,
-                "title": title,
-                "creationDate": creation_date,
-                "s3KeyCover": s3_cover_key,
-                "s3KeyAudio": s3_audio_key,
-                "genres": [g["name"] for g in genre_data]
-            })
-
-        for artist_id in artist_ids:
-            artist_catalog_table.put_item(Item={
-                "PK": f"ARTIST#{artist_id}",
-                "SK": f"SONG#{song_id}",
-                "entityType": "SONG",
-                "entityId": song_id,
-                "title": title,
-                "creationDate": creation_date,
-                "s3KeyCover": s3_cover_key,
-                "s3KeyAudio": s3_audio_key,
-                "genres": [g["name"] for g in genre_data]
-            })
+        bump("songs")
 
         event_message = {
+            "eventId": str(uuid.uuid4()),
             "eventType": "song_uploaded",
             "songId": song_id,
             "title": title,
@@ -127,19 +96,17 @@ def handler(event, context):
             Message=json.dumps(event_message)
         )
 
-        all_target_ids = genre_ids + artist_ids
-        for targetId in all_target_ids:
-            sns.publish(
-                TopicArn=NOTIFICATIONS_TOPIC_ARN,
-                Message=json.dumps({
-                    "targetId": targetId,
-                    "contentInfo": {
-                        "type": "song",
-                        "title": title,
-                        "releaseDate": creation_date
-                    }
-                })
-            )
+        publish_all(NOTIFICATIONS_TOPIC_ARN, [
+            {
+                "targetId": target_id,
+                "contentInfo": {
+                    "type": "song",
+                    "title": title,
+                    "releaseDate": creation_date
+                }
+            }
+            for target_id in genre_ids + artist_ids
+        ])
 
         sqs.send_message(
             QueueUrl=TRANSCRIPTION_QUEUE_URL,
@@ -1,7 +1,10 @@
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
 from utils.utils import create_response
+from utils.versions import bump
+from utils.write_scheduler import WriteScheduler
 
 s3 = boto3.client("s3")
 dynamodb = boto3.resource("dynamodb")
@@ -10,8 +13,8 @@ bucket = os.environ["MEDIA_BUCKET"]
 songs_table = dynamodb.Table(os.environ["SONGS_TABLE"])
 genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
 ratings_table = dynamodb.Table(os.environ["RATINGS_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-artist_catalog_table = dynamodb.Table(os.environ["ARTIST_CATALOG_TABLE"])
+
+scheduler = WriteScheduler("cascade")
 
 def _delete_s3_prefix(bucket_name: str, prefix: str):
     paginator = s3.get_paginator('list_objects_v2')
@@ -20,48 +23,7 @@ def _delete_s3_prefix(bucket_name: str, prefix: str):
         if objects:
             s3.delete_objects(Bucket=bucket_name, Delete={'Objects': objects, 'Quiet': True})
 
-def _delete_all_edges_for_song(song_id: str):
-    resp = genre_catalog_table.query(
-        IndexName="BySongIndex",
-        KeyConditionExpression=Key('SK').eq(f'SONG#{song_id}'),
-        ProjectionExpression='PK, SK'
-    )
-    items = resp.get('Items', [])
-    while 'LastEvaluatedKey' in resp:
-        resp = genre_catalog_table.query(
-            IndexName="BySongIndex",
-            KeyConditionExpression=Key('SK').eq(f'SONG#{song_id}'),
-            ProjectionExpression='PK, SK',
-            ExclusiveStartKey=resp['LastEvaluatedKey']
-        )
-        items.extend(resp.get('Items', []))
-
-    if items:
-        with genre_catalog_table.batch_writer() as batch:
-            for it in items:
-                batch.delete_item(Key={'PK': it['PK'], 'SK': it['SK']})
-
-    resp = artist_catalog_table.query(
-        IndexName="BySongIndex",
-        KeyConditionExpression=Key('SK').eq(f'SONG#{song_id}'),
-        ProjectionExpression='PK, SK'
-    )
-    items = resp.get('Items', [])
-
-    while 'LastEvaluatedKey' in resp:
-        resp = artist_catalog_table.query(
-            IndexName="BySongIndex",
-            KeyConditionExpression=Key('SK').eq(f'SONG#{song_id}'),
-            ProjectionExpression='PK, SK',
-            ExclusiveStartKey=resp['LastEvaluatedKey']
-        )
-        items.extend(resp.get('Items', []))
-
-    if items:
-        with artist_catalog_table.batch_writer() as batch:
-            for it in items:
-                batch.delete_item(Key={'PK': it['PK'], 'SK': it['SK']})
-
+def _delete_ratings_for_song(song_id: str):
     resp = ratings_table.query(
         IndexName="BySongIndex",
         KeyConditionExpression=Key("contentId").eq(song_id),
@@ -79,10 +41,12 @@ def _delete_all_edges_for_song(song_id: str):
         items.extend(resp.get("Items", []))
 
     if items:
-        with ratings_table.batch_writer() as batch:
-            for it in items:
-                batch.delete_item(Key={"contentId": it["contentId"], "userId": it["userId"]})
+        for it in items:
+            scheduler.delete(ratings_table.name, {"contentId": it["contentId"], "userId": it["userId"]})
+
+    scheduler.flush()
 
+@instrumented
 def handler(event, context):
     try:
         song_id = event["pathParameters"]["songId"]
@@ -105,7 +69,9 @@ def handler(event, context):
 
         songs_table.delete_item(Key={'id': song_id, 'title': title})
 
-        _delete_all_edges_for_song(song_id)
+        # GenreCatalog/ArtistCatalog edges are removed by catalog.edge_projector.
+        _delete_ratings_for_song(song_id)
+        bump("songs", f"ratings:{song_id}")
 
         return create_response(200, {"message": True})
         
@@ -1,17 +1,17 @@
 import os
-import json
 import boto3
 from boto3.dynamodb.conditions import Key
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.artists import artist_names
+from utils.genres import genre_names as lookup_genre_names
+from utils.utils import create_response, request_body
+from utils.versions import bump
 
 s3 = boto3.client("s3")
 dynamodb = boto3.resource("dynamodb")
 
 BUCKET = os.environ["MEDIA_BUCKET"]
 songs_table         = dynamodb.Table(os.environ["SONGS_TABLE"])
-genres_table        = dynamodb.Table(os.environ["GENRES_TABLE"])
-genre_catalog_table = dynamodb.Table(os.environ["GENRE_CATALOG_TABLE"])
-artist_catalog_table = dynamodb.Table(os.environ["ARTIST_CATALOG_TABLE"])
 
 def _is_url(s: str) -> bool:
     return isinstance(s, str) and (s.startswith("http://") or s.startswith("https://") or s.startswith("s3://"))
@@ -20,19 +20,6 @@ def _set_diff(old_list, new_list):
     old, new = set(old_list or []), set(new_list or [])
     return list(new - old), list(old - new)
 
-def _genre_names_by_ids(ids):
-    names = []
-    for gid in ids or []:
-        resp = genres_table.query(
-            IndexName="GenreIdIndex",
-            KeyConditionExpression=Key("id").eq(gid),
-            Limit=1
-        )
-        items = resp.get("Items", [])
-        if items:
-            names.append(items[0]["name"])
-    return names
-
 def _safe_delete_object(bucket: str, key: str):
     try:
         if key:
@@ -40,6 +27,7 @@ def _safe_delete_object(bucket: str, key: str):
     except Exception:
         pass
 
+@instrumented
 def handler(event, context):
     song_id = str(event["pathParameters"]["songId"]).strip()
 
@@ -53,7 +41,7 @@ def handler(event, context):
             return create_response(404, {"message": f"Song with id {song_id} not found."})
         song = items[0]
 
-        body = json.loads(event.get("body") or "{}")
+        body = request_body(event)
 
         old_title     = song.get("title")
         old_album_id  = song.get("albumId")
@@ -61,7 +49,6 @@ def handler(event, context):
         old_genres    = song.get("genreIds") or []
         old_cover_key = song.get("s3KeyCover")
         old_audio_key = song.get("s3KeyAudio")
-        creation_date = song.get("creationDate")
 
         new_album_id  = body.get("albumId")
         new_artists   = body.get("artistIds")
@@ -81,7 +68,7 @@ def handler(event, context):
         genres_changed = (new_genres is not None and new_genres != old_genres)
         if genres_changed:
             changed["genreIds"] = new_genres
-        genre_names = _genre_names_by_ids(new_genres if genres_changed else old_genres)
+        genre_names = lookup_genre_names(new_genres if genres_changed else old_genres)
         new_cover_key = old_cover_key
         new_audio_key = old_audio_key
         if cover_changed:
@@ -95,8 +82,13 @@ def handler(event, context):
             return create_response(200, {"message": "No changes.", "updated": []})
 
         if changed:
+            stored = dict(changed)
+            if genres_changed:
+                stored["genres"] = genre_names
+            if artists_changed:
+                stored["artistNames"] = artist_names(new_artists)
             expr_names, expr_vals, sets = {}, {}, []
-            for k, v in changed.items():
+            for k, v in stored.items():
                 expr_names[f"#{k}"] = k
                 expr_vals[f":{k}"] = v
                 sets.append(f"#{k} = :{k}")
@@ -107,100 +99,22 @@ def handler(event, context):
                 ExpressionAttributeValues=expr_vals
             )
 
-        genre_links = {"added": [], "removed": []}
-        if genres_changed or cover_changed or audio_changed:
-            existing_items = genre_catalog_table.query(
-                IndexName="BySongIndex",
-                KeyConditionExpression=Key("SK").eq(f"SONG#{song_id}")
-            ).get("Items", [])
+            bump("songs")
 
-            if genres_changed:
-                genre_names = _genre_names_by_ids(new_genres)
-                new_pks = [f"GENRE#{nm}" for nm in genre_names]
-                existing_pks = [it["PK"] for it in existing_items]
-
-                to_add, to_remove = _set_diff(existing_pks, new_pks)
-
-                for pk in to_add:
-                    genre_catalog_table.put_item(Item={
-                        "PK": pk,
-                        "SK": f"SONG#{song_id}",
-                        "entityType": "SONG",
-                        "entityId": song_id,
-                        "title": old_title,
-                        "creationDate": creation_date,
-                        "s3KeyCover": new_cover_key,
-                        "s3KeyAudio": new_audio_key,
-                        "genres": genre_names
-                    })
-                for pk in to_remove:
-                    genre_catalog_table.delete_item(Key={"PK": pk, "SK": f"SONG#{song_id}"})
-
-                genre_links = {"added": to_add, "removed": to_remove}
-
-                still_existing = [pk for pk in new_pks if pk not in to_add]
-                for pk in still_existing:
-                    genre_catalog_table.update_item(
-                        Key={"PK": pk, "SK": f"SONG#{song_id}"},
-                        UpdateExpression="SET #c=:c, #a=:a",
-                        ExpressionAttributeNames={"#c": "s3KeyCover", "#a": "s3KeyAudio"},
-                        ExpressionAttributeValues={":c": new_cover_key, ":a": new_audio_key}
-                    )
-            else:
-                for it in existing_items:
-                    genre_catalog_table.update_item(
-                        Key={"PK": it["PK"], "SK": it["SK"]},
-                        UpdateExpression="SET #c=:c, #a=:a",
-                        ExpressionAttributeNames={"#c": "s3KeyCover", "#a": "s3KeyAudio"},
-                        ExpressionAttributeValues={":c": new_cover_key, ":a": new_audio_key}
-                    )
+        # The catalog edges follow through catalog.edge_projector; these report what it will do.
+        genre_links = {"added": [], "removed": []}
+        if genres_changed:
+            old_pks = [f"GENRE#{nm}" for nm in (song.get("genres") or lookup_genre_names(old_genres))]
+            to_add, to_remove = _set_diff(old_pks, [f"GENRE#{nm}" for nm in genre_names])
+            genre_links = {"added": to_add, "removed": to_remove}
 
         artist_links = {"added": [], "removed": []}
-        if artists_changed or cover_changed or audio_changed:
-            existing_artist_items = artist_catalog_table.query(
-                IndexName="BySongIndex",
-                KeyConditionExpression=Key("SK").eq(f"SONG#{song_id}")
-            ).get("Items", [])
-
-            if artists_changed:
-                new_artist_pks = [f"ARTIST#{aid}" for aid in (new_artists or [])]
-                existing_artist_pks = [it["PK"] for it in existing_artist_items]
-
-                to_add_a, to_remove_a = _set_diff(existing_artist_pks, new_artist_pks)
-
-                for pk in to_add_a:
-                    artist_catalog_table.put_item(Item={
-                        "PK": pk,
-                        "SK": f"SONG#{song_id}",
-                        "entityType": "SONG",
-                        "entityId": song_id,
-                        "title": old_title,
-                        "creationDate": creation_date,
-                        "s3KeyCover": new_cover_key,
-                        "s3KeyAudio": new_audio_key,
-                        "genres": genre_names
-                    })
-                for pk in to_remove_a:
-                    artist_catalog_table.delete_item(Key={"PK": pk, "SK": f"SONG#{song_id}"})
-
-                artist_links = {"added": to_add_a, "removed": to_remove_a}
-
-                still_existing_a = [pk for pk in new_artist_pks if pk not in to_add_a]
-                for pk in still_existing_a:
-                    artist_catalog_table.update_item(
-                        Key={"PK": pk, "SK": f"SONG#{song_id}"},
-                        UpdateExpression="SET #c=:c, #a=:a",
-                        ExpressionAttributeNames={"#c": "s3KeyCover", "#a": "s3KeyAudio"},
-                        ExpressionAttributeValues={":c": new_cover_key, ":a": new_audio_key}
-                    )
-            else:
-                for it in existing_artist_items:
-                    artist_catalog_table.update_item(
-                        Key={"PK": it["PK"], "SK": it["SK"]},
-                        UpdateExpression="SET #c=:c, #a=:a",
-                        ExpressionAttributeNames={"#c": "s3KeyCover", "#a": "s3KeyAudio"},
-                        ExpressionAttributeValues={":c": new_cover_key, ":a": new_audio_key}
-                    )
+        if artists_changed:
+            to_add_a, to_remove_a = _set_diff(
+                [f"ARTIST#{aid}" for aid in (old_artists or [])],
+                [f"ARTIST#{aid}" for aid in (new_artists or [])]
+            )
+            artist_links = {"added": to_add_a, "removed": to_remove_a}
 
         if cover_changed and old_cover_key and old_cover_key != new_cover_key:
             _safe_delete_object(BUCKET, old_cover_key)
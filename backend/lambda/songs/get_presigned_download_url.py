@@ -1,5 +1,6 @@
 import os
 import boto3
+from utils.instrumentation import instrumented
 from utils.utils import create_response
 import urllib.parse
 
@@ -8,6 +9,7 @@ songs_table = dynamodb.Table(os.environ["SONGS_TABLE"])
 s3 = boto3.client("s3")
 bucket_name = os.environ["MEDIA_BUCKET"]
 
+@instrumented
 def handler(event, context):
     try:
         path_params = event.get("pathParameters") or {}
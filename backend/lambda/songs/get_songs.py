@@ -1,37 +1,40 @@
 import os
 import boto3
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.genres import genre_names
+from utils.utils import REVALIDATE, create_response, not_modified
+from utils.versions import collection_etag
+from utils import snapshot
+from utils.pagination import PaginationError, parse_page_params, scan_page, wants
 
 dynamodb = boto3.resource("dynamodb")
 songs_table = dynamodb.Table(os.environ["SONGS_TABLE"])
-genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
 s3 = boto3.client("s3")
 bucket_name = os.environ["MEDIA_BUCKET"]
 
-def get_genre_names(genre_ids):
-    if not genre_ids:
-        return []
-    names = []
-    for gid in genre_ids:
-        if not isinstance(gid, str):
-            continue
-        try:
-            res = genres_table.get_item(Key={"id": gid})
-            item = res.get("Item")
-            if item and "name" in item:
-                names.append(item["name"])
-        except Exception as e:
-            print(f"Error fetching genre {gid}: {e}")
-    return names
+COLLECTIONS = ["songs", "genres"]
+KEY_FIELDS = ["id", "title"]
+DERIVED_FIELDS = {"genres": ["genres", "genreIds"], "audioUrl": ["s3KeyAudio"], "imageUrl": ["s3KeyCover"]}
 
+@instrumented
 def handler(event, context):
     try:
-        response = songs_table.scan()
-        songs = response.get("Items", [])
+        page = parse_page_params(event)
+        # Presigned URLs below last an hour, no shorter than the ETag rollover.
+        versions = snapshot.current_versions(COLLECTIONS)
+        etag = collection_etag(event, *COLLECTIONS, versions=versions)
+        if not_modified(event, etag):
+            return create_response(304, None, etag=etag, cache_control=REVALIDATE)
+
+        if snapshot.use_snapshot(page, COLLECTIONS, versions):
+            songs, next_cursor = snapshot.page_items("songs", page, KEY_FIELDS, DERIVED_FIELDS)
+        else:
+            songs, next_cursor = scan_page(songs_table, page, KEY_FIELDS, DERIVED_FIELDS)
 
         for song in songs:
-            genre_ids = song.get("genreIds", [])
-            song["genres"] = get_genre_names(genre_ids)
+            if wants(page, "genres") and "genres" not in song:
+                genre_ids = song.get("genreIds", [])
+                song["genres"] = genre_names(genre_ids)
 
             audio_key = song.get("s3KeyAudio")
             if audio_key:
@@ -47,7 +50,9 @@ def handler(event, context):
                     Params={"Bucket": bucket_name, "Key": cover_key}
                 )
 
-        return create_response(200, {"data": songs})
+        return create_response(200, {"data": songs, "nextCursor": next_cursor}, etag=etag, cache_control=REVALIDATE, event=event)
 
+    except PaginationError as e:
+        return create_response(400, {"message": str(e)})
     except Exception as e:
         return create_response(500, {"message": str(e)})
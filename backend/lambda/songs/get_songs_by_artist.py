@@ -1,6 +1,7 @@
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
 from utils.utils import create_response
 
 dynamodb = boto3.resource("dynamodb")
@@ -8,6 +9,7 @@ artist_catalog_table = dynamodb.Table(os.environ["ARTIST_CATALOG_TABLE"])
 s3 = boto3.client("s3")
 bucket_name = os.environ["MEDIA_BUCKET"]
 
+@instrumented
 def handler(event, context):
     try:
         artist_id = event["pathParameters"].get("artistId")
@@ -33,7 +35,7 @@ def handler(event, context):
                     ExpiresIn=600
                 )
 
-        return create_response(200, {"data": songs})
+        return create_response(200, {"data": songs}, event=event)
 
     except Exception as e:
         return create_response(500, {"message": str(e)})
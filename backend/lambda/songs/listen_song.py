@@ -1,7 +1,9 @@
 import os
 import boto3
 import json
+import uuid
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
 from utils.utils import create_response
 
 dynamodb = boto3.resource("dynamodb")
@@ -10,6 +12,7 @@ songs_table = dynamodb.Table(os.environ["SONGS_TABLE"])
 sns = boto3.client('sns')
 FEED_TOPIC_ARN = os.environ['FEED_TOPIC_ARN']
 
+@instrumented
 def handler(event, context):
     try:
         song_id = str(event["pathParameters"]["songId"]).strip()
@@ -24,8 +27,10 @@ def handler(event, context):
             return create_response(404, {"message": f"Song with id {song_id} not found."})
 
         event_message = {
+            "eventId": str(uuid.uuid4()),
             "eventType": "song_listened",
             "songId": song_id,
+            "title": items[0].get("title"),
             "userId": user_id
         }
 
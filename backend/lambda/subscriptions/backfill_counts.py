@@ -0,0 +1,67 @@
+import os
+import boto3
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from utils.instrumentation import instrumented, instrument_session
+from utils.write_scheduler import WriteScheduler
+
+TABLE_NAME = os.environ["TABLE_NAME"]
+COUNTS_TABLE = os.environ["SUBSCRIBER_COUNTS_TABLE"]
+TOTAL_SEGMENTS = int(os.environ.get("BACKFILL_SEGMENTS", "4"))
+
+counts_table = boto3.resource("dynamodb").Table(COUNTS_TABLE)
+scheduler = WriteScheduler("subscriber_counts")
+
+def _scan_segment(table_name, segment, total_segments, attrs):
+    table = instrument_session(boto3.session.Session()).resource("dynamodb").Table(table_name)
+    q = {
+        "Segment": segment,
+        "TotalSegments": total_segments,
+        "ProjectionExpression": ", ".join(f"#a{i}" for i in range(len(attrs))),
+        "ExpressionAttributeNames": {f"#a{i}": a for i, a in enumerate(attrs)},
+    }
+    items = []
+    while True:
+        resp = table.scan(**q)
+        items.extend(resp.get("Items", []))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return items
+        q["ExclusiveStartKey"] = last_key
+
+def _scan_all(table_name, attrs, total_segments):
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        parts = pool.map(lambda seg: _scan_segment(table_name, seg, total_segments, attrs), range(total_segments))
+        return [it for part in parts for it in part]
+
+@instrumented
+def handler(event, context):
+    """One-shot: recounts SubscriptionsTable per target and overwrites subscriberCount in
+    SubscriberCountsTable (lastPullAt is kept), zeroing targets that have no subscriptions left.
+    Subscriptions changed while it runs may be off by one; run it before enabling
+    FANOUT_PULL_THRESHOLD or when counts are suspected to have drifted."""
+    total_segments = int((event or {}).get("totalSegments", TOTAL_SEGMENTS))
+
+    counts, types = Counter(), {}
+    for it in _scan_all(TABLE_NAME, ["targetId", "targetType"], total_segments):
+        counts[it["targetId"]] += 1
+        if it.get("targetType"):
+            types[it["targetId"]] = it["targetType"]
+    for it in _scan_all(COUNTS_TABLE, ["targetId"], total_segments):
+        counts.setdefault(it["targetId"], 0)
+
+    for target_id, count in counts.items():
+        update_expr, values = "SET subscriberCount = :n", {":n": count}
+        if target_id in types:
+            update_expr += ", targetType = :t"
+            values[":t"] = types[target_id]
+        scheduler.call(
+            counts_table.update_item,
+            Key={"targetId": target_id},
+            UpdateExpression=update_expr,
+            ExpressionAttributeValues=values
+        )
+
+    print(f"backfill_counts: wrote counts for {len(counts)} targets from {sum(counts.values())} subscriptions")
+    scheduler.log_metrics()
+    return {"targets": len(counts), "subscriptions": sum(counts.values())}
@@ -3,17 +3,20 @@ import json
 import uuid
 import boto3
 import datetime
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.utils import create_response, request_body
 
 sns = boto3.client("sns")
 TOPIC_ARN = os.environ.get("TOPIC_ARN")
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
+counts_table = dynamodb.Table(os.environ['SUBSCRIBER_COUNTS_TABLE'])
 
+@instrumented
 def handler(event, context):
     try:
-        body = json.loads(event["body"])
+        body = request_body(event)
 
         user_id = body.get("userId")
         target_id = body.get("targetId")
@@ -24,18 +27,26 @@ def handler(event, context):
             return create_response(400, {"message": "Missing required fields."})
 
         subscription_id = str(uuid.uuid4())
-        table.put_item(Item={
+        previous = table.put_item(ReturnValues="ALL_OLD", Item={
             "userId": user_id,
             "targetId": target_id,
             "targetType": target_type,
             "email": email,
             "subscriptionId": subscription_id,
             "createdAt": datetime.datetime.utcnow().isoformat()
-        })
+        }).get("Attributes")
+
+        if not previous:
+            counts_table.update_item(
+                Key={"targetId": target_id},
+                UpdateExpression="ADD subscriberCount :one SET targetType = :t",
+                ExpressionAttributeValues={":one": 1, ":t": target_type}
+            )
 
         sns.publish(
             TopicArn=TOPIC_ARN,
             Message=json.dumps({
+                "eventId": str(uuid.uuid4()),
                 "eventType": "user_subscribed",
                 "userId": user_id,
                 "targetId": target_id,
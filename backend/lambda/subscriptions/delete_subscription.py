@@ -1,6 +1,9 @@
 import json
 import os
+import uuid
 import boto3
+from botocore.exceptions import ClientError
+from utils.instrumentation import instrumented
 from utils.utils import create_response
 
 sns = boto3.client("sns")
@@ -8,7 +11,9 @@ TOPIC_ARN = os.environ.get("TOPIC_ARN")
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
+counts_table = dynamodb.Table(os.environ['SUBSCRIBER_COUNTS_TABLE'])
 
+@instrumented
 def handler(event, context):
     try:
         subscription_id = event.get("queryStringParameters", {}).get("subscriptionId")
@@ -24,11 +29,27 @@ def handler(event, context):
             return create_response(404, {"message": "Subscription not found."})
 
         item = items[0]
-        table.delete_item(Key={"userId": item["userId"], "targetId": item["targetId"]})
+        deleted = table.delete_item(
+            Key={"userId": item["userId"], "targetId": item["targetId"]},
+            ReturnValues="ALL_OLD"
+        ).get("Attributes")
+        if deleted:
+            try:
+                counts_table.update_item(
+                    Key={"targetId": item["targetId"]},
+                    UpdateExpression="ADD subscriberCount :minus",
+                    ConditionExpression="subscriberCount > :zero",
+                    ExpressionAttributeValues={":minus": -1, ":zero": 0}
+                )
+            except ClientError as e:
+                # Subscriptions that predate the counts table were never counted.
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
 
         sns.publish(
             TopicArn=TOPIC_ARN,
             Message=json.dumps({
+                "eventId": str(uuid.uuid4()),
                 "eventType": "user_unsubscribed",
                 "userId": item["userId"],
                 "targetId": item["targetId"],
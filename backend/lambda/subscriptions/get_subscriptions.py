@@ -1,14 +1,16 @@
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
+from utils.genres import genre_name
 from utils.utils import create_response
 
 dynamodb = boto3.resource('dynamodb')
 
 subscriptions_table = dynamodb.Table(os.environ['SUBSCRIPTIONS_TABLE'])
 artists_table = dynamodb.Table(os.environ['ARTISTS_TABLE'])
-genres_table = dynamodb.Table(os.environ['GENRES_TABLE'])
 
+@instrumented
 def handler(event, context):
     try:
         params = event.get("queryStringParameters") or {}
@@ -38,14 +40,7 @@ def handler(event, context):
                     target_name = artists[0].get("name")
 
             elif target_type.lower() == "genre":
-                genre_resp = genres_table.query(
-                    IndexName="GenreIdIndex",
-                    KeyConditionExpression=Key("id").eq(target_id),
-                    Limit=1
-                )
-                genres = genre_resp.get("Items", [])
-                if genres:
-                    target_name = genres[0].get("name")
+                target_name = genre_name(target_id)
 
             if not target_name:
                 target_name = f"Unknown {target_type}"
@@ -2,12 +2,14 @@ import json
 import os
 import boto3
 from boto3.dynamodb.conditions import Key
+from utils.instrumentation import instrumented
 
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table(os.environ['TABLE_NAME'])
 ses = boto3.client('ses')
 SOURCE_EMAIL = os.environ['SOURCE_EMAIL']
 
+@instrumented
 def handler(event, context):
     try:
         for record in event['Records']:
@@ -1,21 +1,27 @@
 import os
 import boto3
-from utils.utils import create_response
+from utils.instrumentation import instrumented
+from utils.utils import REVALIDATE, create_response, not_modified
+from utils.versions import collection_etag
 
 dynamodb = boto3.resource('dynamodb')
 transcriptions_table = dynamodb.Table(os.environ['TRANSCRIPTIONS_TABLE'])
 
+@instrumented
 def handler(event, context):
     try:
         song_id = event['pathParameters']['song_id']
+        etag = collection_etag(event, f"lyrics:{song_id}")
+        if not_modified(event, etag):
+            return create_response(304, None, etag=etag, cache_control=REVALIDATE)
 
         response = transcriptions_table.get_item(Key={'song_id': song_id})
         item = response.get('Item')
 
         if not item:
-            return create_response(200, {"lyrics": None})
+            return create_response(200, {"lyrics": None}, etag=etag, cache_control=REVALIDATE)
 
-        return create_response(200, {"lyrics": item.get('lyrics', None)})
+        return create_response(200, {"lyrics": item.get('lyrics', None)}, etag=etag, cache_control=REVALIDATE)
 
     except Exception as e:
         return create_response(500, {"error": str(e)})
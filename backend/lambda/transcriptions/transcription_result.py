@@ -1,13 +1,16 @@
 import json
 import os
 import boto3
+from utils.instrumentation import instrumented
 from utils.utils import create_response
+from utils.versions import bump
 
 s3 = boto3.client('s3')
 dynamodb = boto3.resource('dynamodb')
 
 transcriptions_table = dynamodb.Table(os.environ['TRANSCRIPTIONS_TABLE'])
 
+@instrumented
 def handler(event, context):
     try:
         for record in event['Records']:
@@ -27,6 +30,7 @@ def handler(event, context):
                     'lyrics': transcript
                 }
             )
+            bump(f"lyrics:{song_id}")
 
         return create_response(200, {"message": "Lyrics saved to transcriptions table."})
 
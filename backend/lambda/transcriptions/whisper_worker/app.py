@@ -4,6 +4,8 @@ import boto3
 import tempfile
 import whisper
 import time
+from utils.instrumentation import instrumented
+from utils import idempotency
 
 s3 = boto3.client('s3')
 
@@ -12,14 +14,27 @@ os.makedirs(WHISPER_MODEL_DIR, exist_ok=True)
 model = whisper.load_model("tiny.en", download_root=WHISPER_MODEL_DIR)
 
 
+@instrumented
 def handler(event, context):
+    failed_message_ids = []
+
     for record in event['Records']:
+        dedupe_key = None
         try:
             body = json.loads(record['body'])
             song_id = body['song_id']
             s3_audio_key = body['s3_audio_key']
             bucket = body['bucket']
 
+            dedupe_key = f"transcription#{song_id}#{s3_audio_key}"
+            state = idempotency.claim(dedupe_key)
+            if state == idempotency.COMPLETED:
+                print(f"Skipping already transcribed song {song_id}")
+                continue
+            if state == idempotency.IN_PROGRESS:
+                failed_message_ids.append(record['messageId'])
+                continue
+
             local_audio_path = os.path.join(tempfile.gettempdir(), os.path.basename(s3_audio_key))
 
             s3.download_file(bucket, s3_audio_key, local_audio_path)
@@ -50,10 +65,15 @@ def handler(event, context):
                 ContentType="application/json"
             )
 
+            idempotency.complete([dedupe_key])
+
         except Exception as e:
-            raise e
+            print(f"Transcription failed for message {record.get('messageId')}: {e}")
+            failed_message_ids.append(record['messageId'])
+            if dedupe_key:
+                try:
+                    idempotency.release([dedupe_key])
+                except Exception as release_error:
+                    print("Error releasing claim:", release_error)
 
-    return {
-        "statusCode": 200,
-        "body": json.dumps({"message": "Transcription worker finished."})
-    }
+    return {"batchItemFailures": [{"itemIdentifier": mid} for mid in failed_message_ids]}
@@ -0,0 +1,55 @@
+import os
+import time
+import threading
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
+
+TTL_SECONDS = int(os.environ.get("ARTIST_CACHE_TTL_SECONDS", "300"))
+MAX_LOOKUPS = 8
+
+dynamodb = boto3.resource("dynamodb")
+artists_table = dynamodb.Table(os.environ["ARTISTS_TABLE"])
+
+_lock = threading.Lock()
+_names_by_id = {}
+
+def _load(artist_id):
+    resp = artists_table.query(
+        IndexName="ArtistIdIndex",
+        KeyConditionExpression=Key("id").eq(artist_id),
+        ProjectionExpression="id, #n",
+        ExpressionAttributeNames={"#n": "name"},
+        Limit=1
+    )
+    items = resp.get("Items", [])
+    return items[0].get("name") if items else None
+
+def artist_name_map(artist_ids):
+    """{id: name} for the known ids among `artist_ids`. Each id is looked up through
+    ArtistIdIndex once and kept for ARTIST_CACHE_TTL_SECONDS; ids not cached are looked up
+    in parallel."""
+    now = time.time()
+    ids = list(dict.fromkeys(aid for aid in artist_ids or [] if isinstance(aid, str)))
+    with _lock:
+        cached = {aid: _names_by_id.get(aid) for aid in ids}
+    names = {aid: c[0] for aid, c in cached.items() if c is not None and now - c[1] < TTL_SECONDS}
+    missing = [aid for aid in ids if aid not in names]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), MAX_LOOKUPS)) as pool:
+            loaded = dict(zip(missing, pool.map(_load, missing)))
+        with _lock:
+            for aid, name in loaded.items():
+                if name is not None:
+                    _names_by_id[aid] = (name, now)
+                    names[aid] = name
+    return names
+
+def artist_names(artist_ids):
+    """Names for the given artist ids, in order, skipping unknown ids."""
+    names = artist_name_map(artist_ids)
+    return [names[aid] for aid in artist_ids or [] if isinstance(aid, str) and aid in names]
+
+def remember(artist_id, name):
+    with _lock:
+        _names_by_id[artist_id] = (name, time.time())
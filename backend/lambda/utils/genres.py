@@ -0,0 +1,79 @@
+import os
+import time
+import uuid
+import threading
+import boto3
+from utils.write_scheduler import WriteScheduler
+
+TTL_SECONDS = int(os.environ.get("GENRE_CACHE_TTL_SECONDS", "300"))
+MISS_REFRESH_SECONDS = 5
+
+dynamodb = boto3.resource("dynamodb")
+genres_table = dynamodb.Table(os.environ["GENRES_TABLE"])
+scheduler = WriteScheduler("genres")
+
+_lock = threading.Lock()
+_names_by_id = {}
+_loaded_at = 0.0
+
+def _scan_all():
+    q = {"ProjectionExpression": "id, #n", "ExpressionAttributeNames": {"#n": "name"}}
+    names = {}
+    while True:
+        resp = genres_table.scan(**q)
+        for it in resp.get("Items", []):
+            if it.get("id") and it.get("name"):
+                names[it["id"]] = it["name"]
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key:
+            return names
+        q["ExclusiveStartKey"] = last_key
+
+def _cache(refresh_older_than=TTL_SECONDS):
+    global _names_by_id, _loaded_at
+    with _lock:
+        if time.time() - _loaded_at >= refresh_older_than:
+            _names_by_id = _scan_all()
+            _loaded_at = time.time()
+        return _names_by_id
+
+def genre_names(genre_ids):
+    """Names for the given genre ids, in order, skipping unknown ids. Served from a
+    process-wide copy of GenresTable that is reloaded every GENRE_CACHE_TTL_SECONDS,
+    or sooner when an id is missing (a genre created since the last load)."""
+    ids = [gid for gid in genre_ids or [] if isinstance(gid, str)]
+    names = _cache()
+    if any(gid not in names for gid in ids):
+        names = _cache(refresh_older_than=MISS_REFRESH_SECONDS)
+    return [names[gid] for gid in ids if gid in names]
+
+def genre_name(genre_id):
+    names = genre_names([genre_id])
+    return names[0] if names else None
+
+def genre_ids_by_name():
+    return {name: gid for gid, name in _cache().items()}
+
+def remember(genre_id, name):
+    """Records a genre this process just created so lookups don't wait for a reload."""
+    with _lock:
+        _names_by_id[genre_id] = name
+
+def resolve_genres(names):
+    """[{"id", "name"}] for the given genre names, in order and without repeats, plus the ones
+    that had to be created. Existing names come from the process-wide cache, reloaded once if a
+    name is missing; new genres are written in batches through the write scheduler."""
+    wanted = list(dict.fromkeys(n for n in names or [] if isinstance(n, str) and n))
+    by_name = genre_ids_by_name()
+    if any(n not in by_name for n in wanted):
+        by_name = {name: gid for gid, name in _cache(refresh_older_than=MISS_REFRESH_SECONDS).items()}
+
+    created = [{"id": str(uuid.uuid4()), "name": n} for n in wanted if n not in by_name]
+    if created:
+        for g in created:
+            scheduler.put(genres_table.name, g)
+        scheduler.flush()
+        for g in created:
+            remember(g["id"], g["name"])
+            by_name[g["name"]] = g["id"]
+    return [{"id": by_name[n], "name": n} for n in wanted], created
@@ -0,0 +1,56 @@
+import os
+import time
+import boto3
+from botocore.exceptions import ClientError
+
+dynamodb = boto3.resource("dynamodb")
+idempotency_table = dynamodb.Table(os.environ["IDEMPOTENCY_TABLE"])
+
+TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", str(7 * 24 * 3600)))
+LEASE_SECONDS = int(os.environ.get("IDEMPOTENCY_LEASE_SECONDS", "900"))
+
+CLAIMED = "CLAIMED"
+COMPLETED = "COMPLETED"
+IN_PROGRESS = "IN_PROGRESS"
+
+def claim(key):
+    now = int(time.time())
+    try:
+        idempotency_table.put_item(
+            Item={
+                "dedupeKey": key,
+                "status": IN_PROGRESS,
+                "leaseUntil": now + LEASE_SECONDS,
+                "expiresAt": now + TTL_SECONDS,
+            },
+            ConditionExpression="attribute_not_exists(dedupeKey) OR (#s = :p AND leaseUntil < :now)",
+            ExpressionAttributeNames={"#s": "status"},
+            ExpressionAttributeValues={":p": IN_PROGRESS, ":now": now}
+        )
+        return CLAIMED
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+    item = idempotency_table.get_item(Key={"dedupeKey": key}, ConsistentRead=True).get("Item") or {}
+    return COMPLETED if item.get("status") == COMPLETED else IN_PROGRESS
+
+def complete(keys):
+    expires_at = int(time.time()) + TTL_SECONDS
+    # Plain puts: this module also ships in the transcription worker image, which only
+    # copies the modules it imports.
+    for key in dict.fromkeys(keys):
+        idempotency_table.put_item(Item={"dedupeKey": key, "status": COMPLETED, "expiresAt": expires_at})
+
+def release(keys):
+    for key in keys:
+        try:
+            idempotency_table.delete_item(
+                Key={"dedupeKey": key},
+                ConditionExpression="#s = :p",
+                ExpressionAttributeNames={"#s": "status"},
+                ExpressionAttributeValues={":p": IN_PROGRESS}
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import functools
+import threading
+import boto3
+
+# Clients copy their session's event hooks when they are created, so this module has to be
+# imported before any module-level boto3.client()/resource() call of the handler module.
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "MusicApp/Lambda")
+
+_lock = threading.Lock()
+_calls = {}
+_cold_start = True
+
+def _operation_key(event_name, context):
+    _, service, operation = event_name.split(".", 2)
+    return service, operation, context.get("instrumentation_table") or "-"
+
+def _tables(params):
+    if params.get("TableName"):
+        return params["TableName"]
+    names = list(params.get("RequestItems") or {})
+    for op in params.get("TransactItems") or []:
+        names.extend(v.get("TableName") for v in op.values() if isinstance(v, dict))
+    return ",".join(sorted(set(n for n in names if n))) or None
+
+def _capacity_units(parsed):
+    consumed = parsed.get("ConsumedCapacity")
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(float(c.get("CapacityUnits", 0)) for c in consumed or [])
+
+def _on_provide_params(params, model, context=None, **kwargs):
+    if "ReturnConsumedCapacity" in model.input_shape.members and "ReturnConsumedCapacity" not in params:
+        params["ReturnConsumedCapacity"] = "TOTAL"
+    if context is not None:
+        context["instrumentation_table"] = _tables(params)
+
+def _on_before_call(context, **kwargs):
+    context["instrumentation_start"] = time.perf_counter()
+
+def _record(event_name, context, parsed=None, error=False):
+    started = context.get("instrumentation_start")
+    latency_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+    key = _operation_key(event_name, context)
+    with _lock:
+        stats = _calls.setdefault(key, {"Calls": 0, "Errors": 0, "LatencyMs": 0.0, "ConsumedCapacityUnits": 0.0})
+        stats["Calls"] += 1
+        stats["Errors"] += int(error)
+        stats["LatencyMs"] += latency_ms
+        stats["ConsumedCapacityUnits"] += _capacity_units(parsed or {})
+
+def _on_after_call(event_name, parsed, context, http_response=None, **kwargs):
+    # Service errors (throttling, conditional check failures, ...) arrive here as parsed error
+    # responses; after-call-error only fires for connection-level failures.
+    status = getattr(http_response, "status_code", 200)
+    _record(event_name, context, parsed, error=status >= 300 or "Error" in (parsed or {}))
+
+def _on_after_call_error(event_name, context, **kwargs):
+    _record(event_name, context, error=True)
+
+def instrument_session(session):
+    """Registers the call hooks on a boto3 (or botocore) session; returns the session."""
+    events = session.events if hasattr(session, "events") else session.get_component("event_emitter")
+    events.register("provide-client-params.dynamodb.*", _on_provide_params, unique_id="instrumentation-params")
+    events.register("before-call.*.*", _on_before_call, unique_id="instrumentation-before")
+    events.register("after-call.*.*", _on_after_call, unique_id="instrumentation-after")
+    events.register("after-call-error.*.*", _on_after_call_error, unique_id="instrumentation-error")
+    return session
+
+def _instrument_default_session():
+    # Registration is idempotent (unique ids); called again per invocation in case the default
+    # session was replaced after import, as test mocks do.
+    if boto3.DEFAULT_SESSION is None:
+        boto3.setup_default_session()
+    instrument_session(boto3.DEFAULT_SESSION)
+
+_instrument_default_session()
+
+def snapshot():
+    with _lock:
+        return {key: dict(stats) for key, stats in _calls.items()}
+
+def reset():
+    with _lock:
+        _calls.clear()
+
+def _emf(dimensions, metrics, units):
+    return {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [list(dimensions)],
+                "Metrics": [{"Name": name, "Unit": units.get(name, "Count")} for name in metrics],
+            }],
+        },
+        **dimensions,
+        **metrics,
+    }
+
+def emit(function_name, duration_ms, cold_start):
+    calls = snapshot()
+    lines = [_emf(
+        {"Function": function_name},
+        {
+            "Invocations": 1,
+            "ColdStart": int(cold_start),
+            "DurationMs": round(duration_ms, 2),
+            "AwsCalls": sum(s["Calls"] for s in calls.values()),
+            "ConsumedCapacityUnits": sum(s["ConsumedCapacityUnits"] for s in calls.values()),
+        },
+        {"DurationMs": "Milliseconds"},
+    )]
+    for (service, operation, table), stats in sorted(calls.items()):
+        stats["LatencyMs"] = round(stats["LatencyMs"], 2)
+        lines.append(_emf(
+            {"Function": function_name, "Service": service, "Operation": operation, "Table": table},
+            stats,
+            {"LatencyMs": "Milliseconds"},
+        ))
+    for line in lines:
+        print(json.dumps(line))
+    return lines
+
+def instrumented(handler):
+    """Wraps a Lambda handler so every invocation emits its AWS call metrics as EMF log lines."""
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start
+        cold_start, _cold_start = _cold_start, False
+        function_name = getattr(context, "function_name", None) or f"{handler.__module__}.{handler.__name__}"
+        _instrument_default_session()
+        reset()
+        start = time.perf_counter()
+        try:
+            return handler(event, context)
+        finally:
+            try:
+                emit(function_name, (time.perf_counter() - start) * 1000, cold_start)
+            except Exception as e:
+                print("instrumentation error:", e)
+    return wrapper
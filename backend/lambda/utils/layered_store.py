@@ -0,0 +1,86 @@
+"""Base + delta objects in S3, shared by search.build_index and catalog.build_snapshot.
+
+A builder keeps one fingerprint per item next to its objects. Each run diffs the current items
+against them and publishes either a delta object with the changes on top of the current base, or a
+fresh base. Objects are uploaded before the pointer that lists them, and the fingerprints after it,
+so a failed run re-sends the same changes. Objects replaced by a base are deleted one base later:
+readers that have caught up no longer reference them, and readers mid-refresh still can.
+"""
+import json
+import time
+import gzip
+import hashlib
+import boto3
+
+s3 = boto3.client("s3")
+
+def fingerprint(item):
+    return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def diff(fingerprints, previous):
+    """(changed keys, deleted keys) of `fingerprints` against the `previous` ones."""
+    changed = [key for key, fp in fingerprints.items() if previous.get(key) != fp]
+    deleted = [key for key in previous if key not in fingerprints]
+    return changed, deleted
+
+class LayeredStore:
+    """Objects under `prefix` in `bucket`: base-<ms><suffix>, delta-<ms><suffix> and the
+    fingerprints of the last published items. A delta is written unless there is no pointer yet,
+    a full build is asked for, `max_deltas` are stacked, or the change exceeds `delta_max_fraction`
+    of the items."""
+
+    def __init__(self, bucket, prefix, suffix, max_deltas, delta_max_fraction):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.suffix = suffix
+        self.max_deltas = max_deltas
+        self.delta_max_fraction = delta_max_fraction
+        self.fingerprints_key = prefix + "fingerprints.json.gz"
+
+    def get(self, key, compressed=False):
+        """Parsed JSON object at `key`, or None when it does not exist."""
+        try:
+            body = s3.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except s3.exceptions.NoSuchKey:
+            return None
+        return json.loads(gzip.decompress(body) if compressed else body)
+
+    def put(self, key, body, content_type="application/octet-stream"):
+        s3.put_object(Bucket=self.bucket, Key=key, Body=body, ContentType=content_type)
+
+    def previous_fingerprints(self, pointer):
+        return (self.get(self.fingerprints_key, compressed=True) or {}) if pointer else {}
+
+    def publish(self, pointer, fingerprints, change_count, item_count, write_base, write_delta,
+                save_pointer, full=False, **fields):
+        """Writes the next layer on top of `pointer` (None before the first build) and saves the
+        new pointer through `save_pointer`. `write_base(key)`/`write_delta(key)` upload the
+        object; `fields` are stored on the pointer. Returns (pointer, object key or None when
+        nothing changed)."""
+        stamp = f"{int(time.time() * 1000):013d}"
+        if pointer and not full and not change_count:
+            key = None
+            new_pointer = dict(pointer)
+        elif (not pointer or full
+              or len(pointer["deltas"]) >= self.max_deltas
+              or change_count > self.delta_max_fraction * max(int(pointer.get("itemCount", 0)), 1)):
+            key = f"{self.prefix}base-{stamp}{self.suffix}"
+            write_base(key)
+            for old_key in (pointer or {}).get("retired", []):
+                s3.delete_object(Bucket=self.bucket, Key=old_key)
+            new_pointer = {
+                "version": int((pointer or {}).get("version", 0)) + 1,
+                "base": key,
+                "deltas": [],
+                "retired": [pointer["base"]] + list(pointer["deltas"]) if pointer else [],
+            }
+        else:
+            key = f"{self.prefix}delta-{stamp}{self.suffix}"
+            write_delta(key)
+            new_pointer = dict(pointer, version=int(pointer["version"]) + 1, deltas=list(pointer["deltas"]) + [key])
+
+        new_pointer.update(fields, itemCount=item_count, builtAt=stamp)
+        save_pointer(new_pointer)
+        if key:
+            self.put(self.fingerprints_key, gzip.compress(json.dumps(fingerprints).encode()), "application/gzip")
+        return new_pointer, key
@@ -0,0 +1,33 @@
+import json
+import boto3
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_SIZE = 10
+MAX_ATTEMPTS = 3
+
+sns = boto3.client("sns")
+_pool = ThreadPoolExecutor(max_workers=4)
+
+def _publish_batch(topic_arn, messages):
+    pending = {str(i): m for i, m in enumerate(messages)}
+    for _ in range(MAX_ATTEMPTS):
+        resp = sns.publish_batch(
+            TopicArn=topic_arn,
+            PublishBatchRequestEntries=[{"Id": i, "Message": json.dumps(m)} for i, m in pending.items()]
+        )
+        failed = resp.get("Failed", [])
+        rejected = [f for f in failed if f.get("SenderFault")]
+        if rejected:
+            raise RuntimeError(f"SNS rejected {len(rejected)} messages: {rejected[0].get('Message')}")
+        pending = {f["Id"]: pending[f["Id"]] for f in failed}
+        if not pending:
+            return
+    raise RuntimeError(f"{len(pending)} messages to {topic_arn} still failing after {MAX_ATTEMPTS} attempts")
+
+def publish_all(topic_arn, messages):
+    """Publishes each message (sent as JSON) through PublishBatch, BATCH_SIZE per request with
+    the requests made in parallel. Entries SNS fails on its side are retried; anything still
+    failing, or rejected as malformed, raises."""
+    batches = [messages[i:i + BATCH_SIZE] for i in range(0, len(messages), BATCH_SIZE)]
+    for f in [_pool.submit(_publish_batch, topic_arn, batch) for batch in batches]:
+        f.result()
@@ -0,0 +1,85 @@
+import re
+import json
+import base64
+
+MAX_LIMIT = 100
+FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+class PaginationError(ValueError):
+    pass
+
+def encode_cursor(last_key):
+    return base64.urlsafe_b64encode(json.dumps(last_key, default=str).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise PaginationError("Invalid cursor.")
+    if not isinstance(last_key, dict):
+        raise PaginationError("Invalid cursor.")
+    return last_key
+
+def parse_page_params(event, max_limit=MAX_LIMIT):
+    """Reads `limit`, `cursor` and `fields` from the query string. Without `limit` the whole
+    table is returned, as before pagination existed."""
+    params = event.get("queryStringParameters") or {}
+
+    limit = None
+    if params.get("limit"):
+        try:
+            limit = int(params["limit"])
+        except ValueError:
+            raise PaginationError("limit must be an integer.")
+        if not 1 <= limit <= max_limit:
+            raise PaginationError(f"limit must be between 1 and {max_limit}.")
+
+    fields = None
+    if params.get("fields"):
+        fields = [f.strip() for f in params["fields"].split(",") if f.strip()]
+        bad = [f for f in fields if not FIELD_PATTERN.match(f)]
+        if bad:
+            raise PaginationError(f"Invalid fields: {', '.join(bad)}")
+
+    start_key = decode_cursor(params["cursor"]) if params.get("cursor") else None
+    return {"limit": limit, "startKey": start_key, "fields": fields}
+
+def projected_attrs(fields, key_fields, derived_fields=None):
+    """Stored attributes needed for the requested fields plus the table keys. `derived_fields`
+    maps response-only fields (e.g. "genres") to the stored attributes they are built from."""
+    derived_fields = derived_fields or {}
+    attrs = set(key_fields)
+    for f in fields:
+        attrs.update(derived_fields.get(f, [f]))
+    return attrs
+
+def projection(fields, key_fields, derived_fields=None):
+    """ProjectionExpression for projected_attrs."""
+    attrs = projected_attrs(fields, key_fields, derived_fields)
+    names = {f"#p{i}": attr for i, attr in enumerate(sorted(attrs))}
+    return ", ".join(names), names
+
+def scan_page(table, page, key_fields, derived_fields=None):
+    """Returns (items, next_cursor) for one page, or every item when no limit was given."""
+    q = {}
+    if page["fields"]:
+        q["ProjectionExpression"], q["ExpressionAttributeNames"] = projection(page["fields"], key_fields, derived_fields)
+    if page["startKey"]:
+        q["ExclusiveStartKey"] = page["startKey"]
+
+    limit = page["limit"]
+    items = []
+    while True:
+        if limit:
+            q["Limit"] = limit - len(items)
+        resp = table.scan(**q)
+        items.extend(resp.get("Items", []))
+        last_key = resp.get("LastEvaluatedKey")
+        if not last_key or (limit and len(items) >= limit):
+            break
+        q["ExclusiveStartKey"] = last_key
+
+    return items, encode_cursor(last_key) if limit and last_key else None
+
+def wants(page, field):
+    return not page["fields"] or field in page["fields"]
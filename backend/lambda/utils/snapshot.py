@@ -0,0 +1,141 @@
+"""In-memory catalog snapshot for the read Lambdas.
+
+catalog.build_snapshot writes a gzip-compressed JSON base of the catalog tables to S3 and, for
+small changes, delta objects on top of it. The pointer item SNAPSHOT_ITEM in
+CollectionVersionsTable names the base and deltas together with the collection versions the
+data was read at. Readers fetch that item in the same request as the version counters they
+already read for ETags, download only deltas they haven't applied, and serve from memory only
+while the snapshot's versions match the live counters; otherwise they read DynamoDB as before.
+"""
+import os
+import gzip
+import json
+import bisect
+import boto3
+from utils.utils import dumps
+from utils.versions import version_items
+from utils.pagination import PaginationError, encode_cursor, projected_attrs
+
+BUCKET = os.environ.get("SNAPSHOT_BUCKET")
+SNAPSHOT_ITEM = "catalog-snapshot"
+# Marks cursors issued from the snapshot, whose order differs from a DynamoDB scan.
+CURSOR_MARK = "_s"
+# Table keys; items are ordered by them when served from memory.
+KEYS = {
+    "songs": ("id", "title"),
+    "albums": ("id", "title"),
+    "artists": ("id", "name"),
+    "genres": ("id", "name"),
+    "genre_catalog": ("PK", "SK"),
+}
+
+s3 = boto3.client("s3")
+
+_state = {"base": None, "deltas": [], "data": None, "sourceVersions": {}, "sorted": {}, "by_pk": {}}
+
+def item_key(collection, item):
+    return "|".join(str(item[k]) for k in KEYS[collection])
+
+def encode(payload):
+    return gzip.compress(dumps(payload), compresslevel=6)
+
+def decode(body):
+    return json.loads(gzip.decompress(body))
+
+def _fetch(key):
+    return decode(s3.get_object(Bucket=BUCKET, Key=key)["Body"].read())
+
+def apply_delta(data, delta):
+    for collection, keys in delta.get("deletes", {}).items():
+        for key in keys:
+            data.get(collection, {}).pop(key, None)
+    for collection, items in delta.get("collections", {}).items():
+        data.setdefault(collection, {}).update(items)
+
+def _sync(pointer):
+    """Brings the container's copy up to the snapshot `pointer` names. Every object is
+    downloaded before any is applied, so a failed download leaves the old copy intact."""
+    if not BUCKET or not pointer:
+        return
+    deltas = list(pointer.get("deltas", []))
+    source_versions = {c: int(v) for c, v in (pointer.get("sourceVersions") or {}).items()}
+    same_base = pointer["base"] == _state["base"] and deltas[:len(_state["deltas"])] == _state["deltas"]
+    if same_base and len(deltas) == len(_state["deltas"]):
+        # The builder re-stamps versions without writing objects when a bump changed no data.
+        _state["sourceVersions"] = source_versions
+        return
+
+    if same_base:
+        new = [_fetch(key) for key in deltas[len(_state["deltas"]):]]
+        data = {c: dict(items) for c, items in _state["data"].items()}
+    else:
+        base = _fetch(pointer["base"])
+        new = [_fetch(key) for key in deltas]
+        data = base["collections"]
+    for delta in new:
+        apply_delta(data, delta)
+    _state.update(base=pointer["base"], deltas=deltas, data=data, sourceVersions=source_versions,
+                  sorted={}, by_pk={})
+
+def current_versions(collections):
+    """Version counters of `collections`, as utils.versions.current_versions; the snapshot
+    pointer is read in the same request and picked up when it moved."""
+    items = version_items(list(collections) + [SNAPSHOT_ITEM])
+    try:
+        _sync(items.get(SNAPSHOT_ITEM))
+    except Exception as e:
+        print(f"Catalog snapshot refresh failed, keeping {_state['base']}: {e}")
+    return {c: int(it.get("version", 0)) for c, it in items.items() if c != SNAPSHOT_ITEM}
+
+def fresh(collections, versions):
+    """True when the loaded snapshot reflects every write counted in `versions`."""
+    if _state["data"] is None:
+        return False
+    return all(_state["sourceVersions"].get(c, 0) == versions.get(c, 0) for c in collections)
+
+def use_snapshot(page, collections, versions):
+    """Whether to serve `page` from memory. A traversal stays on the source its first page came
+    from. A snapshot cursor says nothing about a DynamoDB scan position, so once the snapshot
+    can't serve it the client has to start over (PaginationError, a 400)."""
+    start = page["startKey"]
+    if start and CURSOR_MARK in start:
+        if fresh(collections, versions):
+            return True
+        raise PaginationError("Cursor expired; request the first page again.")
+    return not start and fresh(collections, versions)
+
+def _sorted(collection):
+    if collection not in _state["sorted"]:
+        rows = sorted(_state["data"].get(collection, {}).items())
+        _state["sorted"][collection] = ([k for k, _ in rows], [item for _, item in rows])
+    return _state["sorted"][collection]
+
+def items(collection):
+    """Copies of every item of `collection`, in key order."""
+    return [dict(it) for it in _sorted(collection)[1]]
+
+def page_items(collection, page, key_fields, derived_fields=None):
+    """(items, next_cursor) for one page read from memory, mirroring pagination.scan_page."""
+    keys, rows = _sorted(collection)
+    start = 0
+    if page["startKey"]:
+        start = bisect.bisect_right(keys, item_key(collection, page["startKey"]))
+    end = len(rows) if not page["limit"] else min(start + page["limit"], len(rows))
+
+    attrs = projected_attrs(page["fields"], key_fields, derived_fields) if page["fields"] else None
+    result = [{k: v for k, v in it.items() if k in attrs} if attrs else dict(it) for it in rows[start:end]]
+
+    next_cursor = None
+    if page["limit"] and end < len(rows):
+        last = rows[end - 1]
+        next_cursor = encode_cursor(dict({k: last[k] for k in key_fields}, **{CURSOR_MARK: 1}))
+    return result, next_cursor
+
+def partition(collection, pk):
+    """Copies of the items of a PK/SK collection under `pk`, in SK order, like a Query."""
+    if collection not in _state["by_pk"]:
+        groups = {}
+        for it in _sorted(collection)[1]:
+            groups.setdefault(it["PK"], []).append(it)
+        _state["by_pk"][collection] = groups
+    return [dict(it) for it in _state["by_pk"][collection].get(pk, [])]
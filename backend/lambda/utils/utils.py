@@ -1,13 +1,116 @@
+import os
 import json
+import gzip
+import zlib
+import base64
+from decimal import Decimal
 
-def create_response(status, body):
-    return { 
-        'statusCode': status, 
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Methods': 'OPTIONS,GET,POST,PUT,DELETE',
-            'Access-Control-Allow-Headers': 'Content-Type,Authorization',
-        },
-        'body': json.dumps(body, default=str)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+REVALIDATE = "no-cache"
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", "3"))
+ENCODINGS = ("gzip", "deflate")
+
+def _default(obj):
+    # Only reached for values the encoder can't handle natively: Decimals from DynamoDB become
+    # numbers instead of strings, string/number sets become lists.
+    if isinstance(obj, Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+def dumps(body):
+    if orjson is not None:
+        return orjson.dumps(body, default=_default)
+    return json.dumps(body, default=_default, separators=(",", ":")).encode()
+
+def _header(event, name):
+    for k, v in ((event or {}).get("headers") or {}).items():
+        if k.lower() == name:
+            return v
+    return None
+
+def accepted_encoding(event):
+    """First of ENCODINGS the request's Accept-Encoding allows (q > 0), or None."""
+    header = _header(event, "accept-encoding")
+    if not header:
+        return None
+    allowed = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        allowed[name.strip().lower()] = q
+    for encoding in ENCODINGS:
+        if allowed.get(encoding, allowed.get("*", 0)) > 0:
+            return encoding
+    return None
+
+def _compress(data, encoding):
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+    return zlib.compress(data, COMPRESS_LEVEL)
+
+def create_response(status, body, etag=None, cache_control=None, event=None):
+    """API Gateway proxy response. Pass the request `event` to let large bodies be compressed
+    when its Accept-Encoding allows; they are then returned base64-encoded."""
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'OPTIONS,GET,POST,PUT,DELETE',
+        'Access-Control-Allow-Headers': 'Content-Type,Authorization,If-None-Match',
+        'Access-Control-Expose-Headers': 'ETag',
     }
+    if cache_control:
+        headers['Cache-Control'] = cache_control
+    if status == 304:
+        if etag:
+            headers['ETag'] = etag
+        return {'statusCode': status, 'headers': headers, 'body': ''}
+
+    data = dumps(body)
+    encoding = accepted_encoding(event) if event is not None and len(data) >= COMPRESS_MIN_BYTES else None
+    if event is not None:
+        headers['Vary'] = 'Accept-Encoding'
+    if encoding:
+        headers['Content-Encoding'] = encoding
+        if etag:
+            # A strong ETag names one representation, so the compressed one gets its own.
+            etag = f'{etag[:-1]}-{encoding}"'
+    if etag:
+        headers['ETag'] = etag
+
+    if encoding:
+        return {
+            'statusCode': status,
+            'headers': headers,
+            'body': base64.b64encode(_compress(data, encoding)).decode(),
+            'isBase64Encoded': True
+        }
+    return {'statusCode': status, 'headers': headers, 'body': data.decode()}
+
+def not_modified(event, etag):
+    """True when the request's If-None-Match already names `etag`, in any of its encodings."""
+    header = _header(event, "if-none-match")
+    if not etag or not header:
+        return False
+    variants = {etag} | {f'{etag[:-1]}-{e}"' for e in ENCODINGS}
+    tags = {t.strip()[2:] if t.strip().startswith("W/") else t.strip() for t in header.split(",")}
+    return "*" in tags or bool(tags & variants)
+
+def request_body(event):
+    """The request's JSON body as a dict, decoding it first when API Gateway passed it
+    base64-encoded (it does for every content type once binary media types are enabled)."""
+    raw = event.get("body") or "{}"
+    if event.get("isBase64Encoded"):
+        raw = base64.b64decode(raw)
+    return json.loads(raw)
@@ -0,0 +1,64 @@
+import os
+import json
+import time
+import random
+import hashlib
+import boto3
+
+MAX_AGE_SECONDS = int(os.environ.get("ETAG_MAX_AGE_SECONDS", "3600"))
+MAX_RETRIES = 5
+
+dynamodb = boto3.resource("dynamodb")
+versions_table = dynamodb.Table(os.environ["VERSIONS_TABLE"])
+
+def bump(*collections):
+    """Advances the version of each collection; call after the write it describes. A failed bump
+    is logged rather than raised, since the write itself already succeeded; ETags also roll over
+    every ETAG_MAX_AGE_SECONDS, which bounds how long a missed bump can hide a change."""
+    for collection in collections:
+        try:
+            versions_table.update_item(
+                Key={"collection": collection},
+                UpdateExpression="ADD version :one",
+                ExpressionAttributeValues={":one": 1}
+            )
+        except Exception as e:
+            print(f"Version bump failed for {collection}: {e}")
+
+def version_items(collections):
+    """Raw CollectionVersionsTable items for `collections`, in one request. Unprocessed keys are
+    retried with backoff; a missing counter would read as version 0, so giving up raises."""
+    if not collections:
+        return {}
+    request = {versions_table.name: {"Keys": [{"collection": c} for c in set(collections)]}}
+    items = {}
+    attempt = 0
+    while request:
+        resp = dynamodb.batch_get_item(RequestItems=request)
+        for it in resp["Responses"].get(versions_table.name, []):
+            items[it["collection"]] = it
+        request = resp.get("UnprocessedKeys") or None
+        if request:
+            attempt += 1
+            if attempt > MAX_RETRIES:
+                raise RuntimeError(f"version_items: keys still unprocessed after {MAX_RETRIES} retries")
+            time.sleep(random.uniform(0, min(1.0, 0.05 * (2 ** attempt))))
+    return items
+
+def current_versions(collections):
+    return {c: int(it.get("version", 0)) for c, it in version_items(collections).items()}
+
+def collection_etag(event, *collections, versions=None):
+    """Strong ETag for a read of `collections`, derived from their version counters and the
+    request's path and query parameters rather than from the response body. Pass `versions`
+    when the caller has already read them."""
+    if versions is None:
+        versions = current_versions(collections)
+    raw = json.dumps([
+        event.get("resource") or event.get("path"),
+        sorted((event.get("pathParameters") or {}).items()),
+        sorted((event.get("queryStringParameters") or {}).items()),
+        [versions.get(c, 0) for c in collections],
+        int(time.time() // MAX_AGE_SECONDS),
+    ])
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
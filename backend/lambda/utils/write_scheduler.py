@@ -0,0 +1,197 @@
+import os
+import time
+import random
+import threading
+import boto3
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeSerializer
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_SIZE = 25
+THROTTLING_ERRORS = ("ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded")
+
+dynamodb_client = boto3.client("dynamodb")
+_serializer = TypeSerializer()
+
+def _env(name, default):
+    return float(os.environ.get(name, default))
+
+class TokenBucket:
+    """Rate limiter in write requests per second. The rate follows AIMD: it grows by
+    `increase` after every clean batch and is cut by `decrease` on any throttling signal."""
+
+    def __init__(self, rate, min_rate, max_rate, increase, decrease=0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, n):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                capacity = max(self.rate, BATCH_SIZE)
+                self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0)
+
+class WriteScheduler:
+    """Shared path for bulk DynamoDB writes.
+
+    Requests are buffered per table into 25-item BatchWriteItem calls that run on a
+    bounded thread pool, paced by a TokenBucket. Unprocessed items and throttling errors
+    are retried with jittered exponential backoff. Buffers and pending batches are kept
+    per calling thread, so threads can share one scheduler (and its pacing): flush() sends
+    and waits for what the calling thread queued and re-raises its first failure.
+    """
+
+    def __init__(self, name, rate=None, min_rate=None, max_rate=None, max_in_flight=None, max_retries=None):
+        self.name = name
+        self.bucket = TokenBucket(
+            rate or _env("WRITE_RATE", "1000"),
+            min_rate or _env("WRITE_MIN_RATE", "25"),
+            max_rate or _env("WRITE_MAX_RATE", "10000"),
+            _env("WRITE_RATE_INCREASE", "50"),
+        )
+        self.max_in_flight = int(max_in_flight or _env("WRITE_MAX_IN_FLIGHT", "8"))
+        self.max_retries = int(max_retries or _env("WRITE_MAX_RETRIES", "8"))
+        self._slots = threading.BoundedSemaphore(self.max_in_flight * 2)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._local = threading.local()
+        self._metrics = {"written": 0, "batches": 0, "calls": 0, "retries": 0, "throttles": 0}
+
+    def put(self, table_name, item):
+        self._buffer(table_name, {"PutRequest": {"Item": self._serialize(item)}})
+
+    def delete(self, table_name, key):
+        self._buffer(table_name, {"DeleteRequest": {"Key": self._serialize(key)}})
+
+    def submit(self, table_name, requests):
+        """Queues raw BatchWriteItem requests, blocking while too many batches are pending."""
+        for i in range(0, len(requests), BATCH_SIZE):
+            chunk = requests[i:i + BATCH_SIZE]
+            self._slots.acquire()
+            future = self._executor().submit(self._write, table_name, chunk)
+            future.add_done_callback(lambda _: self._slots.release())
+            self._futures().append(future)
+
+    def flush(self):
+        buffers, self._local.buffers = self._buffers(), {}
+        for table_name, requests in buffers.items():
+            if requests:
+                self.submit(table_name, requests)
+
+        futures, self._local.futures = self._futures(), []
+        errors = [e for e in (f.exception() for f in futures) if e]
+        if errors:
+            raise errors[0]
+
+    def call(self, fn, *args, **kwargs):
+        """Runs a single write (update_item, conditional put, ...) under the same pacing."""
+        attempt = 0
+        while True:
+            self.bucket.acquire(1)
+            try:
+                result = fn(*args, **kwargs)
+                self._count("calls", 1)
+                self.bucket.on_success()
+                return result
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                    raise
+                attempt = self._backoff(attempt, f"call {getattr(fn, '__name__', fn)} still throttled")
+
+    def metrics(self):
+        with self._lock:
+            return {**self._metrics, "rate": round(self.bucket.rate, 1)}
+
+    def log_metrics(self):
+        print(f"write_scheduler[{self.name}]:", self.metrics())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+
+    def _buffers(self):
+        if not hasattr(self._local, "buffers"):
+            self._local.buffers = {}
+        return self._local.buffers
+
+    def _futures(self):
+        if not hasattr(self._local, "futures"):
+            self._local.futures = []
+        return self._local.futures
+
+    def _buffer(self, table_name, request):
+        buffers = self._buffers()
+        buf = buffers.setdefault(table_name, [])
+        buf.append(request)
+        if len(buf) < BATCH_SIZE:
+            return
+        buffers[table_name] = []
+        self.submit(table_name, buf)
+
+    def _write(self, table_name, requests):
+        attempt = 0
+        while requests:
+            self.bucket.acquire(len(requests))
+            try:
+                resp = dynamodb_client.batch_write_item(RequestItems={table_name: requests})
+                unprocessed = resp.get("UnprocessedItems", {}).get(table_name, [])
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in THROTTLING_ERRORS:
+                    raise
+                unprocessed = requests
+
+            self._count("batches", 1)
+            self._count("written", len(requests) - len(unprocessed))
+            if not unprocessed:
+                self.bucket.on_success()
+                return
+            requests = unprocessed
+            attempt = self._backoff(attempt, f"{len(requests)} items for {table_name} still unprocessed")
+
+    def _backoff(self, attempt, message):
+        self.bucket.on_throttle()
+        self._count("throttles", 1)
+        attempt += 1
+        if attempt > self.max_retries:
+            raise RuntimeError(f"write_scheduler[{self.name}]: {message} after {self.max_retries} retries")
+        self._count("retries", 1)
+        time.sleep(random.uniform(0, min(2.0, 0.05 * (2 ** attempt))))
+        return attempt
+
+    def _count(self, key, n):
+        with self._lock:
+            self._metrics[key] += n
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_in_flight)
+            return self._pool
+
+    @staticmethod
+    def _serialize(item):
+        return {k: _serializer.serialize(v) for k, v in item.items()}
@@ -0,0 +1,47 @@
+import os
+import runpy
+import pytest
+
+pytest.importorskip("aws_cdk")
+import aws_cdk.assertions as assertions
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "..")
+
+
+@pytest.fixture(scope="module")
+def template(tmp_path_factory):
+    cwd = os.getcwd()
+    os.environ["CDK_OUTDIR"] = str(tmp_path_factory.mktemp("cdk.out"))
+    os.chdir(BACKEND)
+    try:
+        app = runpy.run_path("app.py")
+    finally:
+        os.chdir(cwd)
+        del os.environ["CDK_OUTDIR"]
+    return assertions.Template.from_stack(app["api_stack"])
+
+
+def _methods(template, http_method):
+    return [m["Properties"] for m in template.find_resources("AWS::ApiGateway::Method").values()
+            if m["Properties"]["HttpMethod"] == http_method]
+
+
+def test_preflights_are_text_mock_integrations(template):
+    resources = template.find_resources("AWS::ApiGateway::Resource")
+    preflights = _methods(template, "OPTIONS")
+    # One per resource plus the root.
+    assert len(preflights) == len(resources) + 1
+    for method in preflights:
+        assert method["AuthorizationType"] == "NONE"
+        assert method["Integration"]["Type"] == "MOCK"
+        assert method["Integration"]["ContentHandling"] == "CONVERT_TO_TEXT"
+        headers = method["Integration"]["IntegrationResponses"][0]["ResponseParameters"]
+        assert headers["method.response.header.Access-Control-Allow-Headers"] == \
+            "'Content-Type,Authorization,If-None-Match'"
+
+
+def test_api_methods_stay_proxy_integrations(template):
+    for http_method in ("GET", "POST", "PUT", "DELETE"):
+        for method in _methods(template, http_method):
+            assert method["Integration"]["Type"] == "AWS_PROXY"
+            assert method["AuthorizationType"] == "COGNITO_USER_POOLS"
@@ -0,0 +1,83 @@
+import os
+import sys
+import importlib
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+mock_aws = getattr(moto, "mock_aws", None)
+if mock_aws is None:
+    pytest.skip("needs moto 5", allow_module_level=True)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+TABLES = {
+    "SONGS_TABLE": ("SongsTable", ["id", "title"]),
+    "ALBUMS_TABLE": ("AlbumsTable", ["id", "title"]),
+    "ARTISTS_TABLE": ("ArtistsTable", ["id", "name"]),
+    "GENRES_TABLE": ("GenresTable", ["id", "name"]),
+    "GENRE_CATALOG_TABLE": ("GenreCatalogTable", ["PK", "SK"]),
+    "VERSIONS_TABLE": ("CollectionVersionsTable", ["collection"]),
+}
+for env, (name, _) in TABLES.items():
+    os.environ[env] = name
+os.environ["SNAPSHOT_BUCKET"] = "snapshots"
+
+
+@mock_aws()
+def test_builder_writes_deltas_that_readers_apply():
+    dynamodb = boto3.resource("dynamodb")
+    for name, keys in TABLES.values():
+        dynamodb.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": k, "KeyType": t} for k, t in zip(keys, ("HASH", "RANGE"))],
+            AttributeDefinitions=[{"AttributeName": k, "AttributeType": "S"} for k in keys],
+            BillingMode="PAY_PER_REQUEST",
+        )
+    boto3.client("s3").create_bucket(Bucket="snapshots")
+
+    versions = importlib.reload(importlib.import_module("utils.versions"))
+    snapshot = importlib.reload(importlib.import_module("utils.snapshot"))
+    build = importlib.reload(importlib.import_module("catalog.build_snapshot"))
+    from utils.pagination import PaginationError, decode_cursor
+
+    songs = dynamodb.Table("SongsTable")
+    for i in range(30):
+        songs.put_item(Item={"id": f"s{i:02d}", "title": f"Song {i}", "genres": ["Jazz"]})
+    dynamodb.Table("GenreCatalogTable").put_item(Item={"PK": "GENRE#Jazz", "SK": "SONG#s00", "entityType": "SONG"})
+    versions.bump("songs")
+
+    assert build.handler({}, None)["changed"]
+    assert not build.handler({}, None)["changed"]
+
+    live = snapshot.current_versions(["songs", "genres"])
+    assert snapshot.fresh(["songs", "genres"], live)
+    page = {"limit": 20, "startKey": None, "fields": ["title"]}
+    first, cursor = snapshot.page_items("songs", page, ["id", "title"])
+    assert [s["id"] for s in first] == [f"s{i:02d}" for i in range(20)]
+    assert set(first[0]) == {"id", "title"}
+    assert snapshot.partition("genre_catalog", "GENRE#Jazz")[0]["SK"] == "SONG#s00"
+
+    songs.delete_item(Key={"id": "s05", "title": "Song 5"})
+    songs.put_item(Item={"id": "s05", "title": "Renamed"})
+    songs.delete_item(Key={"id": "s29", "title": "Song 29"})
+    versions.bump("songs")
+    live = snapshot.current_versions(["songs"])
+    assert not snapshot.fresh(["songs"], live)
+
+    result = build.handler({}, None)
+    assert result["object"].startswith("snapshot/delta-")
+    live = snapshot.current_versions(["songs"])
+    assert snapshot.fresh(["songs"], live)
+
+    page = {"limit": 20, "startKey": decode_cursor(cursor), "fields": None}
+    with pytest.raises(PaginationError):
+        snapshot.use_snapshot(page, ["songs"], dict(live, songs=live["songs"] + 1))
+    assert snapshot.use_snapshot(page, ["songs"], live)
+    rest, cursor = snapshot.page_items("songs", page, ["id", "title"])
+    assert [s["id"] for s in rest] == [f"s{i:02d}" for i in range(20, 29)]
+    assert cursor is None
+    titles = {s["id"]: s["title"] for s in snapshot.items("songs")}
+    assert titles["s05"] == "Renamed" and "s29" not in titles
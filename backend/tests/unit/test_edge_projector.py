@@ -0,0 +1,87 @@
+import os
+import sys
+import importlib
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+mock_aws = getattr(moto, "mock_aws", None)
+if mock_aws is None:
+    pytest.skip("needs moto 5", allow_module_level=True)
+
+from boto3.dynamodb.types import TypeSerializer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+TABLES = {
+    "SONGS_TABLE": ("SongsTable", ["id", "title"]),
+    "ALBUMS_TABLE": ("AlbumsTable", ["id", "title"]),
+    "ARTISTS_TABLE": ("ArtistsTable", ["id", "name"]),
+    "GENRES_TABLE": ("GenresTable", ["id", "name"]),
+    "GENRE_CATALOG_TABLE": ("GenreCatalogTable", ["PK", "SK"]),
+    "ARTIST_CATALOG_TABLE": ("ArtistCatalogTable", ["PK", "SK"]),
+    "VERSIONS_TABLE": ("CollectionVersionsTable", ["collection"]),
+}
+for env, (name, _) in TABLES.items():
+    os.environ[env] = name
+
+_serializer = TypeSerializer()
+
+
+def _record(event_name, old=None, new=None):
+    ddb = {}
+    if old:
+        ddb["OldImage"] = {k: _serializer.serialize(v) for k, v in old.items()}
+    if new:
+        ddb["NewImage"] = {k: _serializer.serialize(v) for k, v in new.items()}
+    arn = "arn:aws:dynamodb:us-east-1:123456789012:table/SongsTable/stream/2024"
+    return {"eventName": event_name, "eventSourceARN": arn, "dynamodb": ddb}
+
+
+def _keys(table):
+    return sorted((it["PK"], it["SK"]) for it in table.scan()["Items"])
+
+
+@mock_aws()
+def test_projects_edges_through_edits_renames_and_deletes():
+    dynamodb = boto3.resource("dynamodb")
+    for name, keys in TABLES.values():
+        dynamodb.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": k, "KeyType": t} for k, t in zip(keys, ("HASH", "RANGE"))],
+            AttributeDefinitions=[{"AttributeName": k, "AttributeType": "S"} for k in keys],
+            BillingMode="PAY_PER_REQUEST",
+        )
+    projector = importlib.reload(importlib.import_module("catalog.edge_projector"))
+    songs = dynamodb.Table("SongsTable")
+    genre_catalog = dynamodb.Table("GenreCatalogTable")
+    artist_catalog = dynamodb.Table("ArtistCatalogTable")
+
+    v1 = {"id": "s1", "title": "One", "genres": ["Jazz", "Soul"], "artistIds": ["a1"]}
+    songs.put_item(Item=v1)
+    projector.handler({"Records": [_record("INSERT", new=v1)]}, None)
+    assert _keys(genre_catalog) == [("GENRE#Jazz", "SONG#s1"), ("GENRE#Soul", "SONG#s1")]
+    assert _keys(artist_catalog) == [("ARTIST#a1", "SONG#s1")]
+
+    # A rename is an INSERT of the new key and a REMOVE of the old one, here in separate batches.
+    v2 = dict(v1, title="Two", genres=["Jazz"])
+    songs.put_item(Item=v2)
+    songs.delete_item(Key={"id": "s1", "title": "One"})
+    projector.handler({"Records": [_record("INSERT", new=v2)]}, None)
+    projector.handler({"Records": [_record("REMOVE", old=v1)]}, None)
+    assert _keys(genre_catalog) == [("GENRE#Jazz", "SONG#s1")]
+    assert genre_catalog.get_item(Key={"PK": "GENRE#Jazz", "SK": "SONG#s1"})["Item"]["title"] == "Two"
+
+    songs.delete_item(Key={"id": "s1", "title": "Two"})
+    projector.handler({"Records": [_record("REMOVE", old=v2)]}, None)
+    assert _keys(genre_catalog) == [] and _keys(artist_catalog) == []
+
+    # A rebuild restores edges from the tables and drops orphans.
+    songs.put_item(Item=v1)
+    genre_catalog.put_item(Item={"PK": "GENRE#Gone", "SK": "SONG#x"})
+    dynamodb.Table("ArtistsTable").put_item(Item={"id": "a1", "name": "Ann", "genres": []})
+    projector.handler({"rebuild": True}, None)
+    assert _keys(genre_catalog) == [("GENRE#Jazz", "SONG#s1"), ("GENRE#Soul", "SONG#s1")]
+    assert _keys(artist_catalog) == [("ARTIST#a1", "SONG#s1")]
@@ -0,0 +1,45 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+from feed.coalesce import parse_records, coalesce
+
+
+def _record(i, ts, **msg):
+    body = {"Timestamp": ts, "MessageId": f"sns-{i}", "Message": json.dumps(msg)}
+    return {"messageId": f"m{i}", "body": json.dumps(body)}
+
+
+def test_merges_per_user_and_deduplicates_uploads():
+    records = [
+        _record(1, "2024-01-01T00:00:03", eventType="song_listened", userId="u1", songId="s1", title="One"),
+        _record(2, "2024-01-01T00:00:01", eventType="song_listened", userId="u1", songId="s1"),
+        _record(3, "2024-01-01T00:00:02", eventType="user_rated", userId="u1", contentId="s2", rating=2),
+        _record(4, "2024-01-01T00:00:04", eventType="rating_deleted", userId="u1", contentId="s2"),
+        _record(5, "2024-01-01T00:00:05", eventType="user_subscribed", userId="u1", targetId="g1"),
+        _record(6, "2024-01-01T00:00:06", eventType="user_unsubscribed", userId="u1", targetId="g1"),
+        _record(7, "2024-01-01T00:00:07", eventType="user_subscribed", userId="u1", targetId="g2"),
+        _record(8, "2024-01-01T00:00:00", eventType="song_uploaded", songId="s9"),
+        _record(9, "2024-01-01T00:00:08", eventType="song_uploaded", songId="s9"),
+        _record(10, "2024-01-01T00:00:09", eventType="song_listened", songId="s1"),
+        {"messageId": "bad", "body": "not json"},
+    ]
+    events = parse_records(records)
+    assert len(events) == 10
+    assert [e["messageId"] for e in events][:2] == ["m8", "m2"]
+
+    upload, user, passthrough = coalesce(events)
+    assert upload["kind"] == "upload" and len(upload["events"]) == 2
+
+    assert user["userId"] == "u1"
+    assert user["listens"] == {"s1": 2}
+    assert user["titles"] == {"s1": "One"}
+    assert [ev["eventType"] for ev in user["ratings"].values()] == ["rating_deleted"]
+    # Subscribe then unsubscribe cancels out; only g2 is left.
+    assert {t: ev["eventType"] for t, ev in user["subscriptions"].items()} == {"g2": "user_subscribed"}
+    assert len(user["events"]) == 7
+
+    assert passthrough["kind"] == "event" and passthrough["msg"]["songId"] == "s1"
+    assert sum(len(u["events"]) for u in (upload, user, passthrough)) == len(events)
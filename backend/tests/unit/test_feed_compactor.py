@@ -0,0 +1,63 @@
+import os
+import sys
+import importlib
+import pytest
+from decimal import Decimal
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+mock_aws = getattr(moto, "mock_aws", None)
+if mock_aws is None:
+    pytest.skip("needs moto 5", allow_module_level=True)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.update({
+    "FEED_TABLE": "UserFeedTable",
+    "COMPACTION_STATE_TABLE": "FeedCompactionState",
+    "FEED_MAX_RAW_ROWS": "5",
+})
+
+NOW_MS = 1_700_000_000_000
+
+
+def _row(i, content_id, source="ARTIST#a1"):
+    return {
+        "userId": "u1",
+        "createdAt": f"{NOW_MS - i * 1000:013d}-{i:04x}",
+        "type": "SONG",
+        "contentId": content_id,
+        "contentKey": f"{content_id}#SONG",
+        "sourceKey": source,
+        "score": Decimal(1),
+    }
+
+
+@mock_aws()
+def test_partition_is_capped_even_when_groups_are_single_rows():
+    dynamodb = boto3.resource("dynamodb")
+    table = dynamodb.create_table(
+        TableName="UserFeedTable",
+        KeySchema=[{"AttributeName": "userId", "KeyType": "HASH"}, {"AttributeName": "createdAt", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": a, "AttributeType": "S"} for a in ("userId", "createdAt")],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    compactor = importlib.reload(importlib.import_module("feed.compactor"))
+
+    # Twelve distinct songs (one row each) plus three rows of one song past the cap.
+    for i in range(12):
+        table.put_item(Item=_row(i, f"s{i}"))
+    for i in range(12, 15):
+        table.put_item(Item=_row(i, "repeat"))
+    table.put_item(Item={"userId": "u1", "createdAt": "LISTEN#s0", "type": "SONG", "sourceType": "LISTEN", "score": Decimal(3)})
+
+    assert compactor.compact_partition(table, "u1", NOW_MS) == 10
+    rows = table.query(KeyConditionExpression=boto3.dynamodb.conditions.Key("userId").eq("u1"))["Items"]
+    raw = [r for r in rows if not r.get("summary") and r.get("sourceType") != "LISTEN"]
+    summaries = [r for r in rows if r.get("summary")]
+
+    assert sorted(r["contentId"] for r in raw) == [f"s{i}" for i in range(5)]
+    assert [(s["contentId"], s["score"], s["foldedRows"]) for s in summaries] == [("repeat", 3, 3)]
+    assert any(r["createdAt"] == "LISTEN#s0" for r in rows)
@@ -0,0 +1,48 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+from feed.feed_keys import new_sort_key, stable_suffix, sort_key_ms, listen_sort_key
+
+
+def test_new_sort_keys_are_unique_and_increasing():
+    keys = [new_sort_key(ms=1_700_000_000_000) for _ in range(1000)]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+    later = new_sort_key()
+    assert later > keys[-1]
+    # An explicit time in the past never moves a process's keys backwards.
+    assert new_sort_key(ms=1_600_000_000_000) > later
+
+
+def test_new_sort_keys_are_unique_across_threads():
+    keys = []
+    lock = threading.Lock()
+
+    def worker():
+        batch = [new_sort_key() for _ in range(500)]
+        assert batch == sorted(batch)
+        with lock:
+            keys.extend(batch)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(keys)) == len(keys)
+
+
+def test_stable_suffix_gives_the_same_key_on_retries():
+    suffix = stable_suffix("song_uploaded", "s1")
+    assert new_sort_key(1_700_000_000_000, suffix) == new_sort_key(1_700_000_000_000, suffix)
+
+
+def test_sort_key_ms_reads_current_and_legacy_keys():
+    assert sort_key_ms(new_sort_key(1_700_000_000_123, stable_suffix("x"))) == 1_700_000_000_123
+    assert sort_key_ms("1700000000123") == 1_700_000_000_123
+    assert sort_key_ms(listen_sort_key("s1")) is None
+    assert sort_key_ms(None) is None
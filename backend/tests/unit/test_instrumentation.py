@@ -0,0 +1,82 @@
+import os
+import sys
+import json
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+mock_aws = getattr(moto, "mock_aws", None) or moto.mock_dynamodb
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from utils import instrumentation
+from utils.instrumentation import instrumented, instrument_session
+
+
+class FakeContext:
+    function_name = "test-fn"
+
+
+def _emf_lines(out):
+    return [json.loads(line) for line in out.splitlines() if line.startswith("{") and "_aws" in line]
+
+
+@mock_aws()
+def test_records_calls_capacity_and_cold_start(capsys):
+    # mock_aws replaces boto3's default session, so instrument the one the test uses.
+    dynamodb = instrument_session(boto3.session.Session()).resource("dynamodb")
+    dynamodb.create_table(
+        TableName="Items",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table = dynamodb.Table("Items")
+
+    @instrumented
+    def handler(event, context):
+        table.put_item(Item={"id": "1"})
+        return table.get_item(Key={"id": "1"})["Item"]
+
+    instrumentation._cold_start = True
+    capsys.readouterr()
+    assert handler({}, FakeContext()) == {"id": "1"}
+    first = _emf_lines(capsys.readouterr().out)
+
+    summary = first[0]
+    assert summary["Function"] == "test-fn"
+    assert summary["ColdStart"] == 1
+    assert summary["AwsCalls"] == 2
+
+    ops = {(line["Operation"], line["Table"]): line for line in first[1:]}
+    assert ops[("PutItem", "Items")]["Calls"] == 1
+    assert ops[("GetItem", "Items")]["Calls"] == 1
+    assert ops[("GetItem", "Items")]["ConsumedCapacityUnits"] > 0
+
+    handler({}, FakeContext())
+    second = _emf_lines(capsys.readouterr().out)
+    assert second[0]["ColdStart"] == 0
+    assert second[0]["AwsCalls"] == 2
+    assert all(line["Errors"] == 0 for line in second[1:])
+
+
+@mock_aws()
+def test_counts_service_errors(capsys):
+    client = instrument_session(boto3.session.Session()).client("dynamodb")
+
+    @instrumented
+    def handler(event, context):
+        try:
+            client.get_item(TableName="Missing", Key={"id": {"S": "1"}})
+        except client.exceptions.ResourceNotFoundException:
+            pass
+
+    capsys.readouterr()
+    handler({}, FakeContext())
+    lines = _emf_lines(capsys.readouterr().out)
+    ops = {(line["Operation"], line["Table"]): line for line in lines[1:]}
+    assert ops[("GetItem", "Missing")]["Calls"] == 1
+    assert ops[("GetItem", "Missing")]["Errors"] == 1
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+from search.index import Searcher, Segment, build_segment, doc_key
+
+
+def _segment(tmp_path, name, docs, deleted=()):
+    path = tmp_path / name
+    path.write_bytes(build_segment(docs, deleted))
+    return Segment(str(path))
+
+
+def test_ranks_title_matches_and_expands_prefixes(tmp_path):
+    base = _segment(tmp_path, "base", [
+        {"id": "1", "type": "SONG", "title": "Blue Moon", "genres": ["Jazz"], "artistNames": ["Billie"]},
+        {"id": "2", "type": "SONG", "title": "Moonlight Sonata", "genres": ["Classical"]},
+        {"id": "3", "type": "ARTIST", "name": "Björk", "genres": ["Pop"]},
+        {"id": "4", "type": "GENRE", "name": "Jazz"},
+    ])
+    searcher = Searcher([base])
+
+    assert [r["id"] for r in searcher.search("moon")] == ["1", "2"]
+    assert searcher.search("bjo")[0]["id"] == "3"
+    assert {r["id"] for r in searcher.search("jazz", types={"GENRE"})} == {"4"}
+    assert searcher.search("   ") == []
+
+
+def test_delta_segments_replace_and_delete_base_docs(tmp_path):
+    docs = [{"id": "1", "type": "SONG", "title": "Old Title"}, {"id": "2", "type": "SONG", "title": "Old Friend"}]
+    base = _segment(tmp_path, "base", docs)
+    delta = _segment(tmp_path, "delta", [{"id": "1", "type": "SONG", "title": "New Title"}], deleted=[doc_key(docs[1])])
+    searcher = Searcher([base, delta])
+
+    assert searcher.search("old") == []
+    assert [r["title"] for r in searcher.search("title")] == ["New Title"]
@@ -0,0 +1,125 @@
+import os
+import sys
+import json
+import importlib
+import pytest
+from decimal import Decimal
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+mock_aws = getattr(moto, "mock_aws", None)
+if mock_aws is None:
+    pytest.skip("needs moto 5", allow_module_level=True)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.update({
+    "FEED_TABLE": "UserFeedTable",
+    "SONGS_TABLE": "SongsTable",
+    "ALBUMS_TABLE": "AlbumsTable",
+    "ARTISTS_TABLE": "ArtistsTable",
+    "TOP_FEED_TABLE": "UserTopFeedTable",
+    "SUBSCRIPTIONS_TABLE": "SubscriptionsTable",
+    "SUBSCRIBER_COUNTS_TABLE": "SubscriberCountsTable",
+    "TOP_FEED_SIZE": "2",
+})
+
+
+def _create(dynamodb, name, keys, index=None):
+    attrs = set(keys) | set(index[1] if index else [])
+    spec = {
+        "TableName": name,
+        "KeySchema": [{"AttributeName": k, "KeyType": t} for k, t in zip(keys, ("HASH", "RANGE"))],
+        "AttributeDefinitions": [{"AttributeName": a, "AttributeType": "S"} for a in sorted(attrs)],
+        "BillingMode": "PAY_PER_REQUEST",
+    }
+    if index:
+        spec["GlobalSecondaryIndexes"] = [{
+            "IndexName": index[0],
+            "KeySchema": [{"AttributeName": k, "KeyType": t} for k, t in zip(index[1], ("HASH", "RANGE"))],
+            "Projection": {"ProjectionType": "KEYS_ONLY"},
+        }]
+    dynamodb.create_table(**spec)
+
+
+def _row(created_at, song_id, score):
+    return {"userId": "u1", "createdAt": created_at, "type": "SONG", "contentId": song_id,
+            "contentKey": f"{song_id}#SONG", "title": song_id.upper(), "score": Decimal(score)}
+
+
+@mock_aws()
+def test_update_merges_changed_entries_and_rebuilds_on_demotion():
+    dynamodb = boto3.resource("dynamodb")
+    _create(dynamodb, "UserFeedTable", ["userId", "createdAt"], ("UserContentIndex", ["userId", "contentKey"]))
+    _create(dynamodb, "SongsTable", ["id", "title"], ("SongIdIndex", ["id"]))
+    _create(dynamodb, "AlbumsTable", ["id", "title"], ("AlbumIdIndex", ["id"]))
+    _create(dynamodb, "ArtistsTable", ["id", "name"], ("ArtistIdIndex", ["id"]))
+    _create(dynamodb, "UserTopFeedTable", ["userId"])
+    ranking = importlib.reload(importlib.import_module("feed.ranking"))
+
+    songs = dynamodb.Table("SongsTable")
+    feed = dynamodb.Table("UserFeedTable")
+    for sid in ("s1", "s2", "s3"):
+        songs.put_item(Item={"id": sid, "title": sid.upper()})
+    feed.put_item(Item=_row("0000000000001-a", "s1", 5))
+    feed.put_item(Item=_row("0000000000002-a", "s2", 3))
+    feed.put_item(Item=_row("0000000000003-a", "s3", 1))
+    ranking.refresh_top_feed("u1")
+
+    def listed():
+        return [(e["song"]["id"], float(e["score"])) for e in ranking.load_top_feed("u1")["songs"]]
+    assert listed() == [("s1", 5.0), ("s2", 3.0)]
+
+    # s3 gains score and overtakes s2 without a rebuild.
+    feed.put_item(Item=_row("0000000000004-a", "s3", 4))
+    assert ranking.update_top_feed("u1", ["s3"]) is not None
+    assert listed() == [("s1", 5.0), ("s3", 5.0)]
+
+    # A listed entry losing score in a full category asks for a rebuild.
+    feed.delete_item(Key={"userId": "u1", "createdAt": "0000000000001-a"})
+    assert ranking.update_top_feed("u1", ["s1"]) is None
+
+    ranking.invalidate_top_feed("u1")
+    assert ranking.update_top_feed("u1", ["s3"]) is None
+
+
+@mock_aws()
+def test_update_merges_with_the_stacks_default_weights(monkeypatch):
+    feed_stack = pytest.importorskip("backend_stack.feed_stack")
+    monkeypatch.setenv("FEED_WEIGHTS", json.dumps(feed_stack.DEFAULT_FEED_WEIGHTS))
+    importlib.reload(importlib.import_module("feed.scoring"))
+    dynamodb = boto3.resource("dynamodb")
+    _create(dynamodb, "UserFeedTable", ["userId", "createdAt"], ("UserContentIndex", ["userId", "contentKey"]))
+    _create(dynamodb, "SongsTable", ["id", "title"], ("SongIdIndex", ["id"]))
+    _create(dynamodb, "AlbumsTable", ["id", "title"], ("AlbumIdIndex", ["id"]))
+    _create(dynamodb, "ArtistsTable", ["id", "name"], ("ArtistIdIndex", ["id"]))
+    _create(dynamodb, "UserTopFeedTable", ["userId"])
+    ranking = importlib.reload(importlib.import_module("feed.ranking"))
+
+    dynamodb.Table("SongsTable").put_item(Item={"id": "s1", "title": "S1"})
+    dynamodb.Table("UserFeedTable").put_item(Item=_row("0000000000001-a", "s1", 5))
+    ranking.refresh_top_feed("u1")
+    assert ranking.update_top_feed("u1", ["s1"]) is not None
+
+
+@mock_aws()
+def test_pull_targets_are_cached_on_the_top_feed_document():
+    dynamodb = boto3.resource("dynamodb")
+    _create(dynamodb, "UserTopFeedTable", ["userId"])
+    _create(dynamodb, "SubscriptionsTable", ["userId", "targetId"])
+    _create(dynamodb, "SubscriberCountsTable", ["targetId"])
+    ranking = importlib.reload(importlib.import_module("feed.ranking"))
+
+    dynamodb.Table("SubscriptionsTable").put_item(Item={"userId": "u1", "targetId": "big"})
+    dynamodb.Table("SubscriberCountsTable").put_item(Item={"targetId": "big", "lastPullAt": "2024-01-01T00:00:00"})
+    ranking.save_top_feed("u1", {"songs": [], "albums": [], "artists": []})
+
+    assert ranking.cached_pull_targets("u1", ranking.load_top_feed("u1")) == ["big"]
+    dynamodb.Table("SubscriptionsTable").delete_item(Key={"userId": "u1", "targetId": "big"})
+    feed = ranking.load_top_feed("u1")
+    assert ranking.cached_pull_targets("u1", feed) == ["big"]
+
+    feed["pullTargetsAt"] -= ranking.PULL_TARGETS_TTL_SECONDS
+    assert ranking.cached_pull_targets("u1", feed) == []
@@ -0,0 +1,34 @@
+import os
+import sys
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("VERSIONS_TABLE", "CollectionVersionsTable")
+
+from utils import versions
+
+
+def test_version_items_retries_unprocessed_keys(monkeypatch):
+    calls = []
+
+    def batch_get_item(RequestItems):
+        keys = RequestItems["CollectionVersionsTable"]["Keys"]
+        calls.append(sorted(k["collection"] for k in keys))
+        if len(calls) == 1:
+            first = sorted(keys, key=lambda k: k["collection"])[0]
+            return {
+                "Responses": {"CollectionVersionsTable": [{"collection": first["collection"], "version": 3}]},
+                "UnprocessedKeys": {"CollectionVersionsTable": {"Keys": [k for k in keys if k != first]}},
+            }
+        return {"Responses": {"CollectionVersionsTable": [{"collection": k["collection"], "version": 7} for k in keys]}}
+
+    monkeypatch.setattr(versions.dynamodb, "batch_get_item", batch_get_item)
+    monkeypatch.setattr(versions.time, "sleep", lambda s: None)
+
+    assert versions.current_versions(["albums", "songs"]) == {"albums": 3, "songs": 7}
+    assert calls == [["albums", "songs"], ["songs"]]
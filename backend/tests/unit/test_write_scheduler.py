@@ -0,0 +1,87 @@
+import os
+import sys
+import threading
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+from utils import write_scheduler
+from utils.write_scheduler import TokenBucket, WriteScheduler
+
+
+def test_token_bucket_backs_off_multiplicatively_and_recovers_additively():
+    bucket = TokenBucket(rate=100, min_rate=10, max_rate=120, increase=5)
+    bucket.on_throttle()
+    assert bucket.rate == 50 and bucket.tokens <= 0
+    bucket.on_throttle()
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == 10
+
+    for _ in range(3):
+        bucket.on_success()
+    assert bucket.rate == 25
+    for _ in range(100):
+        bucket.on_success()
+    assert bucket.rate == 120
+
+
+def test_throttled_batches_are_retried_and_slow_the_rate(monkeypatch):
+    unprocessed = [1]
+
+    def batch_write_item(RequestItems):
+        (table_name, requests), = RequestItems.items()
+        if unprocessed:
+            unprocessed.pop()
+            return {"UnprocessedItems": {table_name: requests[1:]}}
+        return {}
+
+    monkeypatch.setattr(write_scheduler.dynamodb_client, "batch_write_item", batch_write_item)
+    monkeypatch.setattr(write_scheduler.time, "sleep", lambda s: None)
+    scheduler = WriteScheduler("test", rate=1000, min_rate=10, max_rate=1000)
+    with scheduler:
+        for i in range(3):
+            scheduler.put("T", {"id": str(i)})
+
+    metrics = scheduler.metrics()
+    assert metrics["written"] == 3 and metrics["throttles"] == 1 and metrics["retries"] == 1
+    assert metrics["rate"] < 1000
+
+
+def test_flush_only_waits_for_the_calling_threads_writes(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    def batch_write_item(RequestItems):
+        for table_name, requests in RequestItems.items():
+            if table_name == "Slow":
+                started.set()
+                release.wait(5)
+            written.extend((table_name, r["PutRequest"]["Item"]["id"]["S"]) for r in requests)
+        return {}
+
+    monkeypatch.setattr(write_scheduler.dynamodb_client, "batch_write_item", batch_write_item)
+    scheduler = WriteScheduler("test")
+
+    for i in range(write_scheduler.BATCH_SIZE):
+        scheduler.put("Slow", {"id": str(i)})
+    assert started.wait(5)
+
+    def fast_writer():
+        scheduler.put("Fast", {"id": "a"})
+        scheduler.flush()
+        done.set()
+
+    done = threading.Event()
+    threading.Thread(target=fast_writer).start()
+    assert done.wait(2)
+    assert written == [("Fast", "a")]
+
+    release.set()
+    scheduler.flush()
+    assert len(written) == 1 + write_scheduler.BATCH_SIZE